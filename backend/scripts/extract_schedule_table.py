@@ -1,111 +1,298 @@
 import sys
 import json
-import pdfplumber
-import pandas as pd
+import hashlib
+import random
+import threading
+import time
 import re
-import requests
 import os
-from dotenv import load_dotenv
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 
-# Load environment variables
-load_dotenv()
+# pdfplumber, requests and python-dotenv are imported by the code paths that use
+# them: this script is spawned per upload, and a usage error or a text-only
+# extraction should not pay for the HTTP stack.
 
-def extract_schedule_data(pdf_path):
+GEMINI_ENDPOINT = "/api/schedule/extract-with-gemini"
+# Transient statuses worth another attempt; anything else fails the fallback at once
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RESULT_CACHE_SIZE = 256
+
+
+class GeminiFallbackError(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def load_env():
+    # Only the Gemini fallback reads the environment (API_URL etc.)
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def compact_text(text):
+    # The model only needs the words: collapse runs of blanks and drop empty lines
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class GeminiFallbackClient:
+    """
+    Pooled client for the Gemini extraction endpoint. Requests run on a small thread
+    pool over one keep-alive session, so at most max_concurrency calls are in flight;
+    each call has connect/read timeouts and is retried with exponential backoff on
+    connection errors and transient HTTP statuses, never sleeping longer than
+    max_backoff even when Retry-After asks for more. Identical texts (by SHA-256 of the
+    compacted text) share one request while in flight, and successful answers are
+    remembered for the rest of the process.
+
+    Settings default to the API_URL, GEMINI_FALLBACK_CONCURRENCY,
+    GEMINI_FALLBACK_TIMEOUT and GEMINI_FALLBACK_RETRIES environment variables.
+    """
+
+    def __init__(self, base_url=None, max_concurrency=None, timeout=None, retries=None,
+                 backoff=0.5, connect_timeout=5.0, max_backoff=30.0):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        load_env()
+        base_url = base_url or os.getenv('API_URL')
+        self.url = f"{base_url.rstrip('/')}{GEMINI_ENDPOINT}" if base_url else None
+        self.max_concurrency = max_concurrency or int(os.getenv('GEMINI_FALLBACK_CONCURRENCY', 4))
+        self.timeout = timeout or float(os.getenv('GEMINI_FALLBACK_TIMEOUT', 60))
+        self.retries = retries if retries is not None else int(os.getenv('GEMINI_FALLBACK_RETRIES', 2))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.connect_timeout = connect_timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="gemini-fallback")
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.results = {}
+
+    def submit(self, text):
+        """Returns a Future resolving to the endpoint's JSON answer or raising GeminiFallbackError."""
+        payload = compact_text(text)
+        key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        with self.lock:
+            if key in self.results:
+                future = Future()
+                future.set_result(self.results[key])
+                return future
+            future = self.pending.get(key)
+            if future is None:
+                future = self.executor.submit(self._post, key, payload)
+                self.pending[key] = future
+            return future
+
+    def extract(self, text):
+        return self.submit(text).result()
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        # Full jitter keeps parallel workers from retrying in lockstep
+        return random.uniform(0, min(self.backoff * 2 ** attempt, self.max_backoff))
+
+    def _post(self, key, payload):
+        import requests
+
+        try:
+            if not self.url:
+                raise GeminiFallbackError("API_URL is not set")
+            error = None
+            for attempt in range(self.retries + 1):
+                retry_after = None
+                try:
+                    response = self.session.post(self.url, json={"text": payload},
+                                                 timeout=(self.connect_timeout, self.timeout))
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = f"{type(e).__name__}: {e}"
+                else:
+                    if response.status_code == 200:
+                        data = response.json()
+                        if not data.get("success"):
+                            raise GeminiFallbackError("Gemini extraction failed")
+                        with self.lock:
+                            if len(self.results) >= RESULT_CACHE_SIZE:
+                                self.results.pop(next(iter(self.results)))
+                            self.results[key] = data
+                        return data
+                    if response.status_code not in RETRY_STATUSES:
+                        raise GeminiFallbackError(f"HTTP {response.status_code}")
+                    error = f"HTTP {response.status_code}"
+                    retry_after = response.headers.get("Retry-After")
+                if attempt < self.retries:
+                    time.sleep(self._delay(attempt, retry_after))
+            raise GeminiFallbackError(f"Gemini extraction failed after {self.retries + 1} attempts: {error}")
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+
+_fallback_client = None
+
+
+def get_fallback_client():
+    # Created on first use so forked worker processes each get their own pool
+    global _fallback_client
+    if _fallback_client is None:
+        _fallback_client = GeminiFallbackClient()
+    return _fallback_client
+
+
+def _resolve_fallback(future):
+    try:
+        return future.result()
+    except Exception as gemini_error:
+        print(f"Gemini extraction failed: {str(gemini_error)}")
+        return {
+            "success": False,
+            "error": "Both regular and Gemini extraction failed"
+        }
+
+
+SPECIALITY_RE = re.compile(r'Schedules of\s*:\s*(.+?)\s*--\s*Section:\s*([A-Z])', re.IGNORECASE)
+YEAR_RE = re.compile(r'College year:\s*(\d{4}/\d{4})', re.IGNORECASE)
+SEMESTER_RE = re.compile(r'Semester:\s*(\d+)', re.IGNORECASE)
+DATE_RE = re.compile(r'Date:\s*(\d{2}/\d{2}/\d{4})', re.IGNORECASE)
+GROUP_RE = re.compile(r'G(\d)')
+TIME_SLOT_RE = re.compile(r'^\d{1,2}:\d{2}\s*-\s*\d{1,2}:\d{2}$')
+DAY_RE = re.compile(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)$', re.IGNORECASE)
+COURSE_CODE_RE = re.compile(r'[A-Z]+\d+')
+
+# Substrings every match of the pattern above must contain once lowercased. They
+# avoid "i", "k" and "s", which IGNORECASE also matches against non-ASCII letters.
+SPECIALITY_HINT = "chedule"
+YEAR_HINT = "ollege year:"
+SEMESTER_HINT = "ter:"
+DATE_HINT = "ate:"
+
+
+def scan_schedule_text(text):
+    """
+    Builds the schedule structure from the raw PDF text in one pass: header fields,
+    groups, time slots and course entries. Each pattern is only tried on lines that
+    pass a cheap substring check.
+    """
+    header = {
+        "university": "",
+        "speciality": "",
+        "section": "",
+        "academicYear": "",
+        "semester": "",
+        "date": "",
+        "groups": []
+    }
+    schedule_data = {
+        "headerInfo": header,
+        "timeSlots": [],
+        "scheduleEntries": [],
+        "rawContent": text
+    }
+    groups = set()
+    time_slots = schedule_data["timeSlots"]
+    seen_slots = set()
+    entries = schedule_data["scheduleEntries"]
+    current_day = None
+
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        lowered = line.lower()
+
+        # Header fields
+        if not header["university"] and "university" in lowered:
+            header["university"] = line
+        if SPECIALITY_HINT in lowered:
+            speciality_match = SPECIALITY_RE.search(line)
+            if speciality_match:
+                header["speciality"] = speciality_match.group(1).strip()
+                header["section"] = speciality_match.group(2)
+        if YEAR_HINT in lowered:
+            year_match = YEAR_RE.search(line)
+            if year_match:
+                header["academicYear"] = year_match.group(1)
+        if SEMESTER_HINT in lowered:
+            semester_match = SEMESTER_RE.search(line)
+            if semester_match:
+                header["semester"] = semester_match.group(1)
+        if DATE_HINT in lowered:
+            date_match = DATE_RE.search(line)
+            if date_match:
+                header["date"] = date_match.group(1)
+        if "G" in line:
+            for group in GROUP_RE.findall(line):
+                if 1 <= int(group) <= 9:
+                    groups.add(int(group))
+
+        # Time slots, days and course entries
+        if ":" in line and line[0].isdigit() and TIME_SLOT_RE.match(line):
+            if line not in seen_slots:
+                seen_slots.add(line)
+                time_slots.append(line)
+
+        if 6 <= len(line) <= 9:
+            day_match = DAY_RE.match(line)
+            if day_match:
+                current_day = day_match.group(1)
+                continue
+
+        if current_day:
+            code_match = COURSE_CODE_RE.search(line)
+            if code_match:
+                # Every entry shares the header's list, which is filled in once the scan is done
+                entries.append({
+                    "day": current_day,
+                    "timeSlot": time_slots[-1] if time_slots else "",
+                    "courseCode": code_match.group(),
+                    "courseName": line,
+                    "groups": header["groups"]
+                })
+
+    header["groups"].extend(sorted(groups))
+    return schedule_data
+
+
+def extract_schedule_data(pdf_path, client=None):
+    result = _start_extraction(pdf_path, client)
+    if isinstance(result, Future):
+        return _resolve_fallback(result)
+    return result
+
+
+def extract_schedule_batch(pdf_paths, client=None):
+    """
+    Extracts several PDFs, returning results in input order. Gemini fallbacks are only
+    submitted here and collected at the end, so a slow fallback overlaps with the
+    regular extraction of the remaining files instead of blocking them.
+    """
+    started = [_start_extraction(pdf_path, client) for pdf_path in pdf_paths]
+    return [_resolve_fallback(result) if isinstance(result, Future) else result for result in started]
+
+
+def _start_extraction(pdf_path, client=None):
+    # Returns the final result, or a Future when the Gemini fallback had to be used
     try:
+        import pdfplumber
+
         with pdfplumber.open(pdf_path) as pdf:
             # Extract text from all pages
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-
-            # Initialize schedule data structure
-            schedule_data = {
-                "headerInfo": {
-                    "university": "",
-                    "speciality": "",
-                    "section": "",
-                    "academicYear": "",
-                    "semester": "",
-                    "date": "",
-                    "groups": []
-                },
-                "timeSlots": [],
-                "scheduleEntries": [],
-                "rawContent": text
-            }
+            text = "".join(page.extract_text() or "" for page in pdf.pages)
 
             # Try regular extraction first
             try:
-                # Extract header information
-                lines = text.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    # Extract university name
-                    if "university" in line.lower() and not schedule_data["headerInfo"]["university"]:
-                        schedule_data["headerInfo"]["university"] = line
-
-                    # Extract speciality and section
-                    speciality_match = re.search(r'Schedules of\s*:\s*(.+?)\s*--\s*Section:\s*([A-Z])', line, re.IGNORECASE)
-                    if speciality_match:
-                        schedule_data["headerInfo"]["speciality"] = speciality_match.group(1).strip()
-                        schedule_data["headerInfo"]["section"] = speciality_match.group(2)
-
-                    # Extract academic year
-                    year_match = re.search(r'College year:\s*(\d{4}/\d{4})', line, re.IGNORECASE)
-                    if year_match:
-                        schedule_data["headerInfo"]["academicYear"] = year_match.group(1)
-
-                    # Extract semester
-                    semester_match = re.search(r'Semester:\s*(\d+)', line, re.IGNORECASE)
-                    if semester_match:
-                        schedule_data["headerInfo"]["semester"] = semester_match.group(1)
-
-                    # Extract date
-                    date_match = re.search(r'Date:\s*(\d{2}/\d{2}/\d{4})', line, re.IGNORECASE)
-                    if date_match:
-                        schedule_data["headerInfo"]["date"] = date_match.group(1)
-
-                    # Extract groups
-                    group_matches = re.findall(r'G(\d)', line)
-                    for group in group_matches:
-                        if group.isdigit() and 1 <= int(group) <= 9:
-                            if int(group) not in schedule_data["headerInfo"]["groups"]:
-                                schedule_data["headerInfo"]["groups"].append(int(group))
-
-                # Sort groups
-                schedule_data["headerInfo"]["groups"].sort()
-
-                # Extract time slots and schedule entries
-                current_day = None
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    # Check if line contains time slots
-                    if re.match(r'^\d{1,2}:\d{2}\s*-\s*\d{1,2}:\d{2}$', line):
-                        if line not in schedule_data["timeSlots"]:
-                            schedule_data["timeSlots"].append(line)
-
-                    # Check if line contains a day
-                    day_match = re.match(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)$', line, re.IGNORECASE)
-                    if day_match:
-                        current_day = day_match.group(1)
-                        continue
-
-                    # If we have a current day and the line contains course information
-                    if current_day and re.search(r'[A-Z]+\d+', line):
-                        entry = {
-                            "day": current_day,
-                            "timeSlot": schedule_data["timeSlots"][-1] if schedule_data["timeSlots"] else "",
-                            "courseCode": re.search(r'[A-Z]+\d+', line).group(),
-                            "courseName": line,
-                            "groups": schedule_data["headerInfo"]["groups"]
-                        }
-                        schedule_data["scheduleEntries"].append(entry)
+                schedule_data = scan_schedule_text(text)
 
                 # Check if we successfully extracted any data
                 if not schedule_data["scheduleEntries"]:
@@ -113,23 +300,8 @@ def extract_schedule_data(pdf_path):
 
             except Exception as e:
                 print(f"Regular extraction failed: {str(e)}")
-                # If regular extraction fails, try Gemini API
-                try:
-                    # Call the Gemini API endpoint
-                    response = requests.post(
-                        f"{os.getenv('API_URL')}/api/schedule/extract-with-gemini",
-                        json={"text": text}
-                    )
-                    
-                    if response.status_code == 200:
-                        gemini_data = response.json()
-                        if gemini_data["success"]:
-                            return gemini_data
-                    
-                    raise Exception("Gemini extraction failed")
-                except Exception as gemini_error:
-                    print(f"Gemini extraction failed: {str(gemini_error)}")
-                    raise Exception("Both regular and Gemini extraction failed")
+                # If regular extraction fails, hand the text to the Gemini API
+                return (client or get_fallback_client()).submit(text)
 
             return {
                 "success": True,
@@ -0,0 +1,651 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pdfplumber
+
+from pdf_schedule_extractor import TABLE_ENGINES, UniversalScheduleExtractor
+from schedule_names import DEFAULT_THRESHOLD, _grams, cluster_names, similar_pairs
+from schedule_records import Session
+from schedule_worker import TABLE_EXTRACTOR_PATH, load_table_extractor
+from synthetic_timetable import (DAYS, TIME_SLOTS, WEEK_DAYS, generate_text_timetable, generate_timetable,
+                                 random_cell, raw_timetable_lines)
+
+GOLDEN_DIR = Path(__file__).resolve().parents[2] / "test" / "data" / "schedule_golden"
+SESSIONS_GOLDEN = Path(__file__).resolve().parents[2] / "test" / "data" / "schedule_sessions_golden.json"
+# Snapshot of the baseline parser on the messy published-style cells; never rewritten
+SESSIONS_BASELINE = Path(__file__).resolve().parents[2] / "test" / "data" / "schedule_sessions_baseline.json"
+
+EXTRACTOR_PATH = Path(__file__).resolve().parent / "pdf_schedule_extractor.py"
+# Must not be loaded by merely importing the CLIs (see bench_startup)
+HEAVY_MODULES = ("pdfplumber", "pdfminer", "PyPDF2", "requests", "pandas", "dotenv", "numpy")
+
+STAGES = ["text_extraction", "table_extraction", "header_parse", "session_parse", "entity_analysis"]
+# The fields of each schedule that generate_timetable() fixes, i.e. what the golden cases hold
+TRUTH_FIELDS = ("page", "table", "section", "college_year", "semester", "date", "time_slots", "weekly_schedule")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def expected_schedules(layouts: List[Dict], date: str = "21/11/2024") -> List[Dict[str, Any]]:
+    """
+    The TRUTH_FIELDS of every schedule iter_schedules should return for a file
+    generate_timetable() wrote, built from the sessions it drew rather than from
+    any extractor output. Slots without sessions are left out, as the extractor does.
+    """
+    expected = []
+    for number, layout in enumerate(layouts, start=1):
+        weekly: Dict[str, List[Dict[str, Any]]] = {day: [] for day in WEEK_DAYS + ["Friday"]}
+        for day, full_day in zip(DAYS, WEEK_DAYS):
+            for slot in TIME_SLOTS:
+                sessions = layout["sessions"][(day, slot)]
+                if sessions:
+                    weekly[full_day].append({"time": slot, "sessions": sessions})
+        expected.append({"page": number, "table": 0, "section": layout["section"], "college_year": "2024/2025",
+                         "semester": "1", "date": date, "time_slots": list(TIME_SLOTS), "weekly_schedule": weekly})
+    return expected
+
+
+def truth_view(schedule: Dict[str, Any]) -> Dict[str, Any]:
+    """schedule reduced to TRUTH_FIELDS, with plain session dicts and without cell hashes."""
+    view = {field: schedule.get(field) for field in TRUTH_FIELDS}
+    view["weekly_schedule"] = {
+        day: [{"time": entry["time"], "sessions": [session.as_dict() if isinstance(session, Session) else session
+                                                   for session in entry["sessions"]]}
+              for entry in entries]
+        for day, entries in (schedule.get("weekly_schedule") or {}).items()
+    }
+    return view
+
+
+def session_accuracy(schedules: List[Dict[str, Any]], layouts: List[Dict]) -> List[int]:
+    """[slots whose sessions were all read exactly, slots drawn] for one generated file."""
+    scores = [0, 0]
+    for schedule, layout in zip(schedules, layouts):
+        weekly = truth_view(schedule)["weekly_schedule"]
+        for (day, slot), sessions in layout["sessions"].items():
+            entries = [entry for entry in weekly.get(WEEK_DAYS[DAYS.index(day)], []) if entry["time"] == slot]
+            scores[0] += (entries[0]["sessions"] if entries else []) == sessions
+            scores[1] += 1
+    scores[1] += sum(len(layout["sessions"]) for layout in layouts[len(schedules):])
+    return scores
+
+
+def time_stages(extractor: UniversalScheduleExtractor, pdf_path: str, timings: Dict[str, float]) -> int:
+    """Runs the extraction pipeline stage by stage, adding each stage's time to timings."""
+    pages = 0
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            pages += 1
+            started = time.perf_counter()
+            tables = page.find_tables(extractor.table_settings)
+            grids = [extractor._extract_slot_grid(page, table) for table in tables]
+            timings["table_extraction"] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            texts = [extractor._extract_header_text(page, table) for table in tables]
+            timings["text_extraction"] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            for text in texts:
+                extractor.parse_header(text)
+            timings["header_parse"] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            schedules = [extractor._process_extracted_table(grid, time_slots) for time_slots, grid in grids]
+            timings["session_parse"] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            for schedule in schedules:
+                professors, subjects = extractor._analyze_entities(schedule)
+                extractor._calculate_stats(schedule, professors, subjects)
+            timings["entity_analysis"] += time.perf_counter() - started
+            page.close()
+    return pages
+
+
+def _throughput(seconds: float, files: int, pages: int) -> Dict[str, float]:
+    return {
+        "seconds": round(seconds, 4),
+        "files_per_second": round(files / seconds, 2) if seconds else 0.0,
+        "pages_per_second": round(pages / seconds, 2) if seconds else 0.0
+    }
+
+
+def run_benchmark(pdf_paths: List[str], repeat: int = 1, table_extractor: bool = True,
+                  layouts: Optional[Dict[str, List[Dict]]] = None,
+                  table_paths: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Times each extraction stage and both extractors end to end. With the layouts
+    generate_timetable() returned for the files, the schedules are also scored
+    against the sessions that were drawn (see session_accuracy). The table
+    extractor runs on table_paths when given (it cannot read the grid layout, see
+    generate_text_timetable), else on pdf_paths; "succeeded" counts its successes.
+    """
+    extractor = UniversalScheduleExtractor()
+    timings = {stage: 0.0 for stage in STAGES}
+    pages = 0
+    report: Dict[str, Any] = {"files": len(pdf_paths), "repeat": repeat}
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            for path in pdf_paths:
+                pages += time_stages(extractor, path, timings)
+
+        scores = [0, 0]
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for path in pdf_paths:
+                schedules = list(extractor.iter_schedules(path))
+                if layouts and path in layouts:
+                    scores = [a + b for a, b in zip(scores, session_accuracy(schedules, layouts[path]))]
+        universal_seconds = time.perf_counter() - started
+
+        table_report = None
+        if table_extractor:
+            module = load_table_extractor()
+            table_paths = table_paths or pdf_paths
+            table_pages = pages if table_paths is pdf_paths else 0
+            if not table_pages:
+                for path in table_paths:
+                    with pdfplumber.open(path) as pdf:
+                        table_pages += len(pdf.pages) * repeat
+            succeeded = 0
+            started = time.perf_counter()
+            for _ in range(repeat):
+                for path in table_paths:
+                    succeeded += bool(module.extract_schedule_data(path).get("success"))
+            table_report = _throughput(time.perf_counter() - started, len(table_paths) * repeat, table_pages)
+            table_report["succeeded"] = succeeded
+
+    report["pages"] = pages // repeat
+    report["stages"] = {
+        stage: {"seconds": round(seconds, 4), "ms_per_page": round(seconds * 1000 / pages, 3) if pages else 0.0}
+        for stage, seconds in timings.items()
+    }
+    report["end_to_end"] = {"universal": _throughput(universal_seconds, len(pdf_paths) * repeat, pages)}
+    if layouts:
+        report["accuracy"] = {"slots": scores[1] // repeat,
+                              "slot_accuracy": round(scores[0] / scores[1], 4) if scores[1] else 1.0}
+    if table_report is not None:
+        report["end_to_end"]["table"] = table_report
+    report["peak_rss_mb"] = _peak_rss_mb()
+    return report
+
+
+def _cell_accuracy(time_slots: List[str], grid: List[List[str]], truth: Dict[Any, List[str]]) -> List[int]:
+    """[cells read exactly, cells drawn] for one table against the cells generate_timetable() drew."""
+    scores = [0, 0]
+    for row in grid:
+        for (day, slot), lines in truth.items():
+            if not row or not row[0].startswith(day[:3]):
+                continue
+            column = time_slots.index(slot) + 1 if slot in time_slots else len(row)
+            got = " ".join(row[column].split()) if column < len(row) else ""
+            scores[0] += got == " ".join(" ".join(lines).split())
+            scores[1] += 1
+    return scores
+
+
+def bench_table_engines(pdf_paths: List[str], layouts: Optional[Dict[str, List[Dict]]] = None,
+                        repeat: int = 1) -> Dict[str, Any]:
+    """
+    Times the table step (finding the tables and reading their slot grid) of every
+    --table-engine on the same pages, with characters and rulings already parsed so
+    only the engine itself is measured. With the layouts generate_timetable()
+    returned, each engine's cells are scored against the text that was drawn;
+    "agreement" is the share of tables whose grids come out identical in both.
+    """
+    # Imported up front so NumPy's import is not timed as part of the first page
+    import schedule_grid  # noqa: F401
+
+    extractors = {}
+    for engine in TABLE_ENGINES:
+        extractors[engine] = UniversalScheduleExtractor()
+        extractors[engine].table_engine = engine
+    seconds = {engine: 0.0 for engine in TABLE_ENGINES}
+    scores = {engine: [0, 0] for engine in TABLE_ENGINES}
+    tables = identical = pages = 0
+
+    for path in pdf_paths:
+        with pdfplumber.open(path) as pdf:
+            for number, page in enumerate(pdf.pages):
+                # Parsed once up front, so neither engine is charged for pdfminer's layout pass
+                page.chars, page.edges
+                grids = {}
+                for engine, extractor in extractors.items():
+                    started = time.perf_counter()
+                    for _ in range(repeat):
+                        found, settings = extractor._find_tables(page)
+                        grids[engine] = [extractor._extract_slot_grid(page, table, settings) for table in found]
+                    seconds[engine] += time.perf_counter() - started
+                    if layouts and number < len(layouts[path]):
+                        for time_slots, grid in grids[engine][:1]:
+                            scores[engine] = [a + b for a, b in zip(scores[engine],
+                                                                    _cell_accuracy(time_slots, grid,
+                                                                                   layouts[path][number]["cells"]))]
+                baseline = grids[TABLE_ENGINES[0]]
+                tables += len(baseline)
+                identical += sum(all(grids[engine][index:index + 1] == [grid] for engine in TABLE_ENGINES[1:])
+                                 for index, grid in enumerate(baseline))
+                pages += 1
+                page.close()
+
+    report: Dict[str, Any] = {"pages": pages, "tables": tables,
+                              "agreement": round(identical / tables, 4) if tables else 1.0}
+    for engine in TABLE_ENGINES:
+        entry = {"ms_per_page": round(seconds[engine] * 1000 / (pages * repeat), 3) if pages else 0.0}
+        if layouts:
+            read, drawn = scores[engine]
+            entry["cells"] = drawn
+            entry["cell_accuracy"] = round(read / drawn, 4) if drawn else 1.0
+        report[engine] = entry
+    reference = report[TABLE_ENGINES[0]]["ms_per_page"]
+    for engine in TABLE_ENGINES[1:]:
+        ms_per_page = report[engine]["ms_per_page"]
+        report[engine]["speedup"] = round(reference / ms_per_page, 2) if ms_per_page else 0.0
+    return report
+
+
+def synthetic_raw_text(pages: int, groups: int = 3, seed: int = 0) -> str:
+    """Raw page text in the shape extract_schedule_table.py sees: header lines, then day/slot/cell lines."""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    for page in range(pages):
+        lines += raw_timetable_lines(rng, chr(ord('A') + page % 26), groups, 1 + page % 2)
+    return "\n".join(lines)
+
+
+def _legacy_scan(text: str) -> Dict[str, Any]:
+    # The two-pass scan extract_schedule_data used before the single-pass scanner, kept as the reference
+    schedule_data = {
+        "headerInfo": {"university": "", "speciality": "", "section": "", "academicYear": "", "semester": "",
+                       "date": "", "groups": []},
+        "timeSlots": [],
+        "scheduleEntries": [],
+        "rawContent": text
+    }
+    lines = text.split('\n')
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if "university" in line.lower() and not schedule_data["headerInfo"]["university"]:
+            schedule_data["headerInfo"]["university"] = line
+        speciality_match = re.search(r'Schedules of\s*:\s*(.+?)\s*--\s*Section:\s*([A-Z])', line, re.IGNORECASE)
+        if speciality_match:
+            schedule_data["headerInfo"]["speciality"] = speciality_match.group(1).strip()
+            schedule_data["headerInfo"]["section"] = speciality_match.group(2)
+        year_match = re.search(r'College year:\s*(\d{4}/\d{4})', line, re.IGNORECASE)
+        if year_match:
+            schedule_data["headerInfo"]["academicYear"] = year_match.group(1)
+        semester_match = re.search(r'Semester:\s*(\d+)', line, re.IGNORECASE)
+        if semester_match:
+            schedule_data["headerInfo"]["semester"] = semester_match.group(1)
+        date_match = re.search(r'Date:\s*(\d{2}/\d{2}/\d{4})', line, re.IGNORECASE)
+        if date_match:
+            schedule_data["headerInfo"]["date"] = date_match.group(1)
+        for group in re.findall(r'G(\d)', line):
+            if group.isdigit() and 1 <= int(group) <= 9:
+                if int(group) not in schedule_data["headerInfo"]["groups"]:
+                    schedule_data["headerInfo"]["groups"].append(int(group))
+    schedule_data["headerInfo"]["groups"].sort()
+
+    current_day = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if re.match(r'^\d{1,2}:\d{2}\s*-\s*\d{1,2}:\d{2}$', line):
+            if line not in schedule_data["timeSlots"]:
+                schedule_data["timeSlots"].append(line)
+        day_match = re.match(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)$', line, re.IGNORECASE)
+        if day_match:
+            current_day = day_match.group(1)
+            continue
+        if current_day and re.search(r'[A-Z]+\d+', line):
+            schedule_data["scheduleEntries"].append({
+                "day": current_day,
+                "timeSlot": schedule_data["timeSlots"][-1] if schedule_data["timeSlots"] else "",
+                "courseCode": re.search(r'[A-Z]+\d+', line).group(),
+                "courseName": line,
+                "groups": schedule_data["headerInfo"]["groups"]
+            })
+    return schedule_data
+
+
+def bench_line_scanner(pages: int, repeat: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """Times extract_schedule_table's single-pass scanner against the legacy two-pass scan on one large text."""
+    scan = load_table_extractor().scan_schedule_text
+    text = synthetic_raw_text(pages, seed=seed)
+    timings = {}
+    for name, function in (("legacy", _legacy_scan), ("single_pass", scan)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function(text)
+        timings[name] = time.perf_counter() - started
+    identical = json.dumps(_legacy_scan(text)) == json.dumps(scan(text))
+    return {
+        "pages": pages,
+        "lines": text.count("\n") + 1,
+        "legacy_seconds": round(timings["legacy"], 4),
+        "single_pass_seconds": round(timings["single_pass"], 4),
+        "speedup": round(timings["legacy"] / timings["single_pass"], 2) if timings["single_pass"] else 0.0,
+        "identical": identical
+    }
+
+
+def _noisy_spelling(rng: random.Random, name: str) -> str:
+    # One OCR/layout accident: a split word, a hyphen, other case, a dropped letter or lost accents
+    words = name.split()
+    index = rng.randrange(len(words))
+    word = words[index]
+    damage = rng.randrange(5)
+    if damage == 0 and len(word) > 3:
+        cut = rng.randrange(1, len(word) - 1)
+        words[index] = f"{word[:cut]} {word[cut:]}"
+    elif damage == 1 and len(words) > 1:
+        return "-".join(words)
+    elif damage == 2:
+        return name.upper() if rng.random() < 0.5 else name.title()
+    elif damage == 3 and len(word) > 5:
+        cut = rng.randrange(1, len(word) - 1)
+        words[index] = word[:cut] + word[cut + 1:]
+    else:
+        return name.translate(str.maketrans("éèêàç", "eeeac"))
+    return " ".join(words)
+
+
+def synthetic_names(entities: int, variants: int = 2, seed: int = 0) -> Dict[str, int]:
+    """
+    Professor-like names: a random surname of two to four syllables and an initial,
+    each spelled correctly plus up to variants noisy ways (see _noisy_spelling).
+    Returns spelling -> entity number.
+    """
+    rng = random.Random(seed)
+    syllables = [consonant + vowel for consonant in ("b", "d", "f", "h", "k", "l", "m", "n", "r", "s", "t", "z", "kh",
+                                                     "dj", "ch", "gh", "ç")
+                 for vowel in ("a", "e", "i", "ou", "é", "è")]
+    truth: Dict[str, int] = {}
+    entity = 0
+    while entity < entities:
+        name = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize()
+        name = f"{name} {chr(ord('A') + rng.randrange(26))}."
+        if name in truth:
+            continue
+        truth[name] = entity
+        for _ in range(variants):
+            truth.setdefault(_noisy_spelling(rng, name), entity)
+        entity += 1
+    return truth
+
+
+def _pair_scores(truth: Dict[str, int], clusters: Dict[str, int]) -> Dict[str, float]:
+    # Pairwise precision and recall of the clustering against the true entities
+    def pairs(counts: Dict[Any, int]) -> int:
+        return sum(count * (count - 1) // 2 for count in counts.values())
+
+    both, predicted, actual = {}, {}, {}
+    for name, entity in truth.items():
+        key = (entity, clusters[name])
+        both[key] = both.get(key, 0) + 1
+        predicted[clusters[name]] = predicted.get(clusters[name], 0) + 1
+        actual[entity] = actual.get(entity, 0) + 1
+    correct = pairs(both)
+    return {"precision": round(correct / max(1, pairs(predicted)), 4),
+            "recall": round(correct / max(1, pairs(actual)), 4)}
+
+
+def bench_names(entities: int, seed: int = 0, brute_force_limit: int = 3000) -> Dict[str, Any]:
+    """
+    Times cluster_names on synthetic_names(entities) and on a quarter of them, to show
+    how it scales, and scores the clusters against the true entities. Up to
+    brute_force_limit spellings, similar_pairs is also checked against comparing
+    every pair of trigram sets.
+    """
+    report: Dict[str, Any] = {}
+    for label, count in (("quarter", max(1, entities // 4)), ("full", entities)):
+        truth = synthetic_names(count, seed=seed)
+        started = time.perf_counter()
+        result = cluster_names(dict.fromkeys(truth, 1))
+        elapsed = time.perf_counter() - started
+        clusters = {name: index for index, entity in enumerate(result) for name in [entity["name"], *entity["variants"]]}
+        report[label] = {"entities": count, "spellings": len(truth), "clusters": len(result),
+                         "seconds": round(elapsed, 4), **_pair_scores(truth, clusters)}
+    report["scaling"] = round(report["full"]["seconds"] / max(report["quarter"]["seconds"], 1e-9), 2)
+
+    cores = sorted(set(synthetic_names(entities, seed=seed)))[:brute_force_limit]
+    gram_sets = [set(_grams(core)) for core in cores]
+    started = time.perf_counter()
+    brute = set()
+    for first in range(len(cores)):
+        for second in range(first + 1, len(cores)):
+            shared = len(gram_sets[first] & gram_sets[second])
+            if shared / (len(gram_sets[first]) + len(gram_sets[second]) - shared) >= DEFAULT_THRESHOLD:
+                brute.add((first, second))
+    brute_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    indexed = {(first, second) for _, first, second in similar_pairs(cores, DEFAULT_THRESHOLD)}
+    report["pairs"] = {"strings": len(cores), "brute_force_seconds": round(brute_seconds, 4),
+                       "indexed_seconds": round(time.perf_counter() - started, 4), "identical": brute == indexed}
+    return report
+
+
+def _spawn_ms(command: List[str], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _heavy_imports(path: Path) -> List[str]:
+    # Loads the script as a module in a clean interpreter and lists what it dragged in
+    code = (
+        "import importlib.util, json, sys\n"
+        f"sys.path.insert(0, {str(path.parent)!r})\n"
+        f"spec = importlib.util.spec_from_file_location('startup_probe', {str(path)!r})\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def bench_startup(repeat: int = 5) -> Dict[str, Any]:
+    """
+    Wall time of the spawns the backend pays per upload before any PDF is read:
+    --help and usage errors of both extractor scripts, next to a bare interpreter.
+    Also lists the HEAVY_MODULES each script loads on import, which should be none.
+    """
+    commands = {
+        "interpreter": [sys.executable, "-c", "pass"],
+        "extractor_help": [sys.executable, str(EXTRACTOR_PATH), "--help"],
+        "extractor_usage_error": [sys.executable, str(EXTRACTOR_PATH)],
+        "table_usage_error": [sys.executable, str(TABLE_EXTRACTOR_PATH)]
+    }
+    report: Dict[str, Any] = {"repeat": repeat, "commands": {}}
+    for name, command in commands.items():
+        timings = _spawn_ms(command, repeat)
+        report["commands"][name] = {"min_ms": round(min(timings), 1),
+                                    "median_ms": round(statistics.median(timings), 1)}
+    interpreter = report["commands"]["interpreter"]["min_ms"]
+    for values in report["commands"].values():
+        values["over_interpreter_ms"] = round(values["min_ms"] - interpreter, 1)
+    report["heavy_imports"] = {
+        "pdf_schedule_extractor": _heavy_imports(EXTRACTOR_PATH),
+        "extract_schedule_table": _heavy_imports(TABLE_EXTRACTOR_PATH)
+    }
+    return report
+
+
+def session_corpus(cells: int = 200, groups: int = 4, seed: int = 0) -> List[Dict[str, Any]]:
+    """Distinct generated cells with the sessions they hold, the replayed session corpus."""
+    rng = random.Random(seed)
+    corpus: Dict[str, List[Dict[str, Any]]] = {}
+    while len(corpus) < cells:
+        lines, sessions = random_cell(rng, groups)
+        if lines:
+            corpus.setdefault("\n".join(lines), sessions)
+    return [{"input": text, "sessions": sessions} for text, sessions in corpus.items()]
+
+
+def check_golden(golden_dir: Path = GOLDEN_DIR, update: bool = False) -> Dict[str, Any]:
+    """
+    Regenerates each golden case's synthetic PDF from its config and compares the
+    TRUTH_FIELDS of the iter_schedules output with the recorded ones; also replays
+    the session corpus. The recorded values come from what the generator drew
+    (update rewrites them from it), never from extractor output, so a case that no
+    longer matches the generator fails as well. The baseline snapshot corpus is
+    replayed too but never rewritten: it pins the output of the original parser.
+    """
+    extractor = UniversalScheduleExtractor()
+    failures: List[str] = []
+    checked = 0
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        for case_path in sorted(golden_dir.glob("*.json")):
+            case = json.loads(case_path.read_text(encoding="utf-8"))
+            pdf_path = Path(tmp) / f"{case_path.stem}.pdf"
+            expected = expected_schedules(generate_timetable(pdf_path, **case["config"]),
+                                          case["config"].get("date", "21/11/2024"))
+            checked += 1
+            if update:
+                case["expected"] = expected
+                case_path.write_text(json.dumps(case, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+                continue
+            with contextlib.redirect_stdout(devnull):
+                actual = [truth_view(schedule) for schedule in extractor.iter_schedules(str(pdf_path))]
+            if case["expected"] != expected:
+                failures.append(f"{case_path.name}: does not match the generator (--update-golden)")
+            elif actual != expected:
+                failures.append(case_path.name)
+
+    if update:
+        SESSIONS_GOLDEN.write_text(json.dumps(session_corpus(), ensure_ascii=False, indent=2) + "\n",
+                                   encoding="utf-8")
+    for corpus in (SESSIONS_GOLDEN, SESSIONS_BASELINE):
+        if not corpus.exists():
+            continue
+        for entry in json.loads(corpus.read_text(encoding="utf-8")):
+            checked += 1
+            if extractor._parse_single_session_block(entry["input"]) != entry["sessions"]:
+                failures.append(f"{corpus.name}: {entry['input'][:60]!r}")
+    return {"checked": checked, "failed": failures}
+
+
+def find_regressions(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    for stage, values in report.get("stages", {}).items():
+        before = baseline.get("stages", {}).get(stage, {}).get("ms_per_page")
+        if before and values["ms_per_page"] > before * (1 + tolerance):
+            regressions.append(f"{stage}: {before} -> {values['ms_per_page']} ms/page")
+    for name, values in report.get("end_to_end", {}).items():
+        before = baseline.get("end_to_end", {}).get(name, {}).get("pages_per_second")
+        if before and values["pages_per_second"] < before / (1 + tolerance):
+            regressions.append(f"{name}: {before} -> {values['pages_per_second']} pages/s")
+    for name, values in report.get("startup", {}).get("commands", {}).items():
+        # Compared above the bare interpreter, so a slower host does not count as a regression
+        before = baseline.get("startup", {}).get("commands", {}).get(name, {}).get("over_interpreter_ms")
+        if before and values["over_interpreter_ms"] > before * (1 + tolerance):
+            regressions.append(f"startup {name}: {before} -> {values['over_interpreter_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Python schedule extractors on synthetic timetables')
+    parser.add_argument('--sections', type=int, default=4,
+                        help='Synthetic files to generate (one section each); 0 skips the extraction benchmark')
+    parser.add_argument('--pages', type=int, default=1, help='Pages per synthetic file')
+    parser.add_argument('--groups', type=int, default=3, help='Groups per section')
+    parser.add_argument('--clean', action='store_true', help='Generate clean grids instead of fragmented cells')
+    parser.add_argument('--messy', action='store_true',
+                        help='Wrap cells and use TP.<room> rooms as the published PDFs do; accuracy is reported only')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the generated files')
+    parser.add_argument('--pdf', nargs='*', default=[], help='Benchmark these PDFs instead of synthetic ones')
+    parser.add_argument('--skip-table-extractor', action='store_true', help='Do not time extract_schedule_table.py')
+    parser.add_argument('--scanner-pages', type=int, default=0,
+                        help='Also micro-benchmark the table extractor line scanner on this many pages of raw text')
+    parser.add_argument('--table-engines', action='store_true',
+                        help='Also compare the --table-engine options on the same pages for speed and cell accuracy')
+    parser.add_argument('--names', type=int, default=0,
+                        help='Also benchmark name clustering on this many synthetic professor names')
+    parser.add_argument('--startup', action='store_true',
+                        help='Also time CLI startup (spawn to exit) and check for heavy imports at load')
+    parser.add_argument('--check-golden', action='store_true', help='Verify outputs against the golden corpus')
+    parser.add_argument('--update-golden', action='store_true',
+                        help='Rewrite the golden corpus from what the generator draws')
+    parser.add_argument('--baseline', help='Previous report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown vs --baseline (0.25 = 25%%)')
+    parser.add_argument('-o', '--output', help='Write the JSON report here')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_paths = list(args.pdf)
+        table_paths = []
+        layouts = {}
+        if not pdf_paths:
+            for i in range(args.sections):
+                path = Path(tmp) / f"timetable-{i:04d}.pdf"
+                layouts[str(path)] = generate_timetable(path, chr(ord('A') + i % 26), args.pages, args.groups,
+                                                        not args.clean, args.seed + i, messy=args.messy)
+                pdf_paths.append(str(path))
+                if not args.skip_table_extractor:
+                    path = Path(tmp) / f"listing-{i:04d}.pdf"
+                    generate_text_timetable(path, chr(ord('A') + i % 26), args.pages, args.groups, args.seed + i)
+                    table_paths.append(str(path))
+        report = run_benchmark(pdf_paths, args.repeat, not args.skip_table_extractor, layouts,
+                               table_paths) if pdf_paths else {}
+        if args.table_engines and pdf_paths:
+            report["table_engines"] = bench_table_engines(pdf_paths, layouts, args.repeat)
+
+    report["config"] = {key: getattr(args, key) for key in ("sections", "pages", "groups", "clean", "messy", "seed")}
+    # Wrapped cells are not read exactly yet, so --messy only reports their accuracy
+    failed = not args.messy and report.get("accuracy", {}).get("slot_accuracy", 1.0) < 1.0
+    # A table extractor that never succeeds is only timing its failure path
+    failed |= report.get("end_to_end", {}).get("table", {}).get("succeeded", 1) == 0
+    if "table_engines" in report:
+        engines = report["table_engines"]
+        failed |= any(engines[engine].get("cell_accuracy", 1.0) < engines[TABLE_ENGINES[0]].get("cell_accuracy", 1.0)
+                      for engine in TABLE_ENGINES[1:])
+    if args.startup:
+        report["startup"] = bench_startup(max(args.repeat, 5))
+        failed |= any(report["startup"]["heavy_imports"].values())
+    if args.scanner_pages:
+        report["line_scanner"] = bench_line_scanner(args.scanner_pages, args.repeat, args.seed)
+        failed |= not report["line_scanner"]["identical"]
+    if args.names:
+        report["names"] = bench_names(args.names, args.seed)
+        failed |= not report["names"]["pairs"]["identical"]
+    if args.check_golden or args.update_golden:
+        report["golden"] = check_golden(update=args.update_golden)
+        failed |= bool(report["golden"]["failed"])
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        report["regressions"] = find_regressions(report, baseline, args.tolerance)
+        failed |= bool(report["regressions"])
+
+    json_output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(json_output, encoding='utf-8')
+    print(json_output)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+GEMINI_ENDPOINT = "/api/schedule/extract-with-gemini"
+
+
+class StandInState:
+    """Behaviour knobs and request counters shared by all handler threads."""
+
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0, fail_first: int = 0,
+                 status: int = 503, seed: Optional[int] = None, retry_after: Optional[str] = None):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_first = fail_first
+        self.status = status
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.texts: Dict[str, int] = {}
+        self.concurrent = 0
+        self.peak_concurrent = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "unique_texts": len(self.texts),
+                "peak_concurrent": self.peak_concurrent
+            }
+
+
+def _make_handler(state: StandInState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, state.stats())
+            else:
+                self._reply(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if self.path != GEMINI_ENDPOINT:
+                self._reply(404, {"error": "Not found"})
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            text = body.get("text")
+            if not text:
+                self._reply(400, {"error": "No text provided"})
+                return
+
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            with state.lock:
+                state.requests += 1
+                state.texts[digest] = state.texts.get(digest, 0) + 1
+                state.concurrent += 1
+                state.peak_concurrent = max(state.peak_concurrent, state.concurrent)
+                fail = state.requests <= state.fail_first or state.random.random() < state.fail_rate
+                if fail:
+                    state.failures += 1
+            try:
+                time.sleep(state.latency)
+                if fail:
+                    headers = {"Retry-After": state.retry_after} if state.retry_after else None
+                    self._reply(state.status, {"error": "Stand-in failure"}, headers)
+                    return
+                self._reply(200, {
+                    "success": True,
+                    "data": {"rawContent": text, "characters": len(text), "sha256": digest}
+                })
+            finally:
+                with state.lock:
+                    state.concurrent -= 1
+
+    return Handler
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, **options) -> ThreadingHTTPServer:
+    """
+    Starts a stand-in for the backend's Gemini endpoint on a background thread and
+    returns the server; its state is available as server.state and the base URL to
+    use as API_URL is http://host:server.server_port.
+    """
+    state = StandInState(**options)
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for /api/schedule/extract-with-gemini')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='Port to listen on (default: any free port)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before answering')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with --status')
+    parser.add_argument('--fail-first', type=int, default=0, help='Fail this many requests before answering')
+    parser.add_argument('--status', type=int, default=503, help='HTTP status used for failures')
+    parser.add_argument('--retry-after', help='Retry-After header sent with failures')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    server = start_server(args.host, args.port, latency=args.latency, fail_rate=args.fail_rate,
+                          fail_first=args.fail_first, status=args.status, seed=args.seed,
+                          retry_after=args.retry_after)
+    print(f"API_URL=http://{args.host}:{server.server_port}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(server.state.stats()), file=sys.stderr)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,167 @@
+import bisect
+import hashlib
 import json
+import logging
 import re
 import sys
-from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from typing import Dict, Iterator, List, Any, Optional, Tuple, TYPE_CHECKING
 import argparse
 from pathlib import Path
 
-try:
-    import PyPDF2
-    import pdfplumber
-except ImportError:
-    print("Required libraries not found. Please install them:")
-    print("pip install PyPDF2 pdfplumber")
-    sys.exit(1)
+from schedule_engines import DEFAULT_LADDER, get_engine
+from schedule_input import PdfSource, open_input, pdf_library
+from schedule_metrics import ExtractionMetrics
+from schedule_records import Session, json_default, write_json
+
+if TYPE_CHECKING:
+    from schedule_cache import ScheduleCache
+    from schedule_tuning import TableTuner
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the output for a given PDF changes; it is part of the cache key.
+EXTRACTOR_VERSION = "1.4.0"
+
+# Values of UniversalScheduleExtractor.table_engine (--table-engine)
+TABLE_ENGINES = ("pdfplumber", "grid")
+
+SESSION_TYPE_MAPPING = {
+    "DW": "Directed Work",
+    "PW": "Practical Work",
+    "C": "Course",
+    "SC": "Course",
+    "F": "Course",
+    "R2": "Course",
+    "421T": "Course",
+    "244T": "Course",
+    "431T": "Course"
+}
+
+# Session line grammars, tried in this order. Each one is only run when the cheap
+# substring check in _match_session_line says it can possibly match.
+_TEXT = r"[A-Za-zÀ-ÿ'':,\-/\s]+?"
+_GROUP_SESSION_RE = re.compile(rf"(G\d+)(?::(\d+[A-Z]?))?\s*/\s*({_TEXT})\s*--\s*([A-Za-z]+)(?:,?\s*([A-Za-zÀ-ÿ\s-]+))?")
+_COURSE_SESSION_RE = re.compile(rf"({_TEXT})\s*course\s*([A-Za-z0-9\.]+)?\s*([A-Za-zÀ-ÿ\s-]+)?")
+_SUBTITLED_SESSION_RE = re.compile(rf"({_TEXT}):\s*({_TEXT})\s*--\s*([A-Za-z]+)(?:,?\s*([A-Za-zÀ-ÿ\s-]+))?")
+_CODED_SESSION_RE = re.compile(rf"({_TEXT})\s*([A-Za-z0-9\.]+)\s*([A-Za-zÀ-ÿ\s-]+)")
+_ROOM_RE = re.compile(r"^\d+[A-Z]?$")
+_TRAILING_PROFESSOR_RE = re.compile(r"([A-Z][a-zÀ-ÿ\s-]+)$")
+_TYPE_SUFFIX_RE = re.compile(r"\s*--(DW|PW|C|SC|F|R2|T)\s*", re.IGNORECASE)
+_COURSE_WORD_RE = re.compile(r"\s*course\s*", re.IGNORECASE)
+
+# (header text, time slots, slot grid) of one table: everything the parser needs from the page
+TableParts = Tuple[str, List[str], List[List[str]]]
+
+# Header fields that vary per timetable (and may be inherited by continuation pages)
+HEADER_FIELDS = ("schedules_of", "college_year", "section", "semester", "date")
+
+# Column layout of the 14-column table pdfplumber returns for the original USTHB template.
+# Only used when the time-slot columns cannot be located from the header row.
+# Format: (pdfplumber_col_idx_part1, pdfplumber_col_idx_part2) or just pdfplumber_col_idx
+LEGACY_TIME_SLOT_COLUMN_MAP = {
+    0: 2, # 08:00-09:30 is at pdfplumber col 2
+    1: 4, # 09:40-11:10 is at pdfplumber col 4
+    2: (6, 7), # 11:20-12:50 is split between col 6 and 7
+    3: (8, 9), # 13:00-14:30 is split between col 8 and 9 (e.g. 'Algorit', 'hmique')
+    4: 11, # 14:40-16:10 is at pdfplumber col 11
+    5: (12, 13) # 16:20-17:50 is split between col 12 and 13 (e.g. '16\n17', ':20\n-\n:50')
+}
+
+
+def _normalize_type(code: Optional[str]) -> str:
+    if code:
+        normalized_code = code.upper().strip()
+        return SESSION_TYPE_MAPPING.get(normalized_code, normalized_code)
+    return ""
+
+
+def _strip_or_none(value: Optional[str]) -> Optional[str]:
+    return value.strip() if value else None
+
+
+@lru_cache(maxsize=8192)
+def _match_session_line(line: str) -> Optional[Tuple[str, Session]]:
+    """
+    Parses one session line into (grammar name, Session), or None when no grammar
+    matches. Timetables repeat the same lines endlessly, hence the cache; cells with
+    the same line share one record.
+    """
+    has_type_separator = "--" in line
+    if has_type_separator and line[:1] == "G" and line[1:2].isdigit():
+        match = _GROUP_SESSION_RE.match(line)
+        if match:
+            return "group", Session(match.group(1).strip(), _strip_or_none(match.group(2)), match.group(3).strip(),
+                                    _normalize_type(match.group(4)), _strip_or_none(match.group(5)))
+
+    if "course" in line:
+        match = _COURSE_SESSION_RE.match(line)
+        if match:
+            room = session_type = None
+            potential_type_room = _strip_or_none(match.group(2))
+            if potential_type_room:
+                if _ROOM_RE.match(potential_type_room):
+                    room = potential_type_room
+                else:
+                    session_type = _normalize_type(potential_type_room)
+            return "course", Session(None, room, match.group(1).strip(), session_type or _normalize_type("C"),
+                                     _strip_or_none(match.group(3)))
+
+    if has_type_separator and ":" in line:
+        match = _SUBTITLED_SESSION_RE.match(line)
+        if match:
+            return "subtitled", Session(None, None, f"{match.group(1).strip()}: {match.group(2).strip()}",
+                                        _normalize_type(match.group(3)), _strip_or_none(match.group(4)))
+
+    # "Synchronisation course <type> <professor>" lines are already taken by the course grammar
+    match = _CODED_SESSION_RE.match(line)
+    if match:
+        potential_type_room = match.group(2).strip()
+        if _ROOM_RE.match(potential_type_room):
+            room, session_type = potential_type_room, _normalize_type("C")
+        else:
+            room, session_type = None, _normalize_type(potential_type_room)
+        return "coded", Session(None, room, match.group(1).strip(), session_type, match.group(3).strip())
+
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _fallback_session(line: str) -> Session:
+    prof_match = _TRAILING_PROFESSOR_RE.search(line)
+    professor_fallback = prof_match.group(1).strip() if prof_match else None
+    course_fallback = line
+    if professor_fallback:
+        course_fallback = line.replace(professor_fallback, "").strip()
+
+    course_fallback = _TYPE_SUFFIX_RE.sub('', course_fallback).strip()
+    course_fallback = _COURSE_WORD_RE.sub('', course_fallback).strip()
+
+    return Session(None, None, course_fallback if course_fallback else line, _normalize_type("C"),
+                   professor_fallback)
+
+
+def cell_hash(cells: List[str]) -> str:
+    """
+    Content hash of the cell texts behind one slot. The extractor version is part of
+    it, so sessions reused by hash are never older than the parser.
+    """
+    digest = hashlib.blake2b(EXTRACTOR_VERSION.encode(), digest_size=8)
+    for cell in cells:
+        digest.update(b"\x00" + cell.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def known_cells(schedules: List[Dict[str, Any]]) -> Dict[str, List[Session]]:
+    """Maps the cell_hash of every slot in previously extracted schedules (parsed JSON) to its sessions."""
+    known: Dict[str, List[Session]] = {}
+    for schedule in schedules:
+        for slots in schedule.get("weekly_schedule", {}).values():
+            for slot in slots:
+                if "cell_hash" in slot:
+                    known.setdefault(slot["cell_hash"], [Session(**session) for session in slot["sessions"]])
+    return known
 
-GEMINI_API_KEY=your_api_key_here
 
 class UniversalScheduleExtractor:
     def __init__(self):
@@ -31,26 +179,93 @@ class UniversalScheduleExtractor:
             "tue": "Tuesday", "wed": "Wednesday", "thu": "Thursday", "fri": "Friday"
         }
         self.time_slot_regex = r"(\d{2}:\d{2})-(\d{2}:\d{2})"
-
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    page_text = page.extract_text(layout=True)
-                    if page_text:
-                        text += page_text + "\n"
-                return text
-        except Exception as e:
-            print(f"Error with pdfplumber: {e}")
-            return self._fallback_extraction(pdf_path)
-
-    def _fallback_extraction(self, pdf_path: str) -> str:
+        # A line starting with a day label means the text reached the timetable rows
+        self._day_row_re = re.compile(rf"^\s*(?:{'|'.join(self.day_mapping)})", re.IGNORECASE | re.MULTILINE)
+        self.table_settings = {
+            "vertical_strategy": "lines",
+            "horizontal_strategy": "lines",
+            "snap_tolerance": 10, # Increased
+            "join_tolerance": 10, # Increased
+            "edge_min_length": 3,
+            "text_tolerance": 5, # Increased
+            "min_words_vertical": 0,
+            "min_words_horizontal": 0,
+            # Removed explicit_vertical_lines for auto-detection
+        }
+        self.engine_ladder = list(DEFAULT_LADDER)
+        # When set, table settings come from the tuner's per-layout profile instead of table_settings
+        self.table_tuner: Optional["TableTuner"] = None
+        # "pdfplumber" (find_tables) or "grid" (the NumPy word-grid engine, see schedule_grid)
+        self.table_engine = "pdfplumber"
+        self.metrics = ExtractionMetrics()
+
+    def extract_text_from_pdf(self, source: PdfSource, page_workers: Optional[int] = None) -> str:
+        return self.extract_text_with_engine(source, page_workers)[0]
+
+    def extract_text_with_engine(self, source: PdfSource, page_workers: Optional[int] = None,
+                                 ladder: Optional[List[str]] = None) -> Tuple[str, str]:
+        """
+        Runs the extraction engines of the ladder (self.engine_ladder by default) from
+        cheapest to most thorough and stops at the first whose text has every header
+        field and at least one timetable row. Returns (text, name of the engine that
+        produced it); when no engine is good enough the last one that ran wins. Every
+        engine reads the same PdfInput, so escalating never reads the file again.
+        """
+        # Unknown names fail here, before any engine runs; errors inside an engine only escalate
+        engines = [get_engine(name) for name in ladder or self.engine_ladder]
+        result = None
+        errors = []
+        with self.metrics.stage("extract_text"), open_input(source) as pdf_input:
+            for engine in engines:
+                name = engine.name
+                try:
+                    text = engine.extract(self, pdf_input, page_workers)
+                except Exception as e:
+                    logger.warning("Engine %s failed: %s", name, e)
+                    errors.append(f"{name}: {e}")
+                    continue
+                result = (text, name)
+                if self._text_is_complete(text):
+                    break
+                logger.debug("Engine %s left header fields or rows empty", name)
+                self.metrics.count("engine.escalations")
+        if result is None:
+            raise RuntimeError(f"PDF extraction failed: {'; '.join(errors)}")
+        self.metrics.count(f"engine.{result[1]}")
+        return result
+
+    def extract_header(self, source: PdfSource, ladder: Optional[List[str]] = None) -> Dict[str, Any]:
+        with open_input(source) as pdf_input:
+            if pdf_input.is_document():
+                from schedule_documents import document_kind, first_document_parts
+
+                text = first_document_parts(self, pdf_input)[0]
+                return {**self.parse_header(text), "engine": document_kind(pdf_input)}
+            text, engine = self.extract_text_with_engine(pdf_input, ladder=ladder)
+        return {**self.parse_header(text), "engine": engine}
+
+    def _text_is_complete(self, text: str) -> bool:
+        header = self.parse_header(text)
+        if not all(header[key] for key in HEADER_FIELDS):
+            return False
+        return bool(re.search(self.time_slot_regex, text) and self._day_row_re.search(text))
+
+    def _iter_page_texts(self, source: PdfSource, start: int = 0,
+                         stop: Optional[int] = None) -> Iterator[Tuple[int, Optional[str]]]:
+        with open_input(source) as pdf_input, pdf_library("pdfplumber").open(pdf_input.stream()) as pdf:
+            for page_number, page in enumerate(pdf.pages[start:stop], start=start + 1):
+                try:
+                    yield page_number, page.extract_text(layout=True)
+                finally:
+                    page.close()
+
+    def _fallback_extraction(self, source: PdfSource) -> str:
+        self.metrics.count("fallback.pypdf2_text")
         try:
-            with open(pdf_path, 'rb') as file:
+            with open_input(source) as pdf_input:
                 return "\n".join(
                     page.extract_text().replace("\n", " ").strip()
-                    for page in PyPDF2.PdfReader(file).pages
+                    for page in pdf_library("PyPDF2").PdfReader(pdf_input.stream()).pages
                     if page.extract_text()
                 )
         except Exception as e:
@@ -96,202 +311,185 @@ class UniversalScheduleExtractor:
 
         return header
 
-    def _parse_single_session_block(self, block_text: str) -> List[Dict]:
+    def _parse_single_session_block(self, block_text: str) -> List[Session]:
         """
         Parses a single block of text representing one or more sessions within a time slot.
+        Every non-empty line is one candidate session.
         """
         sessions = []
-        
-        # Split block_text by newlines first, then try the regex delimiter if no newlines
-        lines = [line.strip() for line in block_text.split('\n') if line.strip()]
-        
-        sub_session_strings = []
-        if lines:
-            # If there are clear lines, treat each line as a potential session block
-            sub_session_strings = lines
-        else:
-            # If no newlines, try splitting by specific session delimiters
-            normalized_block_text = re.sub(r'\s+', ' ', block_text).strip()
-            if not normalized_block_text:
-                return []
-            
-            # Delimiter to identify start of new sessions within a concatenated string
-            sub_session_delimiter_pattern = r"(?=\s*(G\d+(?::\d+)?(?:(?:\s*\/\s*)?)|Algorithmique|Génie logiciel|Système d\'Exploitation:|Fondements de l\'IA|Administration et Architecture|Techniques d\'Optimisation|Synchronisation course))"
-            
-            split_parts = re.split(sub_session_delimiter_pattern, normalized_block_text, flags=re.IGNORECASE)
-            
-            current_session_part = ""
-            for i, part in enumerate(split_parts):
-                if not part.strip():
-                    continue
-                # If it's a delimiter or a new session start
-                # The regex for matching the delimiter itself for re-combining needs to be non-lookahead
-                if re.match(sub_session_delimiter_pattern.replace('(?=', '^'), part, re.IGNORECASE):
-                    if current_session_part:
-                        sub_session_strings.append(current_session_part.strip())
-                    current_session_part = part
-                else:
-                    current_session_part += part
-            if current_session_part:
-                sub_session_strings.append(current_session_part.strip())
-            
-            if not sub_session_strings and normalized_block_text:
-                sub_session_strings = [normalized_block_text]
-            elif not sub_session_strings:
-                return []
-
-        # Process each potential sub-session string
-        for s_block in sub_session_strings:
-            s_block = s_block.strip()
-            if not s_block: continue
-
-            session = {
-                "group": None,
-                "room": None,
-                "course": None,
-                "type": None,
-                "professor": None
-            }
-
-            # Pattern 1: G<group>:<room> / <course> -- <type>, <professor> or G<group> / <course> -- <type>, <professor>
-            match = re.match(r"(G\d+)(?::(\d+[A-Z]?))?\s*/\s*([A-Za-zÀ-ÿ'':,\-/\s]+?)\s*--\s*([A-Za-z]+)(?:,?\s*([A-Za-zÀ-ÿ\s-]+))?", s_block, re.UNICODE)
-            if match:
-                session["group"] = match.group(1).strip()
-                session["room"] = match.group(2).strip() if match.group(2) else None
-                session["course"] = match.group(3).strip()
-                session["type"] = self._normalize_type(match.group(4))
-                session["professor"] = match.group(5).strip() if match.group(5) else None
-                sessions.append(session)
+        for line in block_text.split('\n'):
+            s_block = line.strip()
+            if not s_block:
                 continue
 
-            # Pattern 2: <course> course <room/type> <professor>
-            match = re.match(r"([A-Za-zÀ-ÿ'':,\-/\s]+?)\s*course\s*([A-Za-z0-9\.]+)?\s*([A-Za-zÀ-ÿ\s-]+)?", s_block, re.UNICODE)
-            if match:
-                session["course"] = match.group(1).strip()
-                potential_type_room = match.group(2).strip() if match.group(2) else None
-                professor = match.group(3).strip() if match.group(3) else None
-                
-                if potential_type_room:
-                    if re.match(r'^\d+[A-Z]?$', potential_type_room):
-                        session["room"] = potential_type_room
-                    else:
-                        session["type"] = self._normalize_type(potential_type_room)
-                
-                session["professor"] = professor
-                session["type"] = session["type"] or self._normalize_type("C")
+            matched = _match_session_line(s_block)
+            if matched is not None:
+                pattern, session = matched
+                self.metrics.count(f"session_pattern.{pattern}")
                 sessions.append(session)
-                continue
-
-            # Pattern 3: <course>: <synchronization type> -- <type>, <professor>
-            match = re.match(r"([A-Za-zÀ-ÿ'':,\-/\s]+?):\s*([A-Za-zÀ-ÿ'':,\-/\s]+?)\s*--\s*([A-Za-z]+)(?:,?\s*([A-Za-zÀ-ÿ\s-]+))?", s_block, re.UNICODE)
-            if match:
-                session["course"] = f"{match.group(1).strip()}: {match.group(2).strip()}"
-                session["type"] = self._normalize_type(match.group(3))
-                session["professor"] = match.group(4).strip() if match.group(4) else None
-                sessions.append(session)
-                continue
-                
-            # Pattern 4: Synchronisation course <type> <professor>
-            match = re.match(r"(Synchronisation course)\s*([A-Za-z]+)\s*([A-Za-zÀ-ÿ\s-]+)?", s_block, re.UNICODE)
-            if match:
-                session["course"] = match.group(1).strip()
-                session["type"] = self._normalize_type(match.group(2))
-                session["professor"] = match.group(3).strip() if match.group(3) else None
-                sessions.append(session)
-                continue
-            
-            # Pattern 5: Course with only type/room and professor, potentially without explicit "course"
-            match = re.match(r"([A-Za-zÀ-ÿ'':,\-/\s]+?)\s*([A-Za-z0-9\.]+)\s*([A-Za-zÀ-ÿ\s-]+)", s_block, re.UNICODE)
-            if match:
-                session["course"] = match.group(1).strip()
-                potential_type_room = match.group(2).strip()
-                professor = match.group(3).strip()
-
-                if re.match(r'^\d+[A-Z]?$', potential_type_room):
-                    session["room"] = potential_type_room
-                    session["type"] = self._normalize_type("C")
-                else:
-                    session["type"] = self._normalize_type(potential_type_room)
-                session["professor"] = professor
-                sessions.append(session)
-                continue
-
-            # Fallback for remaining text if no specific pattern matches
-            if not sessions and s_block:
-                prof_match = re.search(r"([A-Z][a-zÀ-ÿ\s-]+)$", s_block)
-                professor_fallback = prof_match.group(1).strip() if prof_match else None
-                course_fallback = s_block
-                if professor_fallback:
-                    course_fallback = s_block.replace(professor_fallback, "").strip()
-                
-                course_fallback = re.sub(r'\s*--(DW|PW|C|SC|F|R2|T)\s*', '', course_fallback, flags=re.IGNORECASE).strip()
-                course_fallback = re.sub(r'\s*course\s*', '', course_fallback, flags=re.IGNORECASE).strip()
-
-                sessions.append({
-                    "group": None,
-                    "room": None,
-                    "course": course_fallback if course_fallback else s_block,
-                    "type": self._normalize_type("C"),
-                    "professor": professor_fallback
-                })
+            elif not sessions:
+                # Fallback for remaining text if no specific pattern matches
+                self.metrics.count("session_pattern.fallback")
+                sessions.append(_fallback_session(s_block))
 
         return sessions
 
     def _normalize_type(self, code: Optional[str]) -> str:
-        mapping = {
-            "DW": "Directed Work",
-            "PW": "Practical Work",
-            "C": "Course",
-            "SC": "Course",
-            "F": "Course",
-            "R2": "Course",
-            "421T": "Course",
-            "244T": "Course",
-            "431T": "Course"
-        }
-        if code:
-            normalized_code = code.upper().strip()
-            return mapping.get(normalized_code, normalized_code)
-        return ""
-
-    def process_schedule(self, pdf_path: str) -> Dict[str, Any]:
-        text = self.extract_text_from_pdf(pdf_path)
-        print("\n--- Extracted Raw Text ---")
-        print(text[:2000]) 
-        print("--------------------------\n")
+        return _normalize_type(code)
 
-        header = self.parse_header(text)
-        
-        full_schedule_table = []
-        with pdfplumber.open(pdf_path) as pdf:
-            schedule_page = pdf.pages[0]
-
-            table_settings = {
-                "vertical_strategy": "lines",
-                "horizontal_strategy": "lines",
-                "snap_tolerance": 10, # Increased
-                "join_tolerance": 10, # Increased
-                "edge_min_length": 3,
-                "text_tolerance": 5, # Increased
-                "min_words_vertical": 0,
-                "min_words_horizontal": 0,
-                # Removed explicit_vertical_lines for auto-detection
-            }
-            
-            tables = schedule_page.extract_tables(table_settings)
-            if tables:
-                full_schedule_table = tables[0]
-
-        print("\n--- Extracted Table from pdfplumber (New Settings) ---")
-        for row in full_schedule_table:
-            print(row)
-        print("-------------------------------------\n")
-
-        schedule_data = self._process_extracted_table(full_schedule_table)
+    def process_schedule(self, source: PdfSource, known: Optional[Dict[str, List[Session]]] = None) -> Dict[str, Any]:
+        """
+        Parses the first table of the first page. known (see known_cells) holds the
+        sessions of a previous extraction by cell hash; slots whose text is unchanged
+        reuse them instead of being parsed again. XLSX and DOCX sources are streamed
+        up to their first timetable (see schedule_documents).
+        """
+        with open_input(source) as pdf_input:
+            if pdf_input.is_document():
+                from schedule_documents import first_document_parts
+
+                return self._build_schedule(*first_document_parts(self, pdf_input), known=known)
+            try:
+                pdf = pdf_library("pdfplumber").open(pdf_input.stream())
+            except Exception as e:
+                logger.warning("Error with pdfplumber: %s", e)
+                return self._build_schedule(self._fallback_extraction(pdf_input), self.time_slots_header, [])
+
+            # One parse of the document: the header text and the table share the same
+            # page object, so chars/edges are only computed once.
+            with pdf:
+                schedule_page = pdf.pages[0]
+                table, settings = self._find_schedule_table(schedule_page)
+                return self._schedule_from_table(schedule_page, table, known=known, settings=settings)
+
+    def iter_schedules(self, source: PdfSource, page_workers: Optional[int] = None,
+                       known: Optional[Dict[str, List[Session]]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields one parsed schedule per table, page by page, with its 1-based "page" and
+        its "table" index on that page. Each page's caches are released before moving
+        on, so memory stays flat on long documents. Header fields a page lacks are
+        inherited from the previous schedule (continuation pages).
+
+        With page_workers > 1 the page range is split across that many processes
+        (see schedule_pages); schedules still come out in page order. known works as
+        in process_schedule. An XLSX sheet counts as a page and a DOCX document as
+        one page; both are streamed in this process.
+        """
+        with open_input(source) as pdf_input:
+            if pdf_input.is_document():
+                from schedule_documents import iter_document_parts
+
+                pages = iter_document_parts(self, pdf_input)
+            elif page_workers and page_workers > 1:
+                from schedule_pages import iter_page_results
+
+                pages = iter_page_results(self, pdf_input, "tables", page_workers)
+            else:
+                pages = self._iter_page_parts(pdf_input)
+
+            previous_header = None
+            for page_number, parts in pages:
+                for index, (text, time_slots, slot_grid) in enumerate(parts):
+                    schedule = self._build_schedule(text, time_slots, slot_grid, previous_header, known)
+                    previous_header = {key: schedule[key] for key in HEADER_FIELDS}
+                    yield {"page": page_number, "table": index, **schedule}
+
+    def _iter_page_parts(self, source: PdfSource, start: int = 0,
+                         stop: Optional[int] = None) -> Iterator[Tuple[int, List[TableParts]]]:
+        """Yields (page number, [(header text, time slots, slot grid) per table]) for pages[start:stop]."""
+        with open_input(source) as pdf_input, pdf_library("pdfplumber").open(pdf_input.stream()) as pdf:
+            for page_number, page in enumerate(pdf.pages[start:stop], start=start + 1):
+                try:
+                    tables, settings = self._find_tables(page)
+                    self.metrics.count("pages")
+                    parts = []
+                    upper = 0
+                    for index, table in enumerate(tables):
+                        lower = tables[index + 1].bbox[1] if index + 1 < len(tables) else page.height
+                        parts.append(self._table_parts(page, table, (upper, lower), settings))
+                        upper = table.bbox[3]
+                    yield page_number, parts
+                finally:
+                    page.close()
+
+    def process_schedule_cached(self, source: PdfSource, cache: Optional["ScheduleCache"], refresh: bool = False,
+                                all_pages: bool = False, page_workers: Optional[int] = None) -> Tuple[Any, bool]:
+        # The file is mapped once: the cache digest and the extraction read the same pages
+        with open_input(source) as pdf_input:
+            settings = self.table_settings if self.table_tuner is None else {**self.table_settings, "tuned": True}
+            if self.table_engine != "pdfplumber":
+                settings = {**settings, "table_engine": self.table_engine}
+            if all_pages:
+                compute = lambda: list(self.iter_schedules(pdf_input, page_workers))
+                settings = {**settings, "all_pages": True}
+            else:
+                compute = lambda: self.process_schedule(pdf_input)
+            if cache is None:
+                return compute(), False
+            result, hit = cache.fetch(pdf_input, EXTRACTOR_VERSION, settings, compute, refresh)
+        self.metrics.count("cache.hit" if hit else "cache.miss")
+        return result, hit
+
+    def _find_tables(self, page) -> Tuple[List[Any], Dict[str, Any]]:
+        """The page's tables and the settings that found them (the tuned profile when a tuner is set)."""
+        settings = self.table_settings
+        if self.table_tuner is not None:
+            settings = self.table_tuner.settings_for(self, page)
+        with self.metrics.stage("extract_tables"):
+            if self.table_engine == "grid":
+                from schedule_grid import find_word_grids
+
+                grids = find_word_grids(self, page, settings)
+                if grids is not None:
+                    return grids, settings
+                self.metrics.count("fallback.grid_to_tables")
+            return page.find_tables(settings), settings
+
+    def _find_schedule_table(self, page) -> Tuple[Optional[Any], Dict[str, Any]]:
+        tables, settings = self._find_tables(page)
+        self.metrics.count("pages")
+        return (tables[0] if tables else None), settings
+
+    def _schedule_from_table(self, page, table, bounds: Optional[Tuple[float, float]] = None,
+                             inherited_header: Optional[Dict[str, Any]] = None,
+                             known: Optional[Dict[str, List[Session]]] = None,
+                             settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self._build_schedule(*self._table_parts(page, table, bounds, settings), inherited_header, known)
+
+    def _table_parts(self, page, table, bounds: Optional[Tuple[float, float]] = None,
+                     settings: Optional[Dict[str, Any]] = None) -> TableParts:
+        # Everything that needs the page; the rest of the pipeline works on plain data
+        with self.metrics.stage("extract_text"):
+            text = self._extract_header_text(page, table, bounds)
+        time_slots, slot_grid = self.time_slots_header, []
+        if table is not None:
+            self.metrics.count("tables")
+            with self.metrics.stage("extract_tables"):
+                time_slots, slot_grid = self._extract_slot_grid(page, table, settings)
+        return text, time_slots, slot_grid
+
+    def _build_schedule(self, text: str, time_slots: List[str], slot_grid: List[List[str]],
+                        inherited_header: Optional[Dict[str, Any]] = None,
+                        known: Optional[Dict[str, List[Session]]] = None) -> Dict[str, Any]:
+        logger.debug("Extracted header text:\n%s", text[:2000])
+
+        with self.metrics.stage("parse_header"):
+            header = self.parse_header(text)
+        if inherited_header:
+            for key in HEADER_FIELDS:
+                header[key] = header[key] or inherited_header.get(key, "")
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Extracted table:\n%s", "\n".join(map(str, slot_grid)))
+
+        with self.metrics.stage("process_extracted_table"):
+            schedule_data = self._process_extracted_table(slot_grid, time_slots, known)
         
-        final_time_slots = self.time_slots_header
+        final_time_slots = time_slots
 
-        professors, subjects = self._analyze_entities(schedule_data)
+        with self.metrics.stage("analyze_entities"):
+            professors, subjects = self._analyze_entities(schedule_data)
+            indexes = self._build_indexes(schedule_data, final_time_slots)
 
         return {
             **header,
@@ -299,32 +497,139 @@ class UniversalScheduleExtractor:
             "professors": professors,
             "subjects": subjects,
             "weekly_schedule": schedule_data,
-            "statistics": self._calculate_stats(schedule_data, professors, subjects)
+            "statistics": self._calculate_stats(schedule_data, professors, subjects),
+            "indexes": indexes
         }
 
-    def _process_extracted_table(self, table: List[List[Optional[str]]]) -> Dict[str, List[Dict]]:
-        schedule: Dict[str, List[Dict]] = {day: [] for day in self.days_full}
+    def _extract_header_text(self, page, table, bounds: Optional[Tuple[float, float]] = None) -> str:
+        """
+        Layout text of the regions outside the schedule table, within the vertical
+        bounds that belong to it on the page. The header block sits above the table;
+        the area below it is only read when a field is still missing.
+        """
+        if table is None:
+            return page.extract_text(layout=True) or ""
+
+        upper, lower = bounds or (0, page.height)
+        _, top, _, bottom = table.bbox
+        text = ""
+        if top > upper:
+            text = page.crop((0, upper, page.width, top)).extract_text(layout=True) or ""
+        header = self.parse_header(text)
+        missing = [key for key in HEADER_FIELDS if not header[key]]
+        if missing and bottom < lower:
+            footer_text = page.crop((0, bottom, page.width, lower)).extract_text(layout=True) or ""
+            if footer_text:
+                text = text + "\n" + footer_text
+        return text
+
+    def _text_settings(self, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        # Same cell text options extract_tables() derives from the table settings
+        return pdf_library("pdfplumber.table").TableSettings.resolve(settings or self.table_settings).text_settings
+
+    def _extract_slot_grid(self, page, table,
+                           settings: Optional[Dict[str, Any]] = None) -> Tuple[List[str], List[List[str]]]:
+        """
+        Returns (time slots, rows) where every row is [day, slot 1 text, slot 2 text, ...].
+        The columns are located from the header row; when that fails the table is mapped
+        with LEGACY_TIME_SLOT_COLUMN_MAP. settings are the ones the table was found
+        with (self.table_settings by default).
+        """
+        if self.table_engine == "grid":
+            from schedule_grid import WordGrid
+
+            if isinstance(table, WordGrid):
+                return table.time_slots, table.rows
+        text_settings = self._text_settings(settings)
+        located = self._locate_time_slot_columns(page, table, text_settings)
+        if located is None:
+            self.metrics.count("fallback.legacy_column_map")
+            return self.time_slots_header, self._legacy_slot_grid(table.extract(**text_settings))
+
+        time_slots, edges = located
+        extract_text = pdf_library("pdfplumber.utils").extract_text
+        grid = []
+        for row in table.rows[1:]:
+            _, top, _, bottom = row.bbox
+            row_chars = [
+                char for char in page.chars
+                if top <= (char["top"] + char["bottom"]) / 2 < bottom
+            ]
+            # Cells are rebuilt from the characters inside each slot's x-range, so text cut
+            # by a spurious ruling ('Algorit' | 'hmique') is merged back into one cell.
+            buckets: List[List[Dict]] = [[] for _ in range(len(edges))]
+            for char in row_chars:
+                x = (char["x0"] + char["x1"]) / 2
+                if x < table.bbox[0] or x >= edges[-1]:
+                    continue
+                buckets[bisect.bisect_right(edges, x)].append(char)
+            grid.append([
+                extract_text(chars, **text_settings).strip() if chars else ""
+                for chars in buckets
+            ])
+        return time_slots, grid
+
+    def _locate_time_slot_columns(self, page, table,
+                                  text_settings: Dict[str, Any]) -> Optional[Tuple[List[str], List[float]]]:
+        """
+        Finds the time_slot_regex labels in the header row and places a slot boundary on
+        the table ruling closest to the middle of the gap between neighbouring labels.
+        Returns (slot labels, edges) where edges[0] is the right edge of the day column
+        and edges[i + 1] the right edge of slot i, or None with fewer than two labels.
+        """
+        rulings = sorted({cell[0] for cell in table.cells} | {cell[2] for cell in table.cells})
+        return self._locate_slot_edges(page, table.rows[0].bbox, table.bbox, rulings, text_settings)
+
+    def _locate_slot_edges(self, page, header_bbox: Tuple[float, float, float, float],
+                           table_bbox: Tuple[float, float, float, float], rulings: List[float],
+                           text_settings: Dict[str, Any]) -> Optional[Tuple[List[str], List[float]]]:
+        # Shared by the pdfplumber tables and the word-grid engine, which has no Table objects
+        x0, top, x1, bottom = header_bbox
+        header_words = pdf_library("pdfplumber.utils").extract_words(
+            [
+                char for char in page.chars
+                if x0 <= (char["x0"] + char["x1"]) / 2 < x1 and top <= (char["top"] + char["bottom"]) / 2 < bottom
+            ],
+            x_tolerance=text_settings.get("x_tolerance", 3),
+            y_tolerance=text_settings.get("y_tolerance", 3)
+        )
+        header_words.sort(key=lambda w: w["x0"])
+
+        labels = []
+        i = 0
+        while i < len(header_words):
+            # A label may come out as one word or as '08:00', '-', '09:30'
+            for span in (1, 2, 3):
+                words = header_words[i:i + span]
+                match = re.fullmatch(self.time_slot_regex, "".join(w["text"] for w in words))
+                if match:
+                    labels.append((f"{match.group(1)}-{match.group(2)}", words[0]["x0"], words[-1]["x1"]))
+                    i += span
+                    break
+            else:
+                i += 1
 
-        if not table or len(table) < 2:
-            return schedule
-
-        column_time_slots = self.time_slots_header 
-
-        # This mapping is based on analysis of the `--- Extracted Table from pdfplumber ---` output
-        # It assumes a fixed structure of fragmented cells as returned by pdfplumber with current settings.
-        # Format: (pdfplumber_col_idx_part1, pdfplumber_col_idx_part2) or just pdfplumber_col_idx
-        # For split cells, the order in the tuple matters for concatenation (part1, part2)
-        time_slot_column_map = {
-            0: 2, # 08:00-09:30 is at pdfplumber col 2
-            1: 4, # 09:40-11:10 is at pdfplumber col 4
-            2: (6, 7), # 11:20-12:50 is split between col 6 and 7
-            3: (8, 9), # 13:00-14:30 is split between col 8 and 9 (e.g. 'Algorit', 'hmique')
-            4: 11, # 14:40-16:10 is at pdfplumber col 11
-            5: (12, 13) # 16:20-17:50 is split between col 12 and 13 (e.g. '16\n17', ':20\n-\n:50')
-        }
+        if len(labels) < 2:
+            return None
 
+        gaps = [labels[n + 1][1] - labels[n][2] for n in range(len(labels) - 1)]
+        half_gap = sorted(gaps)[len(gaps) // 2] / 2
+
+        def nearest_ruling(low: float, high: float, target: float) -> float:
+            candidates = [x for x in rulings if low <= x <= high]
+            return min(candidates, key=lambda x: abs(x - target)) if candidates else target
+
+        table_x0, _, table_x1, _ = table_bbox
+        edges = [nearest_ruling(table_x0, labels[0][1], labels[0][1] - half_gap)]
+        for left, right in zip(labels, labels[1:]):
+            edges.append(nearest_ruling(left[2], right[1], (left[2] + right[1]) / 2))
+        edges.append(nearest_ruling(labels[-1][2], table_x1, labels[-1][2] + half_gap))
+        return [label for label, _, _ in labels], edges
+
+    def _legacy_slot_grid(self, table: List[List[Optional[str]]]) -> List[List[str]]:
+        grid = []
         # Iterate through rows, starting from the first data row (after the header)
-        for row_idx, row in enumerate(table[1:]):
+        for row in table[1:]:
             # Combine day cell content (e.g., 'Sa', 't')
             day_cell_content = ""
             if len(row) > 0 and row[0]:
@@ -332,23 +637,12 @@ class UniversalScheduleExtractor:
             # Heuristic for fragmented day column (e.g., ['Sa', 't'])
             if len(row) > 1 and row[1] and len(day_cell_content) < 3 and len(row[1].strip()) < 3:
                 day_cell_content += row[1].strip()
-            
-            normalized_day = None
-            for abbr, full_day in self.day_mapping.items():
-                if day_cell_content.lower().startswith(abbr.lower()):
-                    normalized_day = full_day
-                    break
-            
-            if not normalized_day:
-                continue 
 
-            day_sessions_for_consolidation: List[Dict] = []
-            
-            # Iterate through the predefined time slots and try to extract content
-            for i, time_slot in enumerate(column_time_slots):
+            grid_row = [day_cell_content]
+            for i in range(len(self.time_slots_header)):
                 cell_data = ""
-                col_indices = time_slot_column_map.get(i)
-                
+                col_indices = LEGACY_TIME_SLOT_COLUMN_MAP.get(i)
+
                 if isinstance(col_indices, tuple):
                     # Concatenate fragmented cells for this time slot
                     part1 = row[col_indices[0]].strip() if len(row) > col_indices[0] and row[col_indices[0]] else ""
@@ -356,31 +650,49 @@ class UniversalScheduleExtractor:
                     cell_data = (part1 + " " + part2).strip()
                 elif col_indices is not None and len(row) > col_indices:
                     cell_data = row[col_indices].strip() if row[col_indices] else ""
-                
+                grid_row.append(cell_data)
+            grid.append(grid_row)
+        return grid
+
+    def _process_extracted_table(self, grid: List[List[str]], column_time_slots: Optional[List[str]] = None,
+                                 known: Optional[Dict[str, List[Session]]] = None) -> Dict[str, List[Dict]]:
+        schedule: Dict[str, List[Dict]] = {day: [] for day in self.days_full}
+        column_time_slots = column_time_slots or self.time_slots_header
+        known = known or {}
+
+        # First column of each slot label, the order slots are listed in within a day
+        slot_order: Dict[str, int] = {}
+        for index, time_slot in enumerate(column_time_slots):
+            slot_order.setdefault(time_slot, index)
+
+        for row in grid:
+            day_cell_content = (row[0] if row else "").lower()
+            normalized_day = None
+            for abbr, full_day in self.day_mapping.items():
+                if day_cell_content.startswith(abbr.lower()):
+                    normalized_day = full_day
+                    break
+
+            if not normalized_day:
+                continue
+
+            # A slot label repeated across columns gathers all of its cells
+            day_cells: Dict[str, List[str]] = {}
+            for time_slot, cell_data in zip(column_time_slots, row[1:]):
                 if cell_data:
-                    parsed_sessions = self._parse_single_session_block(cell_data)
-                    if parsed_sessions:
-                        for session in parsed_sessions:
-                            day_sessions_for_consolidation.append({
-                                "time": time_slot,
-                                "sessions": [session]
-                            })
-            
-            consolidated_day_sessions: Dict[str, List[Dict[str, Any]]] = {}
-            for session_item in day_sessions_for_consolidation:
-                time_key = session_item['time']
-                if time_key not in consolidated_day_sessions:
-                    consolidated_day_sessions[time_key] = []
-                consolidated_day_sessions[time_key].extend(session_item['sessions'])
-            
-            sorted_times = sorted(consolidated_day_sessions.keys(), 
-                                  key=lambda t: column_time_slots.index(t) if t in column_time_slots else float('inf'))
-
-            for t in sorted_times:
-                schedule[normalized_day].append({
-                    "time": t,
-                    "sessions": consolidated_day_sessions[t]
-                })
+                    day_cells.setdefault(time_slot, []).append(cell_data)
+
+            for time_slot in sorted(day_cells, key=slot_order.__getitem__):
+                cells = day_cells[time_slot]
+                slot_hash = cell_hash(cells)
+                sessions = known.get(slot_hash)
+                if sessions is None:
+                    self.metrics.count("cells.parsed")
+                    sessions = [session for cell in cells for session in self._parse_single_session_block(cell)]
+                else:
+                    self.metrics.count("cells.reused")
+                if sessions:
+                    schedule[normalized_day].append({"time": time_slot, "sessions": sessions, "cell_hash": slot_hash})
 
         return schedule
 
@@ -391,15 +703,15 @@ class UniversalScheduleExtractor:
         for day_sessions in schedule.values():
             for slot in day_sessions:
                 for session in slot["sessions"]:
-                    subj = session["course"]
-                    prof = session["professor"]
+                    subj = session.course
+                    prof = session.professor
 
                     if subj:
                         subjects.setdefault(subj, {"name": subj, "professors": set(), "types": set()})
                         if prof:
                             subjects[subj]["professors"].add(prof)
-                        if session["type"]:
-                            subjects[subj]["types"].add(session["type"])
+                        if session.type:
+                            subjects[subj]["types"].add(session.type)
 
                     if prof:
                         professors.setdefault(prof, {"name": prof, "subjects": set()})
@@ -411,6 +723,38 @@ class UniversalScheduleExtractor:
             [{"name": k, "professors": list(v["professors"]), "types": list(v["types"])} for k, v in subjects.items()]
         )
 
+    def _build_indexes(self, schedule: Dict, time_slots: List[str]) -> Dict[str, Any]:
+        """
+        Inverted indexes over the weekly schedule: professor -> [[day, time], ...],
+        group -> [[day, time], ...] and room -> occupancy bitmap, one integer per entry
+        of "days" with bit i set when the room is used in time_slots[i]. Sessions for
+        the whole section (no group) only appear in the professor and room indexes.
+        """
+        slot_bits = {time_slot: 1 << index for index, time_slot in enumerate(time_slots)}
+        # Dicts double as insertion-ordered sets of (day, time)
+        professors: Dict[str, Dict[Tuple[str, str], None]] = {}
+        groups: Dict[str, Dict[Tuple[str, str], None]] = {}
+        rooms: Dict[str, List[int]] = {}
+
+        for day_index, day in enumerate(self.days_full):
+            for slot in schedule.get(day, []):
+                key = (day, slot["time"])
+                for session in slot["sessions"]:
+                    if session.professor:
+                        professors.setdefault(session.professor, {})[key] = None
+                    if session.group:
+                        groups.setdefault(session.group, {})[key] = None
+                    if session.room:
+                        bitmap = rooms.setdefault(session.room, [0] * len(self.days_full))
+                        bitmap[day_index] |= slot_bits.get(slot["time"], 0)
+
+        return {
+            "days": self.days_full,
+            "professors": {name: [list(key) for key in keys] for name, keys in professors.items()},
+            "rooms": rooms,
+            "groups": {group: [list(key) for key in keys] for group, keys in groups.items()}
+        }
+
     def _calculate_stats(self, schedule: Dict, professors: List[Dict], subjects: List[Dict]) -> Dict:
         total_sessions = 0
         for day_sessions in schedule.values():
@@ -425,36 +769,234 @@ class UniversalScheduleExtractor:
         }
 
 
+def _run_single(extractor: UniversalScheduleExtractor, pdf_path: str, args: argparse.Namespace,
+                cache: Optional["ScheduleCache"]):
+    previous = None
+    if args.previous:
+        from schedule_diff import diff_schedules
+
+        previous_text = Path(args.previous).read_text(encoding='utf-8')
+        if args.all_pages:
+            previous = [json.loads(line) for line in previous_text.splitlines() if line.strip()]
+        else:
+            previous = [json.loads(previous_text)]
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.all_pages:
+            if previous is not None:
+                schedules = extractor.iter_schedules(pdf_path, args.page_workers, known_cells(previous))
+                by_position = {(schedule.get("page"), schedule.get("table")): schedule for schedule in previous}
+            elif cache is None:
+                schedules = extractor.iter_schedules(pdf_path, args.page_workers)
+            else:
+                schedules, _ = extractor.process_schedule_cached(pdf_path, cache, args.refresh_cache, all_pages=True,
+                                                                 page_workers=args.page_workers)
+            for schedule in schedules:
+                if previous is not None:
+                    before = by_position.get((schedule["page"], schedule["table"]), {})
+                    schedule["diff"] = diff_schedules(before, schedule)
+                write_json(schedule, output)
+                output.write("\n")
+                output.flush()
+            return
+
+        if args.header_only:
+            result = extractor.extract_header(pdf_path)
+        elif previous is not None:
+            result = extractor.process_schedule(pdf_path, known_cells(previous))
+            result["diff"] = diff_schedules(previous[0], result)
+        else:
+            result, _ = extractor.process_schedule_cached(pdf_path, cache, args.refresh_cache)
+
+        # Written piece by piece rather than built as one string
+        if args.pretty:
+            json.dump(result, output, ensure_ascii=False, indent=2, default=json_default)
+        else:
+            write_json(result, output)
+        if not args.output:
+            output.write("\n")
+    finally:
+        if args.output:
+            output.close()
+
+    if args.output:
+        print(f"Saved to {args.output}")
+
+
 def main():
+    from schedule_cache import CACHE_DIR_ENV, DEFAULT_MAX_BYTES, ScheduleCache
+
     parser = argparse.ArgumentParser(description='Intelligent PDF Schedule Extractor')
-    parser.add_argument('pdf_path', help='Path to PDF schedule')
-    parser.add_argument('-o', '--output', help='Output JSON file')
+    parser.add_argument('pdf_path', nargs='*',
+                        help='Path to a PDF, XLSX or DOCX schedule (with --batch: directories, glob patterns or '
+                             'manifest files)')
+    parser.add_argument('-o', '--output', help='Output JSON file (NDJSON with --batch)')
     parser.add_argument('--pretty', action='store_true', help='Pretty-print JSON')
+    parser.add_argument('--batch', action='store_true',
+                        help='Process many PDF/XLSX/DOCX files in parallel, one NDJSON line per file')
+    parser.add_argument('--worker', action='store_true',
+                        help='Run as a persistent worker reading JSON-lines jobs on stdin')
+    parser.add_argument('--watch', action='store_true',
+                        help='Watch the given upload directories and extract new or changed files as they land '
+                             '(results next to the inputs, or under -o DIR)')
+    parser.add_argument('--manifest', metavar='PATH',
+                        help='With --watch: log of processed files, read back on restart '
+                             '(default: .schedule-manifest.ndjson in the output or first watched directory)')
+    parser.add_argument('--poll-interval', type=float, metavar='SECONDS',
+                        help='With --watch: rescan every SECONDS instead of using inotify')
+    parser.add_argument('--once', action='store_true',
+                        help='With --watch: process what is new or changed once, then exit')
+    parser.add_argument('--workers', type=int,
+                        help='Worker processes for --batch/--worker/--watch (default: available cores)')
+    parser.add_argument('--timeout', type=float, help='Per-file timeout in seconds for --batch/--watch')
+    parser.add_argument('--indexes', metavar='PATH',
+                        help='With --batch: write the professor/room/group indexes merged over all files to PATH')
+    parser.add_argument('--conflicts', metavar='PATH',
+                        help='With --batch: write professor and room clashes across all files to PATH')
+    parser.add_argument('--names', metavar='PATH',
+                        help='With --batch: cluster professor and course name variants across all files and write '
+                             'the canonical names with their variants to PATH')
+    parser.add_argument('--roster', metavar='PATH',
+                        help='With --names: JSON of canonical names ({"professors": [...], "subjects": [...]})')
+    parser.add_argument('--all-pages', action='store_true',
+                        help='Extract every table on every page; one JSON line per schedule as it is parsed')
+    parser.add_argument('--header-only', action='store_true',
+                        help='Only parse the header, using the cheapest text engine that yields it')
+    parser.add_argument('--engines', help=f"Comma-separated text engine ladder (default: {','.join(DEFAULT_LADDER)})")
+    parser.add_argument('--previous', metavar='PATH',
+                        help='Output of an earlier extraction of this timetable (NDJSON with --all-pages): '
+                             'unchanged cells are reused and a "diff" of header and sessions is added')
+    parser.add_argument('--page-workers', type=int,
+                        help='With --all-pages: split the pages of one PDF across this many processes')
+    parser.add_argument('--tune', nargs='?', const='', metavar='DIR',
+                        help='Tune table settings per page layout and keep the profiles in DIR '
+                             '(default: <cache dir>/table_profiles, or memory only without a cache)')
+    parser.add_argument('--table-engine', choices=TABLE_ENGINES, default='pdfplumber',
+                        help='How timetable grids are read: pdfplumber find_tables, or "grid", which buckets '
+                             'characters into day rows and slot columns with NumPy (faster; needs numpy)')
+
+    parser.add_argument('--cache-dir', help=f'Result cache directory (default: ${CACHE_DIR_ENV}, unset disables caching)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='Maximum cache size in MB before LRU eviction')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the result cache')
+    parser.add_argument('--refresh-cache', action='store_true', help='Re-extract and overwrite cached results')
+
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log extracted text and tables to stderr')
+    parser.add_argument('--metrics', nargs='?', const='-', metavar='PATH',
+                        help='Emit stage timings and counters as JSON (to stderr, or to PATH)')
+    parser.add_argument('--profile', metavar='PATH', help='Write cProfile stats of a single-file run to PATH')
 
     args = parser.parse_args()
 
-    if not Path(args.pdf_path).exists():
-        sys.exit(f"Error: File {args.pdf_path} not found")
-
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format='%(levelname)s %(name)s: %(message)s')
+
+    cache = None
+    if not args.no_cache:
+        cache = ScheduleCache.from_env(args.cache_dir, args.cache_size * 1024 * 1024)
+
+    if args.profile and (args.worker or args.batch or args.watch):
+        parser.error("--profile only applies to single-file runs")
+    if (args.manifest or args.poll_interval or args.once) and not args.watch:
+        parser.error("--manifest, --poll-interval and --once only apply to --watch runs")
+    if args.page_workers and (args.worker or args.batch or args.watch or not args.all_pages):
+        parser.error("--page-workers only applies to single-file --all-pages runs")
+    if args.header_only and (args.worker or args.batch or args.watch or args.all_pages):
+        parser.error("--header-only only applies to single-file runs")
+    if (args.indexes or args.conflicts or args.names) and not args.batch:
+        parser.error("--indexes, --conflicts and --names only apply to --batch runs")
+    if args.roster and not args.names:
+        parser.error("--roster only applies with --names")
+    if args.previous and (args.worker or args.batch or args.watch or args.header_only):
+        parser.error("--previous only applies to single-file schedule runs")
+    ladder = args.engines.split(',') if args.engines else None
+    try:
+        for name in ladder or []:
+            get_engine(name)
+    except ValueError as e:
+        parser.error(str(e))
+    # Optional dependencies are checked here so a missing one is an error message, not a traceback
     try:
-        extractor = UniversalScheduleExtractor()
-        result = extractor.process_schedule(args.pdf_path)
+        if args.conflicts:
+            import schedule_conflicts  # noqa: F401
+        if args.table_engine == "grid":
+            import schedule_grid  # noqa: F401
+    except ImportError as e:
+        sys.exit(f"Error: {e}")
 
-        json_args = {'ensure_ascii': False}
-        if args.pretty:
-            json_args['indent'] = 2
+    tuner = None
+    if args.tune is not None:
+        from schedule_tuning import TableTuner
+
+        profile_dir = args.tune or (str(cache.directory / "table_profiles") if cache is not None else None)
+        tuner = TableTuner(profile_dir)
+
+    if args.worker:
+        from schedule_worker import serve
 
-        json_output = json.dumps(result, **json_args)
+        serve(args.workers, cache, tuner, args.table_engine)
+        return
+
+    if not args.pdf_path:
+        parser.error("a PDF path is required")
+
+    if args.watch:
+        from schedule_watch import watch
+
+        for directory in args.pdf_path:
+            if not Path(directory).is_dir():
+                parser.error(f"--watch takes directories: {directory} is not one")
+        summary = watch(args.pdf_path, args.output, args.manifest, args.workers, args.timeout, cache,
+                        args.refresh_cache, args.all_pages, tuner, args.table_engine, args.poll_interval, args.once)
+        sys.exit(1 if summary["failed"] else 0)
+
+    if args.batch:
+        from schedule_batch import run_batch
 
         if args.output:
-            Path(args.output).write_text(json_output, encoding='utf-8')
-            print(f"Saved to {args.output}")
+            with open(args.output, 'w', encoding='utf-8') as output:
+                summary = run_batch(args.pdf_path, output, args.workers, args.timeout, cache, args.refresh_cache,
+                                    args.all_pages, args.metrics, args.indexes, args.conflicts, tuner,
+                                    args.table_engine, args.names, args.roster)
         else:
-            print(json_output)
-
+            summary = run_batch(args.pdf_path, sys.stdout, args.workers, args.timeout, cache, args.refresh_cache,
+                                args.all_pages, args.metrics, args.indexes, args.conflicts, tuner,
+                                args.table_engine, args.names, args.roster)
+        sys.exit(1 if summary["failed"] else 0)
+
+    if len(args.pdf_path) != 1:
+        parser.error("multiple inputs require --batch")
+    pdf_path = args.pdf_path[0]
+
+    if not Path(pdf_path).exists():
+        sys.exit(f"Error: File {pdf_path} not found")
+
+    extractor = UniversalScheduleExtractor()
+    extractor.table_tuner = tuner
+    extractor.table_engine = args.table_engine
+    if ladder:
+        extractor.engine_ladder = ladder
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        _run_single(extractor, pdf_path, args, cache)
     except Exception as e:
         sys.exit(f"Processing failed: {str(e)}")
+    finally:
+        if profiler is not None:
+            import pstats
+
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+        if args.metrics:
+            extractor.metrics.emit(args.metrics)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,234 @@
+import contextlib
+import glob
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Generator, IO, Iterable, Iterator, List, Optional
+
+from pdf_schedule_extractor import UniversalScheduleExtractor
+from schedule_cache import ScheduleCache
+from schedule_index import IndexAggregator, iter_result_schedules
+from schedule_metrics import ExtractionMetrics
+from schedule_records import write_json
+from schedule_tuning import TableTuner
+
+GLOB_CHARS = set("*?[")
+# Inputs picked up from directories; XLSX and DOCX go through schedule_documents
+SCHEDULE_SUFFIXES = (".pdf", ".xlsx", ".xlsm", ".docx")
+
+_extractor: Optional[UniversalScheduleExtractor] = None
+_cache: Optional[ScheduleCache] = None
+
+
+class FileTimeoutError(Exception):
+    pass
+
+
+def default_workers() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def _read_manifest(manifest: Path) -> List[str]:
+    text = manifest.read_text(encoding="utf-8")
+    if manifest.suffix.lower() == ".json":
+        entries = json.loads(text)
+    else:
+        entries = [line.strip() for line in text.splitlines()]
+    paths = []
+    for entry in entries:
+        if not entry or entry.startswith("#"):
+            continue
+        path = Path(entry)
+        paths.append(str(path if path.is_absolute() else manifest.parent / path))
+    return paths
+
+
+def collect_inputs(sources: Iterable[str]) -> List[str]:
+    """
+    Expands directories (recursively), glob patterns and manifest files (one path per
+    line, or a JSON list) into a de-duplicated list of schedule paths (SCHEDULE_SUFFIXES),
+    keeping input order.
+    """
+    paths: List[str] = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            paths.extend(str(p) for p in sorted(path.rglob("*")) if p.suffix.lower() in SCHEDULE_SUFFIXES)
+        elif GLOB_CHARS & set(source):
+            paths.extend(sorted(glob.glob(source, recursive=True)))
+        elif path.suffix.lower() in SCHEDULE_SUFFIXES:
+            paths.append(source)
+        elif path.is_file():
+            paths.extend(_read_manifest(path))
+        else:
+            paths.append(source)
+    return list(dict.fromkeys(paths))
+
+
+def _init_worker(cache: Optional[ScheduleCache] = None, tuner: Optional[TableTuner] = None,
+                 table_engine: str = "pdfplumber"):
+    global _extractor, _cache
+    # Children must not react to the terminal's Ctrl+C; the parent shuts the pool down.
+    # Nor run a SIGTERM handler inherited from the parent (the watcher's) inside a job.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _extractor = UniversalScheduleExtractor()
+    _extractor.table_tuner = tuner
+    _extractor.table_engine = table_engine
+    _cache = cache
+
+
+def _on_alarm(signum, frame):
+    raise FileTimeoutError("timed out")
+
+
+@contextlib.contextmanager
+def deadline(timeout: Optional[float]):
+    # SIGALRM based, so it only works in the main thread of a worker process
+    if not timeout:
+        yield
+        return
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _process_file(pdf_path: str, timeout: Optional[float], refresh: bool = False,
+                  all_pages: bool = False, with_metrics: bool = False) -> Dict[str, Any]:
+    started = time.perf_counter()
+    _extractor.metrics.reset()
+    try:
+        # Nothing but the NDJSON stream may reach stdout
+        with deadline(timeout), contextlib.redirect_stdout(sys.stderr):
+            data, cached = _extractor.process_schedule_cached(pdf_path, _cache, refresh, all_pages)
+        result = {"file": pdf_path, "success": True, "data": data, "cached": cached}
+    except FileTimeoutError:
+        result = {"file": pdf_path, "success": False, "error": f"Timed out after {timeout}s"}
+    except Exception as e:
+        result = {"file": pdf_path, "success": False, "error": f"{type(e).__name__}: {e}"}
+    result["elapsed"] = round(time.perf_counter() - started, 4)
+    if with_metrics:
+        result["metrics"] = _extractor.metrics.as_dict()
+    return result
+
+
+def _run_pool(paths: List[str], workers: int, timeout: Optional[float], cache: Optional[ScheduleCache],
+              refresh: bool, all_pages: bool, with_metrics: bool,
+              tuner: Optional[TableTuner] = None,
+              table_engine: str = "pdfplumber") -> Generator[Dict[str, Any], None, List[str]]:
+    # Yields results and returns the paths that were in flight when a worker died
+    pending = list(reversed(paths))
+    lost: List[str] = []
+    while pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(cache, tuner, table_engine)) as pool:
+            in_flight = {}
+            while pending or in_flight:
+                while pending and len(in_flight) < workers * 2:
+                    path = pending.pop()
+                    in_flight[pool.submit(_process_file, path, timeout, refresh, all_pages, with_metrics)] = path
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    path = in_flight.pop(future)
+                    try:
+                        yield future.result()
+                    except BrokenProcessPool:
+                        lost.append(path)
+                        broken = True
+                if broken:
+                    lost.extend(in_flight.values())
+                    break
+    return lost
+
+
+def iter_batch(paths: List[str], workers: Optional[int] = None, timeout: Optional[float] = None,
+               cache: Optional[ScheduleCache] = None, refresh: bool = False,
+               all_pages: bool = False, with_metrics: bool = False,
+               tuner: Optional[TableTuner] = None, table_engine: str = "pdfplumber") -> Iterator[Dict[str, Any]]:
+    """
+    Yields one result per input file in completion order. Files that were in flight
+    when a worker process died are re-run one at a time in a fresh process, so only
+    the PDF that actually crashes is reported and the rest of the batch carries on.
+    """
+    options = (timeout, cache, refresh, all_pages, with_metrics, tuner, table_engine)
+    suspects = yield from _run_pool(paths, workers or default_workers(), *options)
+    for path in suspects:
+        if (yield from _run_pool([path], 1, *options)):
+            yield {"file": path, "success": False, "error": "Worker process crashed"}
+
+
+def run_batch(sources: Iterable[str], output: IO[str], workers: Optional[int] = None,
+              timeout: Optional[float] = None, cache: Optional[ScheduleCache] = None,
+              refresh: bool = False, all_pages: bool = False, metrics: Optional[str] = None,
+              indexes: Optional[str] = None, conflicts: Optional[str] = None,
+              tuner: Optional[TableTuner] = None, table_engine: str = "pdfplumber",
+              names: Optional[str] = None, roster: Optional[str] = None) -> Dict[str, int]:
+    """
+    Streams one NDJSON line per file to output. With metrics (a path, or '-' for
+    stderr) every line carries the file's own metrics and the batch totals are
+    emitted at the end. With indexes, the per-schedule indexes of the whole batch
+    are merged (see IndexAggregator) and written to that path; with conflicts, the
+    professor and room clashes across all files (see ConflictDetector) are; with
+    names, the professor and course spellings clustered into entities (see
+    NameNormalizer), seeded from the roster JSON when given. A tuner
+    (see TableTuner) is copied to every worker; give it a directory so the workers
+    share the profiles they tune; table_engine is set on every worker's extractor.
+    """
+    paths = collect_inputs(sources)
+    summary = {"total": len(paths), "succeeded": 0, "failed": 0, "cached": 0}
+    totals = ExtractionMetrics()
+    aggregator = IndexAggregator() if indexes else None
+    detector = None
+    if conflicts:
+        from schedule_conflicts import ConflictDetector
+
+        detector = ConflictDetector()
+    normalizer = None
+    if names:
+        from schedule_names import NameNormalizer, load_roster
+
+        normalizer = NameNormalizer(load_roster(roster) if roster else None)
+    for result in iter_batch(paths, workers, timeout, cache, refresh, all_pages, bool(metrics), tuner,
+                             table_engine):
+        summary["succeeded" if result["success"] else "failed"] += 1
+        summary["cached"] += bool(result.get("cached"))
+        if "metrics" in result:
+            totals.merge(result["metrics"])
+        for source, schedule in iter_result_schedules(result):
+            if aggregator is not None:
+                aggregator.add(source, schedule)
+            if detector is not None:
+                detector.add(source, schedule)
+            if normalizer is not None:
+                normalizer.add(source, schedule)
+        write_json(result, output, depth=5)
+        output.write("\n")
+        output.flush()
+    print(json.dumps(summary), file=sys.stderr)
+    if metrics:
+        totals.emit(metrics)
+    if aggregator is not None:
+        with open(indexes, "w", encoding="utf-8") as index_file:
+            write_json(aggregator.as_dict(), index_file, depth=2)
+    if detector is not None:
+        report = detector.detect()
+        with open(conflicts, "w", encoding="utf-8") as conflict_file:
+            write_json(report, conflict_file, depth=2)
+        print(json.dumps(report["summary"]), file=sys.stderr)
+    if normalizer is not None:
+        report = normalizer.normalize()
+        with open(names, "w", encoding="utf-8") as names_file:
+            write_json(report, names_file, depth=2)
+        print(json.dumps(report["summary"]), file=sys.stderr)
+    return summary
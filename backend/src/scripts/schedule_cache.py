@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from schedule_input import PdfSource, open_input
+from schedule_records import write_json
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_DIR_ENV = "SCHEDULE_CACHE_DIR"
+# Eviction trims the cache to this share of max_bytes, so the next walk is many writes away
+EVICT_TO = 0.9
+
+
+def file_digest(source: PdfSource) -> str:
+    with open_input(source) as pdf_input:
+        return pdf_input.digest()
+
+
+class ScheduleCache:
+    """
+    On-disk extraction cache keyed by the SHA-256 of the PDF bytes, the extractor
+    version and the table settings. One JSON file per entry; the file mtime doubles
+    as the LRU clock, so several processes can share a directory without an index.
+    Each process keeps a running size estimate (one directory walk, then its own
+    writes) and only walks the tree again to evict once that goes over max_bytes;
+    eviction then trims to EVICT_TO of the limit.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> Optional["ScheduleCache"]:
+        directory = directory or os.environ.get(CACHE_DIR_ENV)
+        return cls(directory, max_bytes) if directory else None
+
+    def key_for(self, source: PdfSource, version: str, settings: Dict[str, Any]) -> str:
+        params = json.dumps({"version": version, "settings": settings}, sort_keys=True)
+        return hashlib.sha256(f"{file_digest(source)}:{params}".encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entry(key)
+        try:
+            result = json.loads(entry.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+                write_json(result, tmp)
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = entry.stat().st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, entry)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        if self._size is not None:
+            self._size += size - replaced
+        if self._size is None or self._size > self.max_bytes:
+            self.evict()
+
+    def _scan(self) -> Tuple[List[Tuple[float, int, str]], int]:
+        entries = []
+        total = 0
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for item in os.scandir(bucket.path):
+                if not item.name.endswith(".json"):
+                    continue
+                stat = item.stat()
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+                total += stat.st_size
+        return entries, total
+
+    def evict(self):
+        entries, total = self._scan()
+        self._size = total
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        target = int(self.max_bytes * EVICT_TO)
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= target:
+                break
+        self._size = total
+
+    def fetch(self, source: PdfSource, version: str, settings: Dict[str, Any],
+              compute: Callable[[], Dict[str, Any]], refresh: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """Returns (result, hit). With refresh the entry is recomputed and overwritten."""
+        key = self.key_for(source, version, settings)
+        if not refresh:
+            cached = self.get(key)
+            if cached is not None:
+                return cached, True
+        result = compute()
+        self.put(key, result)
+        return result, False
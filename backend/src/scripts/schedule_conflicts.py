@@ -0,0 +1,150 @@
+import argparse
+import json
+import sys
+from array import array
+from typing import Any, Dict, List, Tuple
+
+NUMPY_MISSING = "NumPy is required for conflict detection: pip install numpy"
+
+try:
+    import numpy as np
+except ImportError as e:
+    # Only this module's own CLI exits; importers (--batch --conflicts) get the ImportError
+    if __name__ == "__main__":
+        sys.exit(NUMPY_MISSING)
+    raise ImportError(NUMPY_MISSING) from e
+
+from schedule_index import iter_schedule_files, section_label
+from schedule_records import write_json
+
+
+def _intern(table: Dict[Any, int], value: Any) -> int:
+    return table.setdefault(value, len(table))
+
+
+class ConflictDetector:
+    """
+    Collects the sessions of many schedules as integer columns and finds clashes
+    across all of them at once:
+
+    - professor conflicts: one professor in two different rooms in the same slot
+    - room conflicts: one room holding two different (course, professor) bookings in
+      the same slot, whether within a section or across sections
+
+    detect() builds resource x day x slot occupancy matrices with NumPy from the
+    distinct bookings (kept in self.occupancy afterwards), so the cost is a few array
+    passes however many schedules are added. Sessions without a professor or room
+    are left out of the checks that need them.
+    """
+
+    def __init__(self):
+        self.days: Dict[str, int] = {}
+        self.time_slots: Dict[str, int] = {}
+        self.professors: Dict[str, int] = {}
+        self.rooms: Dict[str, int] = {}
+        self.bookings: Dict[Tuple[str, str], int] = {}
+        self.details: Dict[Tuple[Any, ...], int] = {}
+        self.schedules = 0
+        self.occupancy: Dict[str, "np.ndarray"] = {}
+        self.columns = {name: array("i") for name in ("day", "slot", "professor", "room", "booking", "detail")}
+
+    def add(self, source: str, schedule: Dict[str, Any]):
+        self.schedules += 1
+        label = section_label(schedule, source)
+        columns = self.columns
+        for day, slots in schedule.get("weekly_schedule", {}).items():
+            day_id = _intern(self.days, day)
+            for slot in slots:
+                slot_id = _intern(self.time_slots, slot["time"])
+                for session in slot["sessions"]:
+                    if not isinstance(session, dict):
+                        session = session.as_dict()
+                    professor, room, course = session["professor"], session["room"], session["course"]
+                    columns["day"].append(day_id)
+                    columns["slot"].append(slot_id)
+                    columns["professor"].append(_intern(self.professors, professor) if professor else -1)
+                    columns["room"].append(_intern(self.rooms, room) if room else -1)
+                    columns["booking"].append(_intern(self.bookings, (course, professor)))
+                    columns["detail"].append(_intern(self.details, (label, source, session["group"], course,
+                                                                    professor, room)))
+
+    def _arrays(self) -> Dict[str, "np.ndarray"]:
+        return {name: np.frombuffer(column, dtype=np.int32).astype(np.int64)
+                for name, column in self.columns.items()}
+
+    def _find(self, arrays: Dict[str, "np.ndarray"], resource_column: str, other_column: str, others: int,
+              names: List[str], resource_field: str, booking_fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        """
+        Counts, for every (resource, day, slot), the distinct values of other_column
+        booked there and reports the cells where that count is two or more. The count
+        matrix is kept in self.occupancy[resource_field] as resources x days x slots.
+        """
+        days, slots = list(self.days), list(self.time_slots)
+        cells = max(1, len(days) * len(slots))
+        rows = np.flatnonzero((arrays[resource_column] >= 0) & (arrays[other_column] >= 0))
+        slot_keys = arrays[resource_column][rows] * cells + arrays["day"][rows] * len(slots) + arrays["slot"][rows]
+
+        distinct = np.unique(slot_keys * others + arrays[other_column][rows]) // others
+        occupancy = np.bincount(distinct, minlength=len(names) * cells)
+        self.occupancy[resource_field] = occupancy.reshape(len(names), len(days), len(slots))
+        hit = np.isin(slot_keys, np.flatnonzero(occupancy >= 2))
+
+        details = list(self.details)
+        conflicts: Dict[int, Dict[str, Any]] = {}
+        for key, row in zip(slot_keys[hit].tolist(), rows[hit].tolist()):
+            entry = conflicts.get(key)
+            if entry is None:
+                name_index, cell_index = divmod(key, cells)
+                day_index, slot_index = divmod(cell_index, len(slots))
+                entry = conflicts[key] = {resource_field: names[name_index], "day": days[day_index],
+                                          "time": slots[slot_index], "bookings": {}}
+            label, source, group, course, professor, room = details[arrays["detail"][row]]
+            booking = {"section": label, "source": source, "group": group, "course": course,
+                       "professor": professor, "room": room}
+            entry["bookings"].setdefault(tuple(booking[field] for field in ("source", "group", *booking_fields)), {
+                field: booking[field] for field in ("section", "source", "group", *booking_fields)
+            })
+        return [{**entry, "bookings": list(entry["bookings"].values())} for entry in conflicts.values()]
+
+    def detect(self) -> Dict[str, Any]:
+        arrays = self._arrays()
+        professor_conflicts = self._find(arrays, "professor", "room", max(1, len(self.rooms)),
+                                         list(self.professors), "professor", ("room", "course"))
+        room_conflicts = self._find(arrays, "room", "booking", max(1, len(self.bookings)),
+                                    list(self.rooms), "room", ("course", "professor"))
+        return {
+            "summary": {
+                "schedules": self.schedules,
+                "sessions": len(self.columns["day"]),
+                "professor_conflicts": len(professor_conflicts),
+                "room_conflicts": len(room_conflicts)
+            },
+            "professor_conflicts": professor_conflicts,
+            "room_conflicts": room_conflicts
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find professor and room clashes across extracted schedules')
+    parser.add_argument('inputs', nargs='+', help='Extractor output files (JSON, --all-pages or --batch NDJSON)')
+    parser.add_argument('-o', '--output', help='Write the conflict report here instead of stdout')
+    args = parser.parse_args()
+
+    detector = ConflictDetector()
+    for source, schedule in iter_schedule_files(args.inputs):
+        detector.add(source, schedule)
+    report = detector.detect()
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        write_json(report, output, depth=2)
+        output.write("\n")
+    finally:
+        if args.output:
+            output.close()
+    print(json.dumps(report["summary"]), file=sys.stderr)
+    sys.exit(1 if report["professor_conflicts"] or report["room_conflicts"] else 0)
+
+
+if __name__ == "__main__":
+    main()
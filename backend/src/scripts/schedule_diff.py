@@ -0,0 +1,78 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from pdf_schedule_extractor import HEADER_FIELDS
+from schedule_records import Session
+
+# Sessions with the same day, time, group and course are the same session; any other
+# field that differs between versions makes it a change rather than a remove + add.
+IDENTITY_FIELDS = ("group", "course")
+
+SlotKey = Tuple[str, str]
+
+
+def _as_dict(session: Any) -> Dict[str, Any]:
+    return session.as_dict() if isinstance(session, Session) else dict(session)
+
+
+def _slots(schedule: Dict[str, Any]) -> Dict[SlotKey, Tuple[List[Dict[str, Any]], List[str]]]:
+    # (day, time) -> (sessions, cell hashes); a day may list the same time more than once
+    slots: Dict[SlotKey, Tuple[List[Dict[str, Any]], List[str]]] = defaultdict(lambda: ([], []))
+    for day, day_slots in schedule.get("weekly_schedule", {}).items():
+        for slot in day_slots:
+            sessions, hashes = slots[(day, slot["time"])]
+            sessions.extend(_as_dict(session) for session in slot["sessions"])
+            hashes.append(slot.get("cell_hash"))
+    return slots
+
+
+def diff_schedules(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compact difference between two extractions of the same timetable: header fields
+    that changed ({field: [old, new]}) and the sessions added, removed or changed
+    (same day, time, group and course but another room, type or professor). Slots
+    whose cell hashes match are skipped without looking at their sessions.
+    """
+    header = {
+        key: [previous.get(key, ""), current.get(key, "")]
+        for key in HEADER_FIELDS
+        if previous.get(key, "") != current.get(key, "")
+    }
+    added: List[Dict[str, Any]] = []
+    removed: List[Dict[str, Any]] = []
+    changed: List[Dict[str, Any]] = []
+    unchanged_slots = 0
+
+    old_slots, new_slots = _slots(previous), _slots(current)
+    for day, time in sorted(set(old_slots) | set(new_slots)):
+        old_sessions, old_hashes = old_slots.get((day, time), ([], []))
+        new_sessions, new_hashes = new_slots.get((day, time), ([], []))
+        if old_hashes and old_hashes == new_hashes and None not in old_hashes:
+            unchanged_slots += 1
+            continue
+
+        remaining = list(old_sessions)
+        unmatched = []
+        for session in new_sessions:
+            if session in remaining:
+                remaining.remove(session)
+            else:
+                unmatched.append(session)
+        for session in unmatched:
+            identity = tuple(session[field] for field in IDENTITY_FIELDS)
+            before = next((old for old in remaining
+                           if tuple(old[field] for field in IDENTITY_FIELDS) == identity), None)
+            if before is None:
+                added.append({"day": day, "time": time, **session})
+            else:
+                remaining.remove(before)
+                changed.append({"day": day, "time": time, "before": before, "after": session})
+        removed.extend({"day": day, "time": time, **session} for session in remaining)
+
+    return {
+        "header": header,
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged_slots": unchanged_slots
+    }
@@ -0,0 +1,390 @@
+import posixpath
+import re
+import zipfile
+from collections import deque
+from typing import Any, Deque, Dict, IO, Iterator, List, Optional, Tuple, TYPE_CHECKING
+from xml.etree import ElementTree
+
+from schedule_input import PdfInput
+
+if TYPE_CHECKING:
+    from pdf_schedule_extractor import TableParts, UniversalScheduleExtractor
+
+SPREADSHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+RELATIONSHIPS_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_RELATIONSHIPS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Lines of text kept before a timetable for its header fields. Older lines are
+# dropped as a long sheet or document streams past, so memory does not grow with it.
+MAX_HEADER_LINES = 200
+
+_CELL_REFERENCE_RE = re.compile(r"[A-Z]+")
+
+# Bytes of a package part handed to the XML parser at a time
+READ_SIZE = 64 * 1024
+
+# Documents are read as a stream of blocks: ("text", line) for a paragraph outside
+# tables, ("row", cells) for a table or sheet row, ("end", None) after a DOCX table
+# or an XLSX sheet and ("page", None) after an XLSX sheet or a whole DOCX document.
+Block = Tuple[str, Any]
+
+
+def document_kind(pdf_input: PdfInput) -> str:
+    """'xlsx' or 'docx' for an Office Open XML package; ValueError for anything else."""
+    with zipfile.ZipFile(pdf_input.stream()) as package:
+        names = set(package.namelist())
+    if "xl/workbook.xml" in names:
+        return "xlsx"
+    if "word/document.xml" in names:
+        return "docx"
+    raise ValueError(f"{pdf_input.name} is neither a PDF, an XLSX workbook nor a DOCX document")
+
+
+def _column_index(reference: str) -> int:
+    index = 0
+    for letter in _CELL_REFERENCE_RE.match(reference).group(0):
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+class _SharedStringsTarget:
+    """
+    XMLParser target yielding the text of every <si> as its block; phonetic hints
+    (<rPh>) are not text.
+    """
+
+    def __init__(self):
+        self.blocks: List[str] = []
+        self.parts: Optional[List[str]] = None
+        self.in_text = False
+        self.phonetic = False
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        if tag == f"{SPREADSHEET_NS}si":
+            self.parts = []
+        elif tag == f"{SPREADSHEET_NS}t":
+            self.in_text = not self.phonetic
+        elif tag == f"{SPREADSHEET_NS}rPh":
+            self.phonetic = True
+
+    def data(self, text: str):
+        if self.in_text:
+            self.parts.append(text)
+
+    def end(self, tag: str):
+        if tag == f"{SPREADSHEET_NS}si":
+            self.blocks.append("".join(self.parts))
+        elif tag == f"{SPREADSHEET_NS}t":
+            self.in_text = False
+        elif tag == f"{SPREADSHEET_NS}rPh":
+            self.phonetic = False
+
+    def close(self):
+        pass
+
+
+class _SheetTarget:
+    """
+    XMLParser target turning <row> elements into ("row", cells) blocks. Only the
+    cached value (<v>) or inline string (<t>) of a cell is text; formulas and
+    phonetic hints (<rPh>) are skipped.
+    """
+
+    def __init__(self, shared_strings: List[str]):
+        self.shared_strings = shared_strings
+        self.blocks: List[Block] = []
+        self.row: List[str] = []
+        self.column = 0
+        self.kind: Optional[str] = None
+        self.parts: List[str] = []
+        self.in_text = False
+        self.phonetic = False
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        if tag == f"{SPREADSHEET_NS}c":
+            reference = attrib.get("r")
+            self.column = _column_index(reference) if reference else len(self.row)
+            self.kind = attrib.get("t")
+            self.parts = []
+        elif tag in (f"{SPREADSHEET_NS}v", f"{SPREADSHEET_NS}t"):
+            self.in_text = not self.phonetic
+        elif tag == f"{SPREADSHEET_NS}row":
+            self.row = []
+        elif tag == f"{SPREADSHEET_NS}rPh":
+            self.phonetic = True
+
+    def data(self, text: str):
+        if self.in_text:
+            self.parts.append(text)
+
+    def end(self, tag: str):
+        if tag in (f"{SPREADSHEET_NS}v", f"{SPREADSHEET_NS}t"):
+            self.in_text = False
+        elif tag == f"{SPREADSHEET_NS}c":
+            self.row.extend([""] * (self.column - len(self.row)))
+            self.row.append(self._value("".join(self.parts)))
+        elif tag == f"{SPREADSHEET_NS}row":
+            self.blocks.append(("row", self.row))
+        elif tag == f"{SPREADSHEET_NS}rPh":
+            self.phonetic = False
+
+    def _value(self, text: str) -> str:
+        if self.kind == "s":
+            return self.shared_strings[int(text)] if text.strip() else ""
+        if self.kind == "b":
+            return "TRUE" if text == "1" else "FALSE"
+        if self.kind == "e":
+            return ""
+        return text
+
+    def close(self):
+        pass
+
+
+class _DocumentTarget:
+    """
+    XMLParser target for word/document.xml. Body paragraphs become ("text", line)
+    blocks and rows of top-level tables ("row", cells) blocks, a cell holding its
+    paragraphs joined by newlines. A cell spanning several grid columns (gridSpan)
+    is padded with empty cells so columns stay aligned with the header row; nested
+    tables are flattened into the cell that holds them.
+    """
+
+    def __init__(self):
+        self.blocks: List[Block] = []
+        self.depth = 0
+        self.paragraphs: List[List[str]] = []
+        self.in_text = False
+        self.row: List[str] = []
+        self.cell: List[str] = []
+        self.span = 1
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        if tag == f"{WORD_NS}t":
+            self.in_text = True
+        elif tag == f"{WORD_NS}p":
+            self.paragraphs.append([])
+        elif tag == f"{WORD_NS}tab" and self.paragraphs:
+            self.paragraphs[-1].append("\t")
+        elif tag in (f"{WORD_NS}br", f"{WORD_NS}cr") and self.paragraphs:
+            self.paragraphs[-1].append("\n")
+        elif tag == f"{WORD_NS}tbl":
+            self.depth += 1
+        elif self.depth == 1:
+            if tag == f"{WORD_NS}tr":
+                self.row = []
+            elif tag == f"{WORD_NS}tc":
+                self.cell = []
+                self.span = 1
+            elif tag == f"{WORD_NS}gridSpan":
+                self.span = int(attrib.get(f"{WORD_NS}val", "1"))
+
+    def data(self, text: str):
+        if self.in_text and self.paragraphs:
+            self.paragraphs[-1].append(text)
+
+    def end(self, tag: str):
+        if tag == f"{WORD_NS}t":
+            self.in_text = False
+        elif tag == f"{WORD_NS}p":
+            text = "".join(self.paragraphs.pop())
+            if self.depth == 0:
+                self.blocks.append(("text", text))
+            else:
+                self.cell.append(text)
+        elif tag == f"{WORD_NS}tbl":
+            self.depth -= 1
+            if self.depth == 0:
+                self.blocks.append(("end", None))
+        elif self.depth == 1:
+            if tag == f"{WORD_NS}tc":
+                self.row.append("\n".join(self.cell).strip())
+                self.row.extend([""] * (self.span - 1))
+            elif tag == f"{WORD_NS}tr":
+                self.blocks.append(("row", self.row))
+
+    def close(self):
+        pass
+
+
+def _feed(part: IO[bytes], target) -> Iterator[Any]:
+    """
+    Feeds a package part through expat in READ_SIZE chunks and yields the blocks the
+    target collected from each chunk. No element tree is built, so memory stays
+    flat however long the part is.
+    """
+    parser = ElementTree.XMLParser(target=target)
+    while True:
+        chunk = part.read(READ_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        yield from target.blocks
+        target.blocks.clear()
+    parser.close()
+    yield from target.blocks
+
+
+def _sheet_parts(package: zipfile.ZipFile) -> List[str]:
+    """Worksheet part names in workbook order."""
+    targets = {}
+    with package.open("xl/_rels/workbook.xml.rels") as part:
+        for relationship in ElementTree.parse(part).getroot().iter(f"{PACKAGE_RELATIONSHIPS_NS}Relationship"):
+            target = relationship.get("Target")
+            targets[relationship.get("Id")] = (target.lstrip("/") if target.startswith("/")
+                                               else posixpath.normpath(posixpath.join("xl", target)))
+    with package.open("xl/workbook.xml") as part:
+        sheets = ElementTree.parse(part).getroot().iter(f"{SPREADSHEET_NS}sheet")
+        return [targets[sheet.get(f"{RELATIONSHIPS_NS}id")] for sheet in sheets]
+
+
+def iter_xlsx_blocks(stream: IO[bytes]) -> Iterator[Block]:
+    """
+    Streams every sheet of a workbook row by row, the way a read-only workbook
+    does: rows are lists of cell strings indexed by column (gaps are empty
+    strings) and only the shared strings table is held in memory, since cells
+    refer to it by index. It grows with the distinct strings, not with the rows.
+    """
+    with zipfile.ZipFile(stream) as package:
+        shared_strings: List[str] = []
+        if "xl/sharedStrings.xml" in package.namelist():
+            with package.open("xl/sharedStrings.xml") as part:
+                shared_strings = list(_feed(part, _SharedStringsTarget()))
+        for part_name in _sheet_parts(package):
+            with package.open(part_name) as part:
+                yield from _feed(part, _SheetTarget(shared_strings))
+            yield "end", None
+            yield "page", None
+
+
+def iter_docx_blocks(stream: IO[bytes]) -> Iterator[Block]:
+    """Streams the paragraphs and table rows of a document (see _DocumentTarget)."""
+    with zipfile.ZipFile(stream) as package, package.open("word/document.xml") as part:
+        yield from _feed(part, _DocumentTarget())
+
+
+class _TimetableReader:
+    """
+    Turns blocks into timetables shaped like the ones read from PDF pages.
+
+    - A row with two or more time_slot_regex labels starts a timetable. Each label
+      owns its column and every column up to the next label, where merged header
+      cells leave gaps. The column before the first label holds the day.
+    - A row without a day label continues the day above it (a merged day cell).
+    - A timetable ends at a row whose day column holds anything else, at an "end"
+      block, or at the next header row.
+    - Text and rows outside timetables are kept as the header text of the next one.
+    """
+
+    def __init__(self, extractor: "UniversalScheduleExtractor"):
+        self.extractor = extractor
+        self.header_lines: Deque[str] = deque(maxlen=MAX_HEADER_LINES)
+        self.columns: Optional[List[Tuple[int, str]]] = None
+        self.day_column = 0
+        self.grid: List[List[str]] = []
+
+    def _slot_columns(self, row: List[str]) -> Optional[List[Tuple[int, str]]]:
+        columns = []
+        for index, value in enumerate(row):
+            match = re.fullmatch(self.extractor.time_slot_regex, "".join(value.split()))
+            if match:
+                columns.append((index, f"{match.group(1)}-{match.group(2)}"))
+        return columns if len(columns) >= 2 else None
+
+    def _is_day(self, value: str) -> bool:
+        value = value.lower()
+        return any(value.startswith(abbr) for abbr in self.extractor.day_mapping)
+
+    def _slot_cells(self, row: List[str]) -> List[str]:
+        bounds = [index for index, _ in self.columns] + [max(len(row), self.columns[-1][0] + 1)]
+        return ["\n".join(value.strip() for value in row[start:stop] if value.strip())
+                for start, stop in zip(bounds, bounds[1:])]
+
+    def _add_header_line(self, row: List[str]):
+        line = "   ".join(value.strip() for value in row if value.strip())
+        if line:
+            self.header_lines.append(line)
+
+    def finish(self) -> Iterator["TableParts"]:
+        if self.columns is None:
+            return
+        yield "\n".join(self.header_lines), [label for _, label in self.columns], self.grid
+        self.header_lines.clear()
+        self.columns = None
+        self.grid = []
+
+    def feed(self, kind: str, value: Any) -> Iterator["TableParts"]:
+        if kind == "end":
+            yield from self.finish()
+        elif kind == "page":
+            self.header_lines.clear()
+        elif kind == "text":
+            yield from self.finish()
+            if value.strip():
+                self.header_lines.append(value)
+        elif self.columns is None or self._slot_columns(value) is not None:
+            columns = self._slot_columns(value)
+            if columns is None:
+                self._add_header_line(value)
+                return
+            yield from self.finish()
+            self.columns = columns
+            self.day_column = max(0, columns[0][0] - 1)
+        else:
+            day = value[self.day_column].strip() if self.day_column < len(value) else ""
+            cells = self._slot_cells(value)
+            if self._is_day(day):
+                self.grid.append([day] + cells)
+            elif not day:
+                if self.grid:
+                    previous = self.grid[-1]
+                    previous[1:] = ["\n".join(filter(None, pair)) for pair in zip(previous[1:], cells)]
+            else:
+                yield from self.finish()
+                self._add_header_line(value)
+
+
+def _iter_blocks(extractor: "UniversalScheduleExtractor", pdf_input: PdfInput) -> Iterator[Block]:
+    kind = document_kind(pdf_input)
+    extractor.metrics.count(f"documents.{kind}")
+    if kind == "xlsx":
+        yield from iter_xlsx_blocks(pdf_input.stream())
+    else:
+        yield from iter_docx_blocks(pdf_input.stream())
+        # The whole document is one page
+        yield "page", None
+
+
+def iter_document_parts(extractor: "UniversalScheduleExtractor",
+                        pdf_input: PdfInput) -> Iterator[Tuple[int, List["TableParts"]]]:
+    """
+    Yields (page number, [(header text, time slots, slot grid) per timetable]) for
+    a document. Every XLSX sheet is one page, and a DOCX document is page 1. The
+    tuples have the same shape _iter_page_parts yields for PDF pages, so
+    _build_schedule and everything after it work the same for every format.
+    """
+    reader = _TimetableReader(extractor)
+    page, parts = 1, []
+    for kind, value in _iter_blocks(extractor, pdf_input):
+        if kind == "page":
+            parts.extend(reader.finish())
+            extractor.metrics.count("pages")
+            extractor.metrics.count("tables", len(parts))
+            yield page, parts
+            page, parts = page + 1, []
+        parts.extend(reader.feed(kind, value))
+
+
+def first_document_parts(extractor: "UniversalScheduleExtractor", pdf_input: PdfInput) -> "TableParts":
+    """
+    The first timetable of a document, read only as far as its end. Without one,
+    the document's text comes back with the default slots and an empty grid, like
+    a PDF page without a table.
+    """
+    reader = _TimetableReader(extractor)
+    for kind, value in _iter_blocks(extractor, pdf_input):
+        for parts in (reader.finish() if kind == "page" else reader.feed(kind, value)):
+            extractor.metrics.count("tables")
+            return parts
+    return "\n".join(reader.header_lines), extractor.time_slots_header, []
@@ -0,0 +1,97 @@
+import abc
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from schedule_input import PdfSource, open_input, pdf_library
+
+if TYPE_CHECKING:
+    from pdf_schedule_extractor import UniversalScheduleExtractor
+
+# Cheapest first; UniversalScheduleExtractor.extract_text_from_pdf only moves up a
+# rung when the text it got is missing header fields or timetable rows.
+DEFAULT_LADDER = ("plain", "layout", "table")
+
+
+class TextEngine(abc.ABC):
+    """
+    One way of turning a PDF into text. Subclasses set a unique name and implement
+    extract(); register_engine() makes them available to extraction ladders.
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def extract(self, extractor: "UniversalScheduleExtractor", source: PdfSource,
+                page_workers: Optional[int] = None) -> str:
+        pass
+
+
+class PlainTextEngine(TextEngine):
+    """PyPDF2 content-stream text: no character geometry, roughly 10x cheaper than pdfplumber."""
+
+    name = "plain"
+
+    def extract(self, extractor, source, page_workers=None):
+        with open_input(source) as pdf_input:
+            texts = (page.extract_text() for page in pdf_library("PyPDF2").PdfReader(pdf_input.stream()).pages)
+            return "".join(text + "\n" for text in texts if text)
+
+
+class LayoutTextEngine(TextEngine):
+    """pdfplumber layout text, which keeps the visual line order of every page."""
+
+    name = "layout"
+
+    def extract(self, extractor, source, page_workers=None):
+        if page_workers and page_workers > 1:
+            from schedule_pages import iter_page_results
+
+            pages = iter_page_results(extractor, source, "text", page_workers)
+        else:
+            pages = extractor._iter_page_texts(source)
+        return "".join(page_text + "\n" for _, page_text in pages if page_text)
+
+
+class TableTextEngine(TextEngine):
+    """
+    Layout text of everything outside the detected tables, followed by each table as
+    a "time slot | ..." line and one "day | cell | ..." line per row, built from the
+    extractor's slot grid, so rows survive even when layout text interleaves cells.
+    """
+
+    name = "table"
+
+    def extract(self, extractor, source, page_workers=None):
+        lines: List[str] = []
+        with open_input(source) as pdf_input, pdf_library("pdfplumber").open(pdf_input.stream()) as pdf:
+            for page in pdf.pages:
+                try:
+                    tables, settings = extractor._find_tables(page)
+                    outside = page
+                    for table in tables:
+                        outside = outside.outside_bbox(table.bbox)
+                    lines.append(outside.extract_text(layout=True) or "")
+                    for table in tables:
+                        time_slots, rows = extractor._extract_slot_grid(page, table, settings)
+                        lines.append(" | ".join(time_slots))
+                        lines.extend(" | ".join(" ".join(cell.split()) for cell in row) for row in rows)
+                finally:
+                    page.close()
+        return "".join(line + "\n" for line in lines if line)
+
+
+ENGINES: Dict[str, TextEngine] = {}
+
+
+def register_engine(engine: TextEngine):
+    ENGINES[engine.name] = engine
+
+
+def get_engine(name: str) -> TextEngine:
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown extraction engine: {name} (available: {', '.join(ENGINES)})")
+
+
+for _engine in (PlainTextEngine(), LayoutTextEngine(), TableTextEngine()):
+    register_engine(_engine)
@@ -0,0 +1,233 @@
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+try:
+    import numpy as np
+except ImportError as e:
+    # Imported only for --table-engine grid, whose CLI reports this on stderr
+    raise ImportError("NumPy is required for the word-grid table engine: pip install numpy") from e
+
+from schedule_input import pdf_library
+
+if TYPE_CHECKING:
+    from pdf_schedule_extractor import UniversalScheduleExtractor
+
+# A horizontal ruling shorter than this share of the table width (a split cell, an
+# underline) is not a row boundary
+MIN_ROW_RULING_SHARE = 0.5
+
+
+class WordGrid:
+    """
+    A timetable found by find_word_grids(). It stands in for a pdfplumber Table where
+    the extractor only needs the bbox, and carries the (time slots, rows) result of
+    _extract_slot_grid, already filled in.
+    """
+
+    __slots__ = ("bbox", "time_slots", "rows")
+
+    def __init__(self, bbox: Tuple[float, float, float, float], time_slots: List[str], rows: List[List[str]]):
+        self.bbox = bbox
+        self.time_slots = time_slots
+        self.rows = rows
+
+
+def _chain_starts(values: "np.ndarray", tolerance: float) -> "np.ndarray":
+    """
+    Marks where a new cluster begins in sorted values: pdfplumber's cluster_list,
+    where a value joins the cluster while it is within tolerance of the previous one.
+    """
+    starts = np.ones(len(values), dtype=bool)
+    starts[1:] = np.diff(values) > tolerance
+    return starts
+
+
+def _rulings(edges: List[Dict[str, Any]], orientation: str, settings) -> "np.ndarray":
+    """
+    Ruling segments of one orientation as rows of (position, start, end), merged the
+    way the lines strategy does: positions within snap tolerance move to their mean,
+    collinear segments with gaps up to the join tolerance become one, and segments
+    shorter than edge_min_length are dropped.
+    """
+    if orientation == "h":
+        keys, snap, join = ("top", "x0", "x1"), settings.snap_y_tolerance, settings.join_x_tolerance
+    else:
+        keys, snap, join = ("x0", "top", "bottom"), settings.snap_x_tolerance, settings.join_y_tolerance
+    segments = np.array([[edge[key] for key in keys] for edge in edges if edge["orientation"] == orientation],
+                        dtype=float).reshape(-1, 3)
+    segments = segments[segments[:, 2] - segments[:, 1] >= settings.edge_min_length_prefilter]
+    if not len(segments):
+        return segments
+
+    segments = segments[np.argsort(segments[:, 0], kind="stable")]
+    cluster = np.cumsum(_chain_starts(segments[:, 0], snap)) - 1
+    segments[:, 0] = (np.bincount(cluster, weights=segments[:, 0]) / np.bincount(cluster))[cluster]
+
+    # Join within each snapped line: offsetting every line by more than the page size
+    # lets one running maximum of the segment ends cover all lines at once
+    order = np.lexsort((segments[:, 1], cluster))
+    segments, cluster = segments[order], cluster[order]
+    offset = cluster * (np.abs(segments[:, 1:]).max() * 2 + join + 1)
+    reach = np.maximum.accumulate(segments[:, 2] + offset)
+    starts = np.ones(len(segments), dtype=bool)
+    starts[1:] = (segments[1:, 1] + offset[1:] > reach[:-1] + join) | (cluster[1:] != cluster[:-1])
+    result = np.column_stack([
+        segments[starts, 0],
+        np.minimum.reduceat(segments[:, 1], np.flatnonzero(starts)),
+        np.maximum.reduceat(segments[:, 2], np.flatnonzero(starts)),
+    ])
+    return result[result[:, 2] - result[:, 1] >= settings.edge_min_length]
+
+
+def _table_frames(horizontal: "np.ndarray", vertical: "np.ndarray",
+                  tolerance: float) -> List[Tuple["np.ndarray", "np.ndarray"]]:
+    """
+    (row boundaries, column rulings) of every table on the page, top to bottom. A
+    table is a run of horizontal rulings where at least two vertical rulings cross
+    each gap between neighbours; a page of stacked timetables gives one run each.
+    """
+    if len(horizontal) < 3 or len(vertical) < 2:
+        return []
+    ys = np.unique(horizontal[:, 0])
+    spans = ((vertical[:, 1:2] <= ys[None, :-1] + tolerance)
+             & (vertical[:, 2:3] >= ys[None, 1:] - tolerance))
+    covered = spans.sum(axis=0) >= 2
+
+    frames = []
+    gap = 0
+    while gap < len(covered):
+        if not covered[gap]:
+            gap += 1
+            continue
+        end = gap
+        while end < len(covered) and covered[end]:
+            end += 1
+        columns = np.unique(vertical[spans[:, gap:end].any(axis=1), 0])
+        x0, x1 = columns[0], columns[-1]
+        lines = horizontal[(horizontal[:, 0] >= ys[gap]) & (horizontal[:, 0] <= ys[end])]
+        overlap = np.minimum(lines[:, 2], x1 + tolerance) - np.maximum(lines[:, 1], x0 - tolerance)
+        rows = np.unique(lines[overlap >= (x1 - x0) * MIN_ROW_RULING_SHARE, 0])
+        if len(rows) >= 3:
+            frames.append((rows, columns))
+        gap = end
+    return frames
+
+
+def _cell_texts(cells: "np.ndarray", chars: List[Dict[str, Any]], index: "np.ndarray", top: "np.ndarray",
+                x0: "np.ndarray", x1: "np.ndarray", cell_count: int, x_tolerance: float,
+                y_tolerance: float) -> List[str]:
+    """
+    pdfplumber's extract_text(chars).strip() for every cell at once, for upright
+    left-to-right text. Characters are clustered into lines on their top (in a
+    chain, like cluster_list) and read by x0; a word ends at a blank character, a
+    gap over x_tolerance or a top shift over y_tolerance. Words are then clustered
+    into lines again on their top and joined with spaces and newlines.
+    """
+    texts = [""] * cell_count
+    if not len(cells):
+        return texts
+    expansions = pdf_library("pdfplumber.utils.text").LIGATURES
+
+    order = np.lexsort((top, cells))
+    new_line = _chain_starts(top[order], y_tolerance)
+    new_line[1:] |= cells[order][1:] != cells[order][:-1]
+    line = np.empty(len(order), dtype=np.int64)
+    line[order] = np.cumsum(new_line) - 1
+
+    order = np.lexsort((index, x0, line))
+    line, top, x0, x1, cells, index = line[order], top[order], x0[order], x1[order], cells[order], index[order]
+    blank = np.fromiter((chars[i]["text"].isspace() for i in index), dtype=bool, count=len(index))
+    breaks = np.ones(len(order), dtype=bool)
+    breaks[1:] = ((line[1:] != line[:-1]) | blank[:-1] | (x0[1:] < x0[:-1])
+                  | (x0[1:] > x1[:-1] + x_tolerance) | (np.abs(top[1:] - top[:-1]) > y_tolerance))
+    kept = ~blank
+    if not kept.any():
+        return texts
+    breaks, top, cells, index = breaks[kept], top[kept], cells[kept], index[kept]
+
+    starts = np.flatnonzero(breaks)
+    word_cell = cells[starts]
+    word_top = np.minimum.reduceat(top, starts)
+    bounds = np.append(starts, len(index)).tolist()
+    letters = [expansions.get(chars[i]["text"], chars[i]["text"]) for i in index.tolist()]
+    words = ["".join(letters[a:b]) for a, b in zip(bounds, bounds[1:])]
+
+    word_order = np.lexsort((word_top, word_cell))
+    new_line = _chain_starts(word_top[word_order], y_tolerance)
+    new_line[1:] |= word_cell[word_order][1:] != word_cell[word_order][:-1]
+    word_line = np.empty(len(words), dtype=np.int64)
+    word_line[word_order] = np.cumsum(new_line) - 1
+
+    lines: Dict[int, List[str]] = {}
+    line_cell: Dict[int, int] = {}
+    for position in np.lexsort((np.arange(len(words)), word_line)).tolist():
+        key = int(word_line[position])
+        lines.setdefault(key, []).append(words[position])
+        line_cell[key] = int(word_cell[position])
+    cell_lines: Dict[int, List[str]] = {}
+    for key in sorted(lines):
+        cell_lines.setdefault(line_cell[key], []).append(" ".join(lines[key]))
+    for cell, cell_text in cell_lines.items():
+        texts[cell] = "\n".join(cell_text).strip()
+    return texts
+
+
+def find_word_grids(extractor: "UniversalScheduleExtractor", page,
+                    settings: Dict[str, Any]) -> Optional[List[WordGrid]]:
+    """
+    The page's timetables without pdfplumber's table finder. The ruling lines and
+    characters are read once into NumPy arrays; row boundaries come from the
+    horizontal rulings and slot columns from the header labels, and every character
+    is bucketed into its (day row, slot column) cell with searchsorted. Cell text is
+    rebuilt from those buckets in one pass, so spurious rulings never split a cell.
+
+    Returns None when the page has no ruled table or a table has no readable slot
+    labels; the caller then falls back to find_tables and the legacy column map.
+    """
+    resolved = pdf_library("pdfplumber.table").TableSettings.resolve(settings)
+    text_settings = extractor._text_settings(settings)
+    x_tolerance = text_settings.get("x_tolerance", 3)
+    y_tolerance = text_settings.get("y_tolerance", 3)
+
+    frames = _table_frames(_rulings(page.edges, "h", resolved), _rulings(page.edges, "v", resolved),
+                           max(resolved.intersection_x_tolerance, resolved.intersection_y_tolerance))
+    if not frames:
+        return None
+
+    chars = page.chars
+    boxes = np.array([(char["x0"], char["x1"], char["top"], char["bottom"]) for char in chars],
+                     dtype=float).reshape(-1, 4)
+    mid_x = (boxes[:, 0] + boxes[:, 1]) / 2
+    mid_y = (boxes[:, 2] + boxes[:, 3]) / 2
+    upright = np.fromiter((char["upright"] for char in chars), dtype=bool, count=len(chars))
+
+    grids = []
+    for rows, columns in frames:
+        bbox = (float(columns[0]), float(rows[0]), float(columns[-1]), float(rows[-1]))
+        located = extractor._locate_slot_edges(page, (bbox[0], bbox[1], bbox[2], float(rows[1])), bbox,
+                                               columns.tolist(), text_settings)
+        if located is None:
+            return None
+        time_slots, edges = located
+
+        # Body rows only: the header row (index 0) is left out like table.rows[1:]
+        row = np.searchsorted(rows, mid_y, side="right") - 1
+        column = np.searchsorted(edges, mid_x, side="right")
+        inside = (row >= 1) & (row < len(rows) - 1) & (mid_x >= bbox[0]) & (mid_x < edges[-1])
+        index = np.flatnonzero(inside)
+        width = len(edges)
+        cells = (row[index] - 1) * width + column[index]
+        cell_count = (len(rows) - 2) * width
+
+        texts = _cell_texts(cells[upright[index]], chars, index[upright[index]], boxes[index, 2][upright[index]],
+                            boxes[index, 0][upright[index]], boxes[index, 1][upright[index]], cell_count,
+                            x_tolerance, y_tolerance)
+        if not upright[index].all():
+            # Rotated text is rare enough to leave to pdfplumber, one cell at a time
+            extract_text = pdf_library("pdfplumber.utils").extract_text
+            for cell in np.unique(cells[~upright[index]]).tolist():
+                texts[cell] = extract_text([chars[i] for i in index[cells == cell].tolist()], **text_settings).strip()
+
+        extractor.metrics.count("grid.tables")
+        grids.append(WordGrid(bbox, time_slots, [texts[start:start + width]
+                                                 for start in range(0, cell_count, width)]))
+    return grids
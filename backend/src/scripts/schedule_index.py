@@ -0,0 +1,94 @@
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+def section_label(schedule: Dict[str, Any], default: str = "") -> str:
+    label = f"{schedule.get('schedules_of', '')} {schedule.get('section', '')}".strip()
+    return label or default
+
+
+def iter_result_schedules(result: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(source, schedule) pairs of one batch/worker result; --all-pages data holds several schedules."""
+    if not result.get("success"):
+        return
+    data = result["data"]
+    if isinstance(data, list):
+        for schedule in data:
+            yield f"{result['file']}#{schedule.get('page')}.{schedule.get('table')}", schedule
+    else:
+        yield result["file"], data
+
+
+def iter_schedule_files(paths: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    (source, schedule) pairs from extractor output files: single-schedule JSON,
+    --all-pages NDJSON, or --batch NDJSON (one result per file).
+    """
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            text = file.read()
+        try:
+            documents = [json.loads(text)]
+        except json.JSONDecodeError:
+            documents = [json.loads(line) for line in text.splitlines() if line.strip()]
+        for document in documents:
+            if "success" in document and "file" in document:
+                yield from iter_result_schedules(document)
+            elif "page" in document:
+                yield f"{path}#{document['page']}.{document.get('table', 0)}", document
+            else:
+                yield path, document
+
+
+class IndexAggregator:
+    """
+    Merges the "indexes" of many schedules into one: professor -> [[day, time, source]],
+    "<section> <group>" -> [[day, time, source]] and room -> one bitmap per day over
+    the union of all time slots seen, so availability questions across a whole batch
+    are answered without going back to the schedules.
+    """
+
+    def __init__(self):
+        self.days: Dict[str, int] = {}
+        self.time_slots: Dict[str, int] = {}
+        self.professors: Dict[str, List[List[str]]] = {}
+        self.groups: Dict[str, List[List[str]]] = {}
+        self.rooms: Dict[str, Dict[int, int]] = {}
+
+    def add(self, source: str, schedule: Dict[str, Any]):
+        indexes = schedule.get("indexes")
+        if not indexes:
+            return
+        for day in indexes["days"]:
+            self.days.setdefault(day, len(self.days))
+        # Bit i of this schedule's bitmaps is slot time_slots[i]; map it onto the merged axis
+        bit_map = [self.time_slots.setdefault(time_slot, len(self.time_slots))
+                   for time_slot in schedule.get("time_slots", [])]
+
+        for name, slots in indexes["professors"].items():
+            self.professors.setdefault(name, []).extend([day, time, source] for day, time in slots)
+        label = section_label(schedule, source)
+        for group, slots in indexes["groups"].items():
+            self.groups.setdefault(f"{label} {group}", []).extend([day, time, source] for day, time in slots)
+        for room, bitmaps in indexes["rooms"].items():
+            merged = self.rooms.setdefault(room, {})
+            for day, bitmap in zip(indexes["days"], bitmaps):
+                remapped = 0
+                for bit, target in enumerate(bit_map):
+                    if bitmap >> bit & 1:
+                        remapped |= 1 << target
+                if remapped:
+                    day_index = self.days[day]
+                    merged[day_index] = merged.get(day_index, 0) | remapped
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "days": list(self.days),
+            "time_slots": list(self.time_slots),
+            "professors": self.professors,
+            "rooms": {
+                room: [bitmaps.get(index, 0) for index in range(len(self.days))]
+                for room, bitmaps in self.rooms.items()
+            },
+            "groups": self.groups
+        }
@@ -0,0 +1,148 @@
+import contextlib
+import hashlib
+import importlib
+import io
+import mmap
+import sys
+from pathlib import Path
+from typing import BinaryIO, IO, Iterator, List, Optional, Union
+
+# XLSX and DOCX files are ZIP packages; PDFs start with %PDF
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+def pdf_library(name: str):
+    """
+    Imports a PDF library module (pdfplumber, pdfplumber.utils, PyPDF2, ...) on first
+    use. pdfminer and PyPDF2 take most of the interpreter's startup, and --help,
+    usage errors and cache hits never need them.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        print("Required libraries not found. Please install them:")
+        print(f"pip install {name.split('.')[0]}")
+        sys.exit(1)
+
+
+class _MappedStream(mmap.mmap):
+    # mmap has read/seek/tell but (before Python 3.13) no seekable(), which zipfile
+    # checks before reading an XLSX or DOCX package
+    def seekable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return True
+
+
+class PdfInput:
+    """
+    The bytes of one PDF, loaded once and shared by everything that needs them: the
+    cache key digest, pdfplumber and the PyPDF2 engines all read the same pages.
+    A file is memory-mapped rather than read, so pages the parser never touches are
+    never loaded and every stream() is another mapping of the same page cache;
+    in-memory uploads (bytes from the worker protocol) are used as they are. XLSX
+    and DOCX schedules travel the same way (see is_document and schedule_documents).
+    """
+
+    def __init__(self, data: Union[bytes, mmap.mmap], path: Optional[str] = None, name: Optional[str] = None,
+                 file: Optional[BinaryIO] = None):
+        self.data = data
+        self.path = path
+        self.name = name or path or "<memory>"
+        self._file = file
+        self._streams: List[mmap.mmap] = []
+        self._digest: Optional[str] = None
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path]) -> "PdfInput":
+        path = str(path)
+        file = open(path, "rb")
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files; let the parsers report the broken PDF
+            file.close()
+            return cls(b"", path)
+        except BaseException:
+            file.close()
+            raise
+        return cls(data, path, file=file)
+
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, bytearray, memoryview], name: Optional[str] = None) -> "PdfInput":
+        if isinstance(data, memoryview):
+            # Reuse the underlying bytes object when the view covers all of it
+            whole = isinstance(data.obj, bytes) and data.nbytes == len(data.obj)
+            data = data.obj if whole else data.tobytes()
+        elif isinstance(data, bytearray):
+            data = bytes(data)
+        return cls(data, name=name)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __str__(self) -> str:
+        return self.name
+
+    def stream(self) -> IO[bytes]:
+        """
+        A new file object at offset 0 with its own position, for parsers that keep
+        the stream open (pdfplumber reads pages lazily). Files get another read-only
+        mapping of the same pages; bytes get a BytesIO, which borrows the object
+        instead of copying it as long as nothing writes to it.
+        """
+        if self._file is None:
+            return io.BytesIO(self.data)
+        stream = _MappedStream(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._streams.append(stream)
+        return stream
+
+    def is_document(self) -> bool:
+        """True for an Office Open XML package (XLSX, DOCX) rather than a PDF."""
+        return self.data[:len(ZIP_MAGIC)] == ZIP_MAGIC
+
+    def digest(self) -> str:
+        """SHA-256 of the PDF bytes, hashed straight from the buffer and remembered."""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.data).hexdigest()
+        return self._digest
+
+    def close(self):
+        for stream in self._streams:
+            stream.close()
+        self._streams.clear()
+        if self._file is not None:
+            self.data.close()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "PdfInput":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+PdfSource = Union[str, Path, bytes, bytearray, memoryview, PdfInput]
+
+
+@contextlib.contextmanager
+def open_input(source: PdfSource) -> Iterator[PdfInput]:
+    """
+    PdfInput for a path, a bytes-like object or an existing PdfInput. Inputs opened
+    here are closed on exit; a PdfInput passed in is borrowed and left open, so a
+    caller can open a file once and hand it to several stages.
+    """
+    if isinstance(source, PdfInput):
+        yield source
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        pdf_input = PdfInput.from_bytes(source)
+    else:
+        pdf_input = PdfInput.from_path(source)
+    with pdf_input:
+        yield pdf_input
@@ -0,0 +1,61 @@
+import json
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict
+
+
+class ExtractionMetrics:
+    """
+    Stage timers and event counters for one extractor. Stages accumulate wall time and
+    call counts; counters are plain integers (sessions per grammar, fallbacks taken...).
+    Snapshots from several processes can be merged for batch totals.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - started
+            self.calls[name] += 1
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def reset(self):
+        self.timings.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stages": {
+                name: {"seconds": round(self.timings[name], 6), "calls": self.calls[name]}
+                for name in self.timings
+            },
+            "counters": dict(sorted(self.counters.items()))
+        }
+
+    def merge(self, snapshot: Dict[str, Any]):
+        for name, values in snapshot.get("stages", {}).items():
+            self.timings[name] += values["seconds"]
+            self.calls[name] += values["calls"]
+        for name, value in snapshot.get("counters", {}).items():
+            self.counters[name] += value
+
+    def emit(self, destination: str):
+        """Writes the metrics as JSON to a file, or to stderr when destination is '-'."""
+        payload = json.dumps(self.as_dict(), indent=2)
+        if destination == "-":
+            print(payload, file=sys.stderr)
+        else:
+            Path(destination).write_text(payload, encoding="utf-8")
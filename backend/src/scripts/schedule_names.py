@@ -0,0 +1,332 @@
+import argparse
+import json
+import math
+import re
+import sys
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from schedule_index import iter_schedule_files
+from schedule_records import write_json
+
+# Jaccard similarity of the character trigram sets above which two spellings are
+# taken for the same name
+DEFAULT_THRESHOLD = 0.6
+GRAM = 3
+ENTITY_FIELDS = {"professors": "professor", "subjects": "course"}
+
+_SEPARATOR_RE = re.compile(r"[\W_]+")
+_NUMBER_RE = re.compile(r"\d+")
+_ROMAN_RE = re.compile(r"(?:x{0,3})(?:ix|iv|v?i{0,3})")
+
+
+class _Spelling:
+    """A distinct raw name with the parts of its key that decide what it may merge with."""
+
+    __slots__ = ("name", "sessions", "core", "numbers", "initials", "roster")
+
+    def __init__(self, name: str, roster: Optional[str] = None):
+        self.name = name
+        self.sessions = 0
+        self.roster = roster
+        self.core, self.numbers, self.initials = name_key(name)
+
+
+def name_key(name: str) -> Tuple[str, Tuple[str, ...], str]:
+    """
+    (core, numbers, initials) of a name. The name is stripped of accents, split on
+    anything but letters and digits and case-folded. Capital letters standing alone
+    at either end are initials ("Benali A." -> "a"); numbers are digit runs and roman numeral
+    words past "i" ("Analyse II"), which tell courses apart; the core is every
+    other token run together, so "Algorit hmique", "ALGORITHMIQUE" and
+    "Algorithm-ique" share it.
+    """
+    plain = "".join(char for char in unicodedata.normalize("NFKD", name) if not unicodedata.combining(char))
+    tokens = _SEPARATOR_RE.sub(" ", plain).split()
+
+    def is_initial(position: int) -> bool:
+        return len(tokens[position]) == 1 and tokens[position].isupper()
+
+    start, stop = 0, len(tokens)
+    # "M oulal" is a split word rather than an initial: a leading one precedes a capitalised word
+    while start < stop and is_initial(start) and not (start + 1 < stop and tokens[start + 1][0].islower()):
+        start += 1
+    while stop > start and is_initial(stop - 1):
+        stop -= 1
+    if start == stop:
+        # Nothing but single letters: they are the name, not initials
+        start, stop = 0, len(tokens)
+    tokens = [token.casefold() for token in tokens]
+    initials = "".join(tokens[:start] + tokens[stop:])
+    body = tokens[start:stop]
+    romans = [token for token in body if len(token) > 1 and _ROMAN_RE.fullmatch(token)]
+    numbers = tuple(_NUMBER_RE.findall(" ".join(body))) + tuple(romans)
+    core = _NUMBER_RE.sub("", "".join(token for token in body if token not in romans))
+    return core or "".join(body), numbers, initials
+
+
+def _initialled_forms(name: str) -> List[str]:
+    """A multi-word roster name as timetables abbreviate it: "BENALI Amine" -> "BENALI A", "Amine B"."""
+    words = name.split()
+    if len(words) < 2:
+        return []
+    return [" ".join(words[:index] + words[index + 1:] + [words[index][0]]) for index in range(len(words))]
+
+
+def _grams(core: str) -> List[str]:
+    padded = f"^{core}$"
+    return sorted({padded[index:index + GRAM] for index in range(max(1, len(padded) - GRAM + 1))})
+
+
+def similar_pairs(cores: List[str], threshold: float) -> List[Tuple[float, int, int]]:
+    """
+    (similarity, i, j) for every pair of cores whose trigram sets have a Jaccard
+    similarity of at least threshold, most similar first, without comparing every
+    pair (PPJoin). Grams are ordered rarest first; two sets that reach the threshold
+    must share one of the first |x| - ceil(threshold * |x|) + 1 grams of the larger
+    set, so sets are probed with that prefix and indexed, shortest first, with the
+    even shorter prefix that still holds for every larger probe. A candidate is
+    dropped as soon as the grams left after the shared one cannot reach the
+    overlap the threshold requires, and posting entries too short for the current
+    probe are trimmed for good, so common grams stay cheap. Survivors are compared
+    in full.
+    """
+    gram_sets = [_grams(core) for core in cores]
+    frequency: Dict[str, int] = {}
+    for grams in gram_sets:
+        for gram in grams:
+            frequency[gram] = frequency.get(gram, 0) + 1
+    for grams in gram_sets:
+        grams.sort(key=lambda gram: (frequency[gram], gram))
+
+    sizes = [len(grams) for grams in gram_sets]
+    ratio = threshold / (1 + threshold)
+    index: Dict[str, List[Tuple[int, int]]] = {}
+    starts: Dict[str, int] = {}
+    pairs = []
+    for current in sorted(range(len(cores)), key=sizes.__getitem__):
+        grams = gram_sets[current]
+        size = sizes[current]
+        minimum = threshold * size
+        overlaps: Dict[int, int] = {}
+        for position, gram in enumerate(grams[:size - math.ceil(minimum) + 1]):
+            postings = index.get(gram)
+            if not postings:
+                continue
+            start = starts.get(gram, 0)
+            while start < len(postings) and sizes[postings[start][0]] < minimum:
+                start += 1
+            starts[gram] = start
+            left = size - position
+            for other, other_position in postings[start:]:
+                overlap = overlaps.get(other, 0)
+                if overlap < 0:
+                    continue
+                other_size = sizes[other]
+                # Shared so far plus all that is left on the shorter side against the overlap the threshold needs
+                reachable = overlap + min(left, other_size - other_position)
+                overlaps[other] = overlap + 1 if reachable >= ratio * (size + other_size) else -1
+        for position, gram in enumerate(grams[:size - math.ceil(2 * ratio * size) + 1]):
+            index.setdefault(gram, []).append((current, position))
+        if overlaps:
+            members = set(grams)
+            for other, overlap in overlaps.items():
+                if overlap < 0:
+                    continue
+                shared = len(members.intersection(gram_sets[other]))
+                similarity = shared / (size + sizes[other] - shared)
+                if similarity >= threshold:
+                    pairs.append((similarity, min(current, other), max(current, other)))
+    pairs.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+    return pairs
+
+
+class _Clusters:
+    """
+    Union-find over spellings. A cluster holds at most one roster name and, per
+    core, one set of initials, so "Benali A." and "Benali M." stay apart while a
+    bare "Benali" may join either.
+    """
+
+    def __init__(self, spellings: List[_Spelling]):
+        self.parent = list(range(len(spellings)))
+        self.roster = [spelling.roster for spelling in spellings]
+        self.initials = [{spelling.core: spelling.initials} if spelling.initials else {} for spelling in spellings]
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, first: int, second: int):
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return
+        rosters = {self.roster[first], self.roster[second]} - {None}
+        if len(self.initials[first]) < len(self.initials[second]):
+            first, second = second, first
+        initials = self.initials[first]
+        if len(rosters) > 1 or any(initials.get(core, value) != value
+                                   for core, value in self.initials[second].items()):
+            return
+        self.parent[second] = first
+        self.roster[first] = next(iter(rosters), None)
+        initials.update(self.initials[second])
+
+
+def cluster_names(counts: Dict[str, int], roster: Iterable[Dict[str, Any]] = (),
+                  threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Groups the spellings in counts (name -> sessions) into entities, most sessions
+    first: {"name": canonical, "variants": [other spellings], "sessions": total,
+    "roster": bool}. Spellings with the same core, numbers and compatible initials
+    merge outright; distinct cores merge when similar_pairs() pairs them and their
+    numbers and initials match. An entity holding a roster entry ({"name",
+    "variants"}, plus the name with one word cut to its initial) is named after it;
+    otherwise the spelling with the most sessions names it. Roster entries never
+    merge with each other, and ones no session matched are left out.
+    """
+    spellings: List[_Spelling] = []
+    roster_positions: Dict[str, int] = {}
+    for entry in roster:
+        roster_positions[entry["name"]] = len(spellings)
+        spellings.append(_Spelling(entry["name"], entry["name"]))
+        variants = [*entry.get("variants", ()), *_initialled_forms(entry["name"])]
+        spellings.extend(_Spelling(variant, entry["name"]) for variant in dict.fromkeys(variants))
+    by_name = {spelling.name: spelling for spelling in spellings}
+    for name, sessions in counts.items():
+        spelling = by_name.get(name)
+        if spelling is None:
+            spelling = by_name[name] = _Spelling(name)
+            spellings.append(spelling)
+        spelling.sessions += sessions
+
+    clusters = _Clusters(spellings)
+    for position, spelling in enumerate(spellings):
+        if spelling.roster is not None:
+            clusters.union(roster_positions[spelling.roster], position)
+
+    # Spellings sharing a core and numbers are one similar_pairs() entry; across entries only equal initials merge
+    keys: Dict[Tuple[str, Tuple[str, ...]], List[int]] = {}
+    for position, spelling in enumerate(spellings):
+        keys.setdefault((spelling.core, spelling.numbers), []).append(position)
+    groups = list(keys.values())
+    for members in groups:
+        anchors: Dict[str, int] = {}
+        for position in members:
+            clusters.union(anchors.setdefault(spellings[position].initials, position), position)
+        # A bare spelling is only given initials when one set of them is in use
+        if len(anchors) == 2 and "" in anchors:
+            clusters.union(*anchors.values())
+    for _, first, second in similar_pairs([spellings[members[0]].core for members in groups], threshold):
+        if spellings[groups[first][0]].numbers == spellings[groups[second][0]].numbers:
+            for left in groups[first]:
+                for right in groups[second]:
+                    if spellings[left].initials == spellings[right].initials:
+                        clusters.union(left, right)
+
+    entities: Dict[int, List[_Spelling]] = {}
+    for position, spelling in enumerate(spellings):
+        entities.setdefault(clusters.find(position), []).append(spelling)
+    result = []
+    for root, members in entities.items():
+        sessions = sum(spelling.sessions for spelling in members)
+        if not sessions:
+            continue
+        roster_name = clusters.roster[root]
+        seen = [spelling for spelling in members if spelling.sessions]
+        seen.sort(key=lambda spelling: (-spelling.sessions, spelling.name))
+        name = roster_name or seen[0].name
+        result.append({
+            "name": name,
+            "variants": [spelling.name for spelling in seen if spelling.name != name],
+            "sessions": sessions,
+            "roster": roster_name is not None
+        })
+    result.sort(key=lambda entity: (-entity["sessions"], entity["name"]))
+    return result
+
+
+def load_roster(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Canonical names from a JSON file: {"professors": [...], "subjects": [...]},
+    each entry a name or {"name", "variants"}. A previous normalize() report
+    reads as a roster, so reviewed names can seed the next batch.
+    """
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    return {
+        kind: [entry if isinstance(entry, dict) else {"name": entry} for entry in data.get(kind, [])]
+        for kind in ENTITY_FIELDS
+    }
+
+
+class NameNormalizer:
+    """
+    Counts the professor and course spellings of many schedules and clusters the
+    near-duplicates that OCR and layout produce ("Algorit hmique", stray hyphens,
+    trailing initials) into one entity each (see cluster_names). normalize()
+    reports the entities with their variants and an alias map from every variant
+    to its canonical name.
+    """
+
+    def __init__(self, roster: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                 threshold: float = DEFAULT_THRESHOLD):
+        self.roster = roster or {}
+        self.threshold = threshold
+        self.counts: Dict[str, Dict[str, int]] = {kind: {} for kind in ENTITY_FIELDS}
+        self.schedules = 0
+
+    def add(self, source: str, schedule: Dict[str, Any]):
+        self.schedules += 1
+        for slots in schedule.get("weekly_schedule", {}).values():
+            for slot in slots:
+                for session in slot["sessions"]:
+                    if not isinstance(session, dict):
+                        session = session.as_dict()
+                    for kind, field in ENTITY_FIELDS.items():
+                        name = session[field]
+                        if name:
+                            counts = self.counts[kind]
+                            counts[name] = counts.get(name, 0) + 1
+
+    def normalize(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {"summary": {"schedules": self.schedules}}
+        aliases = {}
+        for kind in ENTITY_FIELDS:
+            entities = cluster_names(self.counts[kind], self.roster.get(kind, ()), self.threshold)
+            report["summary"][kind] = {"spellings": len(self.counts[kind]), "entities": len(entities)}
+            report[kind] = entities
+            aliases[kind] = {variant: entity["name"] for entity in entities for variant in entity["variants"]}
+        report["aliases"] = aliases
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cluster professor and course name variants across extracted '
+                                                 'schedules')
+    parser.add_argument('inputs', nargs='+', help='Extractor output files (JSON, --all-pages or --batch NDJSON)')
+    parser.add_argument('--roster', help='JSON of canonical names: {"professors": [...], "subjects": [...]}')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Trigram Jaccard similarity needed to merge two spellings')
+    parser.add_argument('-o', '--output', help='Write the report here instead of stdout')
+    args = parser.parse_args()
+
+    normalizer = NameNormalizer(load_roster(args.roster) if args.roster else None, args.threshold)
+    for source, schedule in iter_schedule_files(args.inputs):
+        normalizer.add(source, schedule)
+    report = normalizer.normalize()
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        write_json(report, output, depth=2)
+        output.write("\n")
+    finally:
+        if args.output:
+            output.close()
+    print(json.dumps(report["summary"]), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
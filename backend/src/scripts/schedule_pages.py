@@ -0,0 +1,85 @@
+import math
+import signal
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pdf_schedule_extractor import UniversalScheduleExtractor
+from schedule_input import PdfSource, open_input, pdf_library
+from schedule_tuning import TableTuner
+
+# Upper bound on the pages one task handles, which bounds each worker's memory
+MAX_CHUNK_PAGES = 16
+
+_extractor: Optional[UniversalScheduleExtractor] = None
+
+
+def _init_worker(table_settings: Dict[str, Any], table_tuner: Optional[TableTuner] = None,
+                 table_engine: str = "pdfplumber"):
+    global _extractor
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _extractor = UniversalScheduleExtractor()
+    _extractor.table_settings = table_settings
+    _extractor.table_tuner = table_tuner
+    _extractor.table_engine = table_engine
+
+
+def page_count(source: PdfSource) -> int:
+    with open_input(source) as pdf_input, pdf_library("pdfplumber").open(pdf_input.stream()) as pdf:
+        return len(pdf.pages)
+
+
+def page_ranges(pages: int, workers: int, max_chunk: int = MAX_CHUNK_PAGES) -> List[Tuple[int, int]]:
+    """Contiguous [start, stop) ranges, about two per worker so a slow range does not leave cores idle."""
+    size = max(1, min(max_chunk, math.ceil(pages / (workers * 2))))
+    return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+
+
+def _extract_range(pdf_path: str, start: int, stop: int, kind: str) -> Tuple[List[Tuple[int, Any]], Dict[str, Any]]:
+    # Each task maps the file itself: pdfplumber documents cannot be shared across processes
+    _extractor.metrics.reset()
+    if kind == "text":
+        pages = list(_extractor._iter_page_texts(pdf_path, start, stop))
+    else:
+        pages = list(_extractor._iter_page_parts(pdf_path, start, stop))
+    return pages, _extractor.metrics.as_dict()
+
+
+def iter_page_results(extractor: UniversalScheduleExtractor, source: PdfSource, kind: str,
+                      workers: int) -> Iterator[Tuple[int, Any]]:
+    """
+    Parallel counterpart of extractor._iter_page_texts (kind "text") and
+    extractor._iter_page_parts (kind "tables"): the page range is split into
+    chunks handled by a pool of processes and the per-page results are yielded in
+    page order. At most two chunks per worker are in flight, so neither the
+    workers nor the caller hold more than a few chunks of pages at a time.
+    Worker metrics are merged into extractor.metrics. Inputs without a path (bytes
+    from the worker protocol) are handled serially rather than copied to every
+    worker.
+    """
+    with open_input(source) as pdf_input:
+        ranges = page_ranges(page_count(pdf_input), workers)
+        if len(ranges) < 2 or pdf_input.path is None:
+            serial = extractor._iter_page_texts if kind == "text" else extractor._iter_page_parts
+            yield from serial(pdf_input)
+            return
+    pdf_path = pdf_input.path
+
+    remaining = iter(ranges)
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(ranges)), initializer=_init_worker,
+                               initargs=(extractor.table_settings, extractor.table_tuner, extractor.table_engine))
+    try:
+        in_flight = deque()
+        for start, stop in remaining:
+            in_flight.append(pool.submit(_extract_range, pdf_path, start, stop, kind))
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            pages, snapshot = in_flight.popleft().result()
+            next_range = next(remaining, None)
+            if next_range is not None:
+                in_flight.append(pool.submit(_extract_range, pdf_path, *next_range, kind))
+            extractor.metrics.merge(snapshot)
+            yield from pages
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,74 @@
+import json
+from typing import Any, Dict, IO, Optional
+
+
+class Session:
+    """
+    One parsed session. Records come out of the per-line parse cache and are shared by
+    every cell that repeats the line, so treat them as immutable. They serialize as
+    the five-key object of the JSON output (see json_default).
+    """
+
+    __slots__ = ("group", "room", "course", "type", "professor")
+
+    def __init__(self, group: Optional[str], room: Optional[str], course: str, type: Optional[str],
+                 professor: Optional[str]):
+        self.group = group
+        self.room = room
+        self.course = course
+        self.type = type
+        self.professor = professor
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "group": self.group,
+            "room": self.room,
+            "course": self.course,
+            "type": self.type,
+            "professor": self.professor
+        }
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Session):
+            return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Session({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, Session):
+        return value.as_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_json(value: Any, **kwargs) -> str:
+    return json.dumps(value, ensure_ascii=False, default=json_default, **kwargs)
+
+
+def write_json(value: Any, output: IO[str], depth: int = 4):
+    """
+    Writes value to output as the same text to_json() would return, but container by
+    container down to the given depth, so a large schedule never exists as one
+    string. Below that depth each piece goes through the C encoder.
+    """
+    if depth and isinstance(value, dict) and value:
+        output.write("{")
+        for index, (key, item) in enumerate(value.items()):
+            output.write(", " if index else "")
+            output.write(json.dumps(str(key), ensure_ascii=False) + ": ")
+            write_json(item, output, depth - 1)
+        output.write("}")
+    elif depth and isinstance(value, list) and value:
+        output.write("[")
+        for index, item in enumerate(value):
+            output.write(", " if index else "")
+            write_json(item, output, depth - 1)
+        output.write("]")
+    else:
+        output.write(to_json(value))
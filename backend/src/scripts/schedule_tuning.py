@@ -0,0 +1,144 @@
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from schedule_input import pdf_library
+
+if TYPE_CHECKING:
+    from pdf_schedule_extractor import UniversalScheduleExtractor
+
+# Values tried for each tolerance; every combination is one candidate, after the
+# extractor's own table_settings, which wins ties.
+TUNING_GRID = {
+    "snap_tolerance": (3, 6, 10),
+    "join_tolerance": (3, 10, 20),
+    "text_tolerance": (3, 5),
+}
+# score_table() of a table whose every slot label and day cell came out clean
+PERFECT_SCORE = 2.0
+# Ruling positions are bucketed to this many points, so the same template printed
+# by another run (sub-point jitter) still maps to the same fingerprint.
+RULING_QUANTUM = 2.0
+
+
+def layout_fingerprint(page) -> str:
+    """
+    Short hash of the page size and the position and extent of its ruling lines.
+    Pages of the same timetable template share it; a layout with an extra, moved or
+    dashed ruling does not.
+    """
+    vertical = set()
+    horizontal = set()
+    for edge in page.edges:
+        if edge["orientation"] == "v":
+            vertical.add(tuple(round(edge[key] / RULING_QUANTUM) for key in ("x0", "top", "bottom")))
+        else:
+            horizontal.add(tuple(round(edge[key] / RULING_QUANTUM) for key in ("top", "x0", "x1")))
+    layout = [round(page.width), round(page.height), sorted(vertical), sorted(horizontal)]
+    return hashlib.blake2b(json.dumps(layout).encode(), digest_size=8).hexdigest()
+
+
+def score_table(extractor: "UniversalScheduleExtractor", page, table, settings: Dict[str, Any]) -> float:
+    """
+    How cleanly a detected table matches what the parser expects, from 0 to 2: the
+    share of time_slots_header labels found in the header row, plus the share of
+    body rows whose day cell holds exactly one day_mapping abbreviation (split rows
+    leave it empty, merged rows hold two).
+    """
+    if table is None or len(table.rows) < 2:
+        return 0.0
+    text_settings = extractor._text_settings(settings)
+    located = extractor._locate_time_slot_columns(page, table, text_settings)
+    if located is None:
+        return 0.0
+    labels, edges = located
+    expected = extractor.time_slots_header
+    slot_score = len(set(labels) & set(expected)) / len(expected)
+
+    extract_text = pdf_library("pdfplumber.utils").extract_text
+    clean_rows = 0
+    for row in table.rows[1:]:
+        _, top, _, bottom = row.bbox
+        chars = [
+            char for char in page.chars
+            if top <= (char["top"] + char["bottom"]) / 2 < bottom and (char["x0"] + char["x1"]) / 2 < edges[0]
+        ]
+        day_text = " ".join(extract_text(chars, **text_settings).lower().split()) if chars else ""
+        days = sum(day_text.count(abbr) for abbr in extractor.day_mapping)
+        clean_rows += days == 1
+    return slot_score + clean_rows / (len(table.rows) - 1)
+
+
+def candidate_settings(base: Dict[str, Any]) -> List[Dict[str, Any]]:
+    candidates = [dict(base)]
+    for values in itertools.product(*TUNING_GRID.values()):
+        candidate = {**base, **dict(zip(TUNING_GRID, values))}
+        if candidate not in candidates:
+            candidates.append(candidate)
+    return candidates
+
+
+class TableTuner:
+    """
+    Picks table_settings per page layout. The first page of an unseen layout is
+    searched: candidate_settings() entries run find_tables on it until one scores
+    PERFECT_SCORE, and the best scoring one becomes the layout's profile. Later
+    pages and files with the same layout_fingerprint reuse the profile with a single
+    find_tables call. Profiles are kept in memory and, with a directory, as one JSON
+    file per fingerprint written like cache entries, so other processes and later
+    runs skip the search too.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory) if directory else None
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, fingerprint: str) -> Path:
+        return self.directory / f"{fingerprint}.json"
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        profile = self.profiles.get(fingerprint)
+        if profile is None and self.directory is not None:
+            try:
+                profile = json.loads(self._entry(fingerprint).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return None
+            self.profiles[fingerprint] = profile
+        return profile
+
+    def put(self, fingerprint: str, profile: Dict[str, Any]):
+        self.profiles[fingerprint] = profile
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            json.dump(profile, tmp)
+        os.replace(tmp_path, self._entry(fingerprint))
+
+    def tune(self, extractor: "UniversalScheduleExtractor", page) -> Tuple[Dict[str, Any], float]:
+        best: Tuple[Dict[str, Any], float] = (extractor.table_settings, -1.0)
+        for settings in candidate_settings(extractor.table_settings):
+            tables = page.find_tables(settings)
+            score = score_table(extractor, page, tables[0] if tables else None, settings)
+            if score > best[1]:
+                best = (settings, score)
+            if score >= PERFECT_SCORE:
+                break
+        return best
+
+    def settings_for(self, extractor: "UniversalScheduleExtractor", page) -> Dict[str, Any]:
+        fingerprint = layout_fingerprint(page)
+        profile = self.get(fingerprint)
+        if profile is not None:
+            extractor.metrics.count("tuning.profile_hit")
+            return profile["settings"]
+        with extractor.metrics.stage("tune_tables"):
+            settings, score = self.tune(extractor, page)
+        extractor.metrics.count("tuning.tuned")
+        self.put(fingerprint, {"fingerprint": fingerprint, "settings": settings, "score": round(score, 4)})
+        return settings
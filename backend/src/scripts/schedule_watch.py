@@ -0,0 +1,493 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import signal
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional, Set, Tuple
+
+from schedule_batch import SCHEDULE_SUFFIXES, _init_worker, _process_file, default_workers
+from schedule_cache import ScheduleCache, file_digest
+from schedule_input import ZIP_MAGIC
+from schedule_records import to_json, write_json
+from schedule_tuning import TableTuner
+
+MANIFEST_NAME = ".schedule-manifest.ndjson"
+# Polling interval when inotify is unavailable
+DEFAULT_POLL_INTERVAL = 2.0
+# A file seen by a scan is only queued once it has not been modified for this long, so
+# an upload still being written is not parsed half way; inotify's close event skips the wait
+SETTLE_SECONDS = 2.0
+# Full rescan interval under inotify, in case an event was lost
+RESCAN_INTERVAL = 300.0
+# How often the loop checks on running jobs
+TICK = 0.2
+# A file in flight when a worker process died this many times is recorded as failed
+MAX_ATTEMPTS = 2
+# Uploads without a suffix (multer's default names) are recognised by their first bytes
+PDF_MAGIC = b"%PDF"
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+_EVENT = struct.Struct("iIII")
+
+Stat = Tuple[int, int]
+
+
+class WatchShutdown(Exception):
+    pass
+
+
+def is_schedule_file(path: Path) -> bool:
+    if path.name.startswith("."):
+        return False
+    suffix = path.suffix.lower()
+    if suffix:
+        return suffix in SCHEDULE_SUFFIXES
+    try:
+        with open(path, "rb") as head:
+            magic = head.read(len(ZIP_MAGIC))
+    except OSError:
+        return False
+    return magic in (PDF_MAGIC, ZIP_MAGIC)
+
+
+class WatchManifest:
+    """
+    Processed inputs as an append-only NDJSON log, one entry per processed file:
+    {"path", "mtime" (ns), "size", "sha256", "output", "success"}, the last entry
+    for a path winning. Appending keeps a crash from losing more than the line
+    being written; load() drops cut lines and entries for deleted files and
+    rewrites the log when that leaves it shorter. Files that failed in an earlier
+    run are not unchanged(), so each run retries them once.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.retry: Set[str] = set()
+        self._log: Optional[IO[str]] = None
+
+    def load(self):
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            lines = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self.entries[entry["path"]] = entry
+        self.entries = {path: entry for path, entry in self.entries.items() if os.path.exists(path)}
+        self.retry = {path for path, entry in self.entries.items() if not entry["success"]}
+        if len(self.entries) < len(lines):
+            self.compact()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._log = open(self.path, "a", encoding="utf-8")
+
+    def compact(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            for entry in self.entries.values():
+                tmp.write(to_json(entry) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(path)
+
+    def unchanged(self, path: str, stat: Stat) -> bool:
+        entry = self.entries.get(path)
+        return entry is not None and path not in self.retry and (entry["mtime"], entry["size"]) == stat
+
+    def record(self, entry: Dict[str, Any]):
+        self.entries[entry["path"]] = entry
+        self.retry.discard(entry["path"])
+        self._log.write(to_json(entry) + "\n")
+        self._log.flush()
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class _Inotify:
+    """Linux inotify through libc: directory watches and (path, mask) events."""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+
+    def add(self, directory: str):
+        wd = self._add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+
+    def read(self, timeout: float) -> List[Tuple[Optional[str], int]]:
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            directory = self.watches.get(wd)
+            if mask & IN_Q_OVERFLOW or directory is None:
+                events.append((None, mask))
+            elif name:
+                events.append((os.path.join(directory, os.fsdecode(name)), mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """
+    Ingestion service over upload directories. A scan queues every schedule file
+    (SCHEDULE_SUFFIXES, or a PDF/ZIP upload without a suffix) whose mtime and size
+    differ from its manifest entry; with inotify, close and move events queue the
+    file at once and a scan runs only at startup, after an event overflow and every
+    RESCAN_INTERVAL; without it, the directories are rescanned every poll_interval.
+
+    Queued paths are hashed before they run, and a file whose bytes match its
+    manifest entry (touched, or copied back in place) is not processed again.
+    At most two jobs per worker are in flight, as in --batch; the rest of a burst
+    waits in the queue, once per path, rather than in the pool. Each result is
+    written next to its input as <name>.schedule.json (<name>.schedules.ndjson with
+    all_pages), or under output_dir mirroring the watched directory, and then
+    recorded in the manifest, so a restart resumes where the last run stopped.
+    """
+
+    def __init__(self, directories: List[str], output: IO[str], output_dir: Optional[str] = None,
+                 manifest: Optional[str] = None, workers: Optional[int] = None, timeout: Optional[float] = None,
+                 cache: Optional[ScheduleCache] = None, refresh: bool = False, all_pages: bool = False,
+                 tuner: Optional[TableTuner] = None, table_engine: str = "pdfplumber",
+                 poll_interval: Optional[float] = None):
+        self.roots = [Path(directory).resolve() for directory in directories]
+        self.output = output
+        self.output_dir = Path(output_dir).resolve() if output_dir else None
+        self.manifest = WatchManifest(manifest or str((self.output_dir or self.roots[0]) / MANIFEST_NAME))
+        self.workers = workers or default_workers()
+        self.timeout = timeout
+        self.cache = cache
+        self.refresh = refresh
+        self.all_pages = all_pages
+        self.tuner = tuner
+        self.table_engine = table_engine
+        self.poll_interval = poll_interval
+        self.notifier: Optional[_Inotify] = None
+        # Queued paths in arrival order; closed ones were reported complete by inotify
+        self.pending: Dict[str, None] = {}
+        self.closed: Set[str] = set()
+        self.running: Dict[Future, Tuple[str, Stat, str, int]] = {}
+        self.attempts: Dict[str, int] = {}
+        # Set on SIGTERM or Ctrl+C: jobs cut off from then on are left for the next run
+        self.stopping = False
+        self.summary = {"processed": 0, "succeeded": 0, "failed": 0, "cached": 0, "unchanged": 0,
+                        "skipped": 0}
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self.cache, self.tuner, self.table_engine))
+
+    def send(self, message: Dict[str, Any]):
+        self.output.write(to_json(message) + "\n")
+        self.output.flush()
+
+    def _watch_tree(self, directory: Path):
+        for current, subdirectories, _ in os.walk(directory):
+            subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+            try:
+                self.notifier.add(current)
+            except OSError as e:
+                print(f"Not watching {current}: {e}", file=sys.stderr)
+
+    def scan(self, directory: Path):
+        for current, subdirectories, files in os.walk(directory):
+            subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+            for name in files:
+                self.offer(os.path.join(current, name))
+
+    def offer(self, path: str, closed: bool = False):
+        """Queues path unless it is not a schedule or its manifest entry is current."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        if not self.manifest.unchanged(path, (stat.st_mtime_ns, stat.st_size)) and is_schedule_file(Path(path)):
+            self.pending[path] = None
+            if closed:
+                self.closed.add(path)
+
+    def _on_events(self, events: List[Tuple[Optional[str], int]]):
+        for path, mask in events:
+            if path is None:
+                for root in self.roots:
+                    self.scan(root)
+            elif mask & IN_ISDIR:
+                # Files may have landed in a new directory before its watch was added
+                if not os.path.basename(path).startswith("."):
+                    self._watch_tree(Path(path))
+                    self.scan(Path(path))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self.offer(path, closed=True)
+
+    def _output_path(self, path: str) -> Path:
+        name = f"{Path(path).name}.{'schedules.ndjson' if self.all_pages else 'schedule.json'}"
+        if self.output_dir is None:
+            return Path(path).with_name(name)
+        for root in self.roots:
+            if Path(path).is_relative_to(root):
+                relative = Path(path).relative_to(root).with_name(name)
+                return self.output_dir / root.name / relative if len(self.roots) > 1 else self.output_dir / relative
+        return self.output_dir / name
+
+    def _write_output(self, path: str, data: Any) -> str:
+        target = self._output_path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so a reader never sees a partial result
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            for schedule in (data if self.all_pages else [data]):
+                write_json(schedule, tmp)
+                tmp.write("\n")
+        os.replace(tmp_path, target)
+        return str(target)
+
+    def _ready(self, path: str, stat: os.stat_result) -> bool:
+        if stat.st_size == 0:
+            return False
+        return path in self.closed or time.time() - stat.st_mtime >= SETTLE_SECONDS
+
+    def _dispatch(self, pool: ProcessPoolExecutor):
+        busy = {path for path, _, _, _ in self.running.values()}
+        for path in list(self.pending):
+            if len(self.running) >= self.workers * 2:
+                return
+            if path in busy:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                self.closed.discard(path)
+                continue
+            if not self._ready(path, stat):
+                continue
+            del self.pending[path]
+            self.closed.discard(path)
+            key = (stat.st_mtime_ns, stat.st_size)
+            try:
+                digest = file_digest(path)
+            except (OSError, ValueError) as e:
+                self._unreadable(path, key, e)
+                continue
+            entry = self.manifest.get(path)
+            if entry is not None and entry["success"] and entry["sha256"] == digest:
+                self.manifest.record({**entry, "mtime": key[0], "size": key[1]})
+                self.summary["unchanged"] += 1
+                continue
+            try:
+                future = pool.submit(_process_file, path, self.timeout, self.refresh, self.all_pages)
+            except BrokenProcessPool:
+                self.pending[path] = None
+                self.closed.add(path)
+                raise
+            self.running[future] = (path, key, digest, self.attempts.get(path, 0))
+            busy.add(path)
+
+    def _skip_unready(self):
+        # A single pass does not wait on uploads that are still empty or being written;
+        # they get no manifest entry, so the next pass looks at them again
+        for path in list(self.pending):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is not None and self._ready(path, stat):
+                continue
+            del self.pending[path]
+            self.closed.discard(path)
+            if stat is not None:
+                self.summary["skipped"] += 1
+                print(f"Skipped {path}: empty or still being written", file=sys.stderr)
+
+    def _unreadable(self, path: str, stat: Stat, error: Exception):
+        # Queued again for the next pass, e.g. a file being replaced; a file that still
+        # cannot be read after MAX_ATTEMPTS is recorded as failed
+        attempts = self.attempts.get(path, 0) + 1
+        print(f"Cannot read {path} (attempt {attempts}): {error}", file=sys.stderr)
+        if attempts >= MAX_ATTEMPTS:
+            self._record(path, stat, None, {"success": False, "error": f"{type(error).__name__}: {error}"})
+        else:
+            self.attempts[path] = attempts
+            self.pending[path] = None
+
+    def _record(self, path: str, stat: Stat, digest: Optional[str], result: Dict[str, Any]):
+        output = None
+        if result["success"]:
+            try:
+                output = self._write_output(path, result["data"])
+            except OSError as e:
+                result = {**result, "success": False, "error": f"{type(e).__name__}: {e}"}
+        self.attempts.pop(path, None)
+        self.manifest.record({"path": path, "mtime": stat[0], "size": stat[1], "sha256": digest,
+                              "output": output, "success": result["success"]})
+        self.summary["processed"] += 1
+        self.summary["succeeded" if result["success"] else "failed"] += 1
+        self.summary["cached"] += bool(result.get("cached"))
+        event = {"file": path, "success": result["success"], "output": output,
+                 "cached": result.get("cached", False), "elapsed": result.get("elapsed")}
+        if not result["success"]:
+            event["error"] = result["error"]
+        self.send(event)
+
+    def _collect(self, timeout: float) -> bool:
+        """Records finished jobs; False when the pool broke and must be replaced."""
+        done, _ = wait(self.running, timeout=timeout, return_when=FIRST_COMPLETED)
+        broken = False
+        for future in done:
+            path, stat, digest, attempts = self.running.pop(future)
+            try:
+                self._record(path, stat, digest, future.result())
+            except BrokenProcessPool:
+                broken = True
+                self._retry(path, attempts)
+        if broken:
+            for path, _, _, attempts in self.running.values():
+                self._retry(path, attempts)
+            self.running.clear()
+        return not broken
+
+    def _retry(self, path: str, attempts: int):
+        # Files in flight when a worker died are queued again; only a file that was
+        # there every time is recorded as the one that crashes it. During shutdown the
+        # workers may have been killed along with the watcher, which says nothing of the file.
+        if self.stopping:
+            self.pending[path] = None
+        elif attempts + 1 >= MAX_ATTEMPTS:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return
+            key = (stat.st_mtime_ns, stat.st_size)
+            try:
+                digest = file_digest(path)
+            except (OSError, ValueError) as e:
+                print(f"Cannot read {path}: {e}", file=sys.stderr)
+                digest = None
+            self._record(path, key, digest, {"success": False, "error": "Worker process crashed"})
+        else:
+            self.attempts[path] = attempts + 1
+            self.pending[path] = None
+            self.closed.add(path)
+
+    def _wait_for_changes(self, timeout: float):
+        if self.notifier is not None:
+            self._on_events(self.notifier.read(timeout))
+        else:
+            time.sleep(timeout)
+
+    def run(self, once: bool = False) -> Dict[str, int]:
+        """
+        Watches until SIGTERM or Ctrl+C, then lets in-flight jobs finish. With once,
+        the directories are scanned a single time and the run ends when that backlog
+        is done; files still empty or being written by then are skipped.
+        """
+        def on_term(signum, frame):
+            raise WatchShutdown()
+
+        previous = signal.signal(signal.SIGTERM, on_term)
+        self.manifest.load()
+        if not once and self.poll_interval is None:
+            try:
+                self.notifier = _Inotify()
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable ({e}); polling every {DEFAULT_POLL_INTERVAL}s", file=sys.stderr)
+            else:
+                for root in self.roots:
+                    self._watch_tree(root)
+        interval = RESCAN_INTERVAL if self.notifier is not None else (self.poll_interval or DEFAULT_POLL_INTERVAL)
+        for root in self.roots:
+            self.scan(root)
+        self.send({"type": "ready", "pid": os.getpid(), "workers": self.workers,
+                   "mode": "once" if once else "inotify" if self.notifier is not None else "polling",
+                   "watching": [str(root) for root in self.roots], "queued": len(self.pending),
+                   "manifest": str(self.manifest.path)})
+        next_scan = time.monotonic() + interval
+        pool = self._new_pool()
+        try:
+            while True:
+                try:
+                    self._dispatch(pool)
+                except BrokenProcessPool:
+                    pool.shutdown(wait=False)
+                    pool = self._new_pool()
+                    continue
+                if once and not self.running:
+                    self._skip_unready()
+                    if not self.pending:
+                        break
+                if self.running:
+                    if not self._collect(TICK):
+                        pool.shutdown(wait=False)
+                        pool = self._new_pool()
+                    if self.notifier is not None:
+                        self._on_events(self.notifier.read(0))
+                else:
+                    # Idle: sleep until a change, the next scan or the next settle check
+                    self._wait_for_changes(TICK if self.pending else max(0.0, next_scan - time.monotonic()))
+                if not once and time.monotonic() >= next_scan:
+                    for root in self.roots:
+                        self.scan(root)
+                    next_scan = time.monotonic() + interval
+        except (WatchShutdown, KeyboardInterrupt):
+            self.stopping = True
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            while self.running and self._collect(None):
+                pass
+            pool.shutdown(wait=True)
+            if self.notifier is not None:
+                self.notifier.close()
+            self.manifest.close()
+            print(json.dumps({**self.summary, "queued": len(self.pending)}), file=sys.stderr)
+        return self.summary
+
+
+def watch(directories: List[str], output_dir: Optional[str] = None, manifest: Optional[str] = None,
+          workers: Optional[int] = None, timeout: Optional[float] = None, cache: Optional[ScheduleCache] = None,
+          refresh: bool = False, all_pages: bool = False, tuner: Optional[TableTuner] = None,
+          table_engine: str = "pdfplumber", poll_interval: Optional[float] = None,
+          once: bool = False) -> Dict[str, int]:
+    watcher = FolderWatcher(directories, sys.stdout, output_dir, manifest, workers, timeout, cache, refresh,
+                            all_pages, tuner, table_engine, poll_interval)
+    return watcher.run(once)
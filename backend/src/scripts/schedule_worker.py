@@ -0,0 +1,218 @@
+import base64
+import importlib.util
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, IO, Optional
+
+from pdf_schedule_extractor import UniversalScheduleExtractor
+from schedule_batch import FileTimeoutError, deadline, default_workers
+from schedule_cache import ScheduleCache
+from schedule_input import PdfInput, pdf_library
+from schedule_records import to_json
+from schedule_tuning import TableTuner
+
+TABLE_EXTRACTOR_PATH = Path(__file__).resolve().parents[2] / "scripts" / "extract_schedule_table.py"
+
+_extractor: Optional[UniversalScheduleExtractor] = None
+_cache: Optional[ScheduleCache] = None
+_table_module = None
+
+
+class WorkerShutdown(Exception):
+    pass
+
+
+def _init_worker(cache: Optional[ScheduleCache] = None, tuner: Optional[TableTuner] = None,
+                 table_engine: str = "pdfplumber"):
+    global _extractor, _cache
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # stdout belongs to the protocol (written by the parent only); extractor prints go to stderr
+    sys.stdout = sys.stderr
+    _extractor = UniversalScheduleExtractor()
+    _extractor.table_tuner = tuner
+    _extractor.table_engine = table_engine
+    _cache = cache
+    # The CLI imports pdfplumber lazily; a long-lived worker pays for it up front instead of on its first job
+    pdf_library("pdfplumber")
+
+
+def load_table_extractor():
+    global _table_module
+    if _table_module is None:
+        spec = importlib.util.spec_from_file_location("extract_schedule_table", TABLE_EXTRACTOR_PATH)
+        _table_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_table_module)
+    return _table_module
+
+
+def _open_job_input(path: Optional[str], payload: Optional[str]) -> PdfInput:
+    if payload is not None:
+        return PdfInput.from_bytes(base64.b64decode(payload), name=path)
+    return PdfInput.from_path(path)
+
+
+def _run_job(path: Optional[str], extractor: str, timeout: Optional[float], use_cache: bool = True,
+             refresh: bool = False, all_pages: bool = False, with_metrics: bool = False,
+             payload: Optional[str] = None) -> Dict[str, Any]:
+    started = time.perf_counter()
+    _extractor.metrics.reset()
+    try:
+        with deadline(timeout), _open_job_input(path, payload) as pdf_input:
+            if extractor == "table":
+                result = load_table_extractor().extract_schedule_data(pdf_input.stream())
+            else:
+                data, cached = _extractor.process_schedule_cached(pdf_input, _cache if use_cache else None, refresh,
+                                                                 all_pages)
+                result = {"success": True, "data": data, "cached": cached}
+    except FileTimeoutError:
+        result = {"success": False, "error": f"Timed out after {timeout}s"}
+    except Exception as e:
+        result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+    result["elapsed"] = round(time.perf_counter() - started, 4)
+    if with_metrics and extractor != "table":
+        result["metrics"] = _extractor.metrics.as_dict()
+    return result
+
+
+class ExtractionWorker:
+    """
+    Long-running extraction service speaking JSON lines: one request per stdin line,
+    one response per stdout line, matched by "id". Requests:
+
+        {"id": 1, "type": "extract", "path": "...", "extractor": "schedule" | "table",
+         "options": {"timeout": 30, "cache": true, "refresh_cache": false, "all_pages": false,
+                     "metrics": false}}
+        {"id": 2, "type": "extract", "data": "<base64 PDF>", "path": "optional display name", ...}
+        {"id": 3, "type": "health"}
+        {"type": "shutdown"}
+
+    Jobs run concurrently in a pool of pre-loaded processes, so responses may come
+    back out of order. Uploads sent inline as "data" are decoded straight into the
+    buffer the job parses, so they never touch the disk. EOF on stdin, a shutdown
+    request or SIGTERM stop intake, let the in-flight jobs finish and exit.
+    """
+
+    def __init__(self, output: IO[str], workers: Optional[int] = None, cache: Optional[ScheduleCache] = None,
+                 tuner: Optional[TableTuner] = None, table_engine: str = "pdfplumber"):
+        self.output = output
+        self.workers = workers or default_workers()
+        self.cache = cache
+        self.tuner = tuner
+        self.table_engine = table_engine
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self.cache, self.tuner, self.table_engine))
+
+    def send(self, message: Dict[str, Any]):
+        line = to_json(message)
+        with self.lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "type": "health",
+            "status": "ok",
+            "pid": os.getpid(),
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "uptime": round(time.monotonic() - self.started, 3)
+        }
+
+    def submit(self, request: Dict[str, Any]):
+        job_id = request.get("id")
+        path = request.get("path")
+        data = request.get("data")
+        if not path and data is None:
+            self.send({"id": job_id, "success": False, "error": "Missing 'path' or 'data'"})
+            return
+        options = request.get("options") or {}
+        if not isinstance(options, dict):
+            self.send({"id": job_id, "success": False, "error": "'options' must be an object"})
+            return
+        args = (path, request.get("extractor", "schedule"), options.get("timeout"),
+                options.get("cache", True), options.get("refresh_cache", False), options.get("all_pages", False),
+                options.get("metrics", False), data)
+        try:
+            future = self.pool.submit(_run_job, *args)
+        except BrokenProcessPool:
+            self.pool.shutdown(wait=False)
+            self.pool = self._new_pool()
+            future = self.pool.submit(_run_job, *args)
+        with self.lock:
+            self.in_flight += 1
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+
+    def _on_done(self, job_id: Any, future: Future):
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            result = {"success": False, "error": "Worker process crashed"}
+        except Exception as e:
+            result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+        with self.lock:
+            self.in_flight -= 1
+            if result.get("success"):
+                self.completed += 1
+            else:
+                self.failed += 1
+        self.send({"id": job_id, **result})
+
+    def handle(self, line: str) -> bool:
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            self.send({"id": None, "success": False, "error": f"Invalid JSON: {e}"})
+            return True
+        if not isinstance(request, dict):
+            self.send({"id": None, "success": False, "error": "Request must be a JSON object"})
+            return True
+        kind = request.get("type", "extract")
+        if kind == "shutdown":
+            return False
+        if kind == "health":
+            self.send({"id": request.get("id"), **self.health()})
+        elif kind == "extract":
+            self.submit(request)
+        else:
+            self.send({"id": request.get("id"), "success": False, "error": f"Unknown request type: {kind}"})
+        return True
+
+    def serve(self, requests: IO[str]):
+        def on_term(signum, frame):
+            raise WorkerShutdown()
+
+        previous = signal.signal(signal.SIGTERM, on_term)
+        self.send({"type": "ready", "pid": os.getpid(), "workers": self.workers})
+        try:
+            for line in requests:
+                if line.strip() and not self.handle(line):
+                    break
+        except (WorkerShutdown, KeyboardInterrupt):
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            self.pool.shutdown(wait=True)
+            self.send({**self.health(), "type": "shutdown", "status": "stopped"})
+
+
+def serve(workers: Optional[int] = None, cache: Optional[ScheduleCache] = None, tuner: Optional[TableTuner] = None,
+          table_engine: str = "pdfplumber"):
+    ExtractionWorker(sys.stdout, workers, cache, tuner, table_engine).serve(sys.stdin)
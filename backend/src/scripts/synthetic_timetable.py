@@ -0,0 +1,436 @@
+import argparse
+import math
+import random
+import sys
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+# A3 landscape: wide enough for a whole session line in each slot column
+PAGE_WIDTH = 1191
+PAGE_HEIGHT = 842
+
+TIME_SLOTS = [
+    "08:00-09:30",
+    "09:40-11:10",
+    "11:20-12:50",
+    "13:00-14:30",
+    "14:40-16:10",
+    "16:20-17:50"
+]
+DAYS = ["Sat", "Sun", "Mon", "Tue", "Wed", "Thu"]
+WEEK_DAYS = ["Saturday", "Sunday", "Monday", "Tuesday", "Wednesday", "Thursday"]
+
+COURSES = [
+    "Algorithmique et Complexité Avancées",
+    "Génie logiciel",
+    "Système d'Exploitation: Synchronisation",
+    "Fondements de l'IA",
+    "Administration et Architecture",
+    "Techniques d'Optimisation"
+]
+PROFESSORS = ["BOULKRINAT", "HEDJAZI-DELLAL", "ZAIDI", "BELKHIR", "FRIHI", "HACHEMI", "AZZOUNE"]
+# Lecture lines carry a room or one of these type codes, which all read as "Course"
+COURSE_CODES = ["C", "SC", "F", "R2"]
+ROOMS = ["354", "453", "265", "217", "251", "129", "131"]
+# Lecture hall codes of the published timetables; only messy cells use them
+HALL_CODES = ["421T", "244T", "431T"]
+# Messy cells wrap every session at this many characters, as the published timetables do
+WRAP_WIDTH = 34
+SESSION_TYPES = {"DW": "Directed Work", "PW": "Practical Work"}
+
+# One session as the extractor reports it: group, room, course, type, professor
+SessionTruth = Dict[str, Optional[str]]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class _Canvas:
+    def __init__(self):
+        self.ops: List[str] = []
+
+    def text(self, x: float, y: float, text: str, size: float = 6):
+        self.ops.append(f"BT /F1 {size} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET")
+
+    def line(self, x1: float, y1: float, x2: float, y2: float):
+        self.ops.append(f"{x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S")
+
+    def stream(self) -> bytes:
+        return ("0.5 w\n" + "\n".join(self.ops)).encode("cp1252", errors="replace")
+
+
+def _write_pdf(pages: List[bytes], path: Path):
+    objects: List[bytes] = []
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    for i, content in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def _wrap(text: str, width: int) -> List[str]:
+    lines: List[str] = []
+    current = ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}".strip()
+    if current:
+        lines.append(current)
+    return lines
+
+
+def random_cell(rng: random.Random, groups: int, messy: bool = False) -> Tuple[List[str], List[SessionTruth]]:
+    """
+    The lines of one random cell and the sessions they hold: none, a lecture, or
+    directed/practical work for one or two groups. Every session is a single line in
+    one of the grammars the session parser reads. With messy, cells look like the
+    published timetables instead: sessions wrapped over several lines, lectures as
+    course/code/professor lines, and TP.<room> practical rooms. The line-per-session
+    parser does not read those back exactly; the sessions are still the intended ones.
+    """
+    roll = rng.random()
+    if roll < 0.35:
+        return [], []
+    course = rng.choice(COURSES)
+    if roll < 0.65:
+        code, professor = rng.choice(ROOMS + COURSE_CODES + (HALL_CODES if messy else [])), rng.choice(PROFESSORS)
+        session = {"group": None, "room": code if code in ROOMS else None, "course": course, "type": "Course",
+                   "professor": professor}
+        if messy:
+            return _wrap(course, WRAP_WIDTH) + [code, professor], [session]
+        return [f"{course} course {code} {professor}"], [session]
+    lines: List[str] = []
+    sessions: List[SessionTruth] = []
+    for group in sorted(rng.sample(range(1, groups + 1), rng.randint(1, min(2, groups)))):
+        room, code, professor = rng.choice(ROOMS), rng.choice(list(SESSION_TYPES)), rng.choice(PROFESSORS)
+        if messy and rng.random() < 0.3:
+            room = "TP." + room
+        line = f"G{group}:{room} / {course} -- {code}, {professor}"
+        lines.extend(_wrap(line, WRAP_WIDTH) if messy else [line])
+        sessions.append({"group": f"G{group}", "room": room, "course": course, "type": SESSION_TYPES[code],
+                         "professor": professor})
+    return lines, sessions
+
+
+def _header_lines(section: str, date: str) -> List[str]:
+    return [
+        "University of Science and Technology Houari Boumediene",
+        "Vice-rectorate in charge of the higher education of graduation, the continuing education et degrees",
+        f"Schedules of: 3rd year SOFT.ENG -- Section: {section}",
+        f"College year: 2024/2025     Semester: 1     Date: {date}",
+    ]
+
+
+def build_page(rng: random.Random, section: str, groups: int, fragmented: bool,
+               date: str = "21/11/2024", messy: bool = False) -> Tuple[bytes, Dict[Tuple[str, str], List[str]],
+                                                  Dict[Tuple[str, str], List[SessionTruth]]]:
+    canvas = _Canvas()
+    top = PAGE_HEIGHT - 30
+    for (offset, size), line in zip(((0, 9), (12, 7), (26, 8), (38, 8)), _header_lines(section, date)):
+        canvas.text(20, top - offset, line, size)
+
+    left, right = 20.0, PAGE_WIDTH - 20.0
+    day_width = 50.0
+    slot_width = (right - left - day_width) / len(TIME_SLOTS)
+    table_top, header_height, row_height = top - 55, 18.0, 72.0
+    table_bottom = table_top - header_height - row_height * len(DAYS)
+
+    columns = [left, left + day_width] + [left + day_width + slot_width * (i + 1) for i in range(len(TIME_SLOTS))]
+    rows = [table_top, table_top - header_height] + [table_top - header_height - row_height * (i + 1)
+                                                     for i in range(len(DAYS))]
+    extra_columns: List[float] = []
+    if fragmented:
+        # Spurious rulings reproducing the 14-column split seen on the published timetables
+        slot_left = [columns[i + 1] for i in range(len(TIME_SLOTS))]
+        extra_columns = [
+            left + day_width * 0.45,
+            slot_left[0] + slot_width - 14, slot_left[1] + slot_width - 14,
+            slot_left[2] + slot_width / 2, slot_left[3] + slot_width / 2,
+            slot_left[4] + 14, slot_left[5] + slot_width / 2,
+        ]
+    for x in columns + extra_columns:
+        canvas.line(x, table_top, x, table_bottom)
+    for y in rows:
+        canvas.line(left, y, right, y)
+
+    for i, slot in enumerate(TIME_SLOTS):
+        canvas.text(columns[i + 1] + 6 + slot_width / 2 - 20, table_top - 12, slot, 7)
+
+    cells: Dict[Tuple[str, str], List[str]] = {}
+    sessions: Dict[Tuple[str, str], List[SessionTruth]] = {}
+    for d, day in enumerate(DAYS):
+        row_top = rows[d + 1]
+        canvas.text(left + 12, row_top - row_height / 2, day, 8)
+        for s, slot in enumerate(TIME_SLOTS):
+            lines, sessions[(day, slot)] = random_cell(rng, groups, messy)
+            cells[(day, slot)] = lines
+            for n, line in enumerate(lines):
+                canvas.text(columns[s + 1] + 6, row_top - 9 - 6.5 * n, line, 5)
+    return canvas.stream(), cells, sessions
+
+
+def generate_timetable(path: Path, section: str = "A", pages: int = 1, groups: int = 3,
+                       fragmented: bool = True, seed: int = 0, date: str = "21/11/2024",
+                       messy: bool = False) -> List[Dict]:
+    """
+    Writes a timetable PDF with one section per page and returns, per page, the section
+    letter, the cell lines that were drawn and the sessions they hold, both keyed by
+    (day, slot). With fragmented=True extra rulings split the grid into the 14 columns
+    pdfplumber reports for the published USTHB timetables; messy draws their wrapped
+    cells too (see random_cell). Output is deterministic for a given seed.
+    """
+    rng = random.Random(seed)
+    streams = []
+    layouts = []
+    for page_no in range(pages):
+        page_section = chr(ord(section) + page_no % 26) if pages > 1 else section
+        stream, cells, sessions = build_page(rng, page_section, groups, fragmented, date, messy)
+        streams.append(stream)
+        layouts.append({"section": page_section, "cells": cells, "sessions": sessions})
+    _write_pdf(streams, path)
+    return layouts
+
+
+def raw_timetable_lines(rng: random.Random, section: str, groups: int, semester: int = 1) -> List[str]:
+    """
+    One timetable as the plain listing extract_schedule_table.py reads: header lines,
+    then a line per day, per time slot and per session.
+    """
+    lines = [
+        "University of Science and Technology Houari Boumediene",
+        f"Schedules of : ING.INFO -- Section: {section}",
+        f"College year: 2024/2025 Semester: {semester} Date: 12/02/2025",
+        " ".join(f"G{group}" for group in range(1, groups + 1))
+    ]
+    for day in WEEK_DAYS:
+        lines.append(day)
+        for slot in TIME_SLOTS:
+            lines.append(slot.replace("-", " - ") if rng.random() < 0.3 else slot)
+            lines += random_cell(rng, groups)[0]
+    return lines
+
+
+def generate_text_timetable(path: Path, section: str = "A", pages: int = 1, groups: int = 3,
+                            seed: int = 0) -> List[List[str]]:
+    """
+    Writes raw_timetable_lines() listings as a PDF, one timetable per page, and
+    returns the lines of each page. These are the files extract_schedule_table.py
+    can read; the grid layout of generate_timetable() is not.
+    """
+    rng = random.Random(seed)
+    streams = []
+    listings = []
+    for page_no in range(pages):
+        lines = raw_timetable_lines(rng, chr(ord(section) + page_no % 26), groups, 1 + page_no % 2)
+        canvas = _Canvas()
+        for n, line in enumerate(lines):
+            canvas.text(20, PAGE_HEIGHT - 20 - 6.5 * n, line, 5.5)
+        streams.append(canvas.stream())
+        listings.append(lines)
+    _write_pdf(streams, path)
+    return listings
+
+
+def build_section(rng: random.Random, section: str, groups: int,
+                  date: str = "21/11/2024") -> Tuple[List[str], List[List[str]], Dict[Tuple[str, str], List[str]],
+                                                     Dict[Tuple[str, str], List[SessionTruth]]]:
+    """(header lines, table rows, cells, sessions) of one section for the XLSX and DOCX writers."""
+    cells: Dict[Tuple[str, str], List[str]] = {}
+    sessions: Dict[Tuple[str, str], List[SessionTruth]] = {}
+    rows = [[""] + TIME_SLOTS]
+    for day in DAYS:
+        row = [day]
+        for slot in TIME_SLOTS:
+            cells[(day, slot)], sessions[(day, slot)] = random_cell(rng, groups)
+            row.append("\n".join(cells[(day, slot)]))
+        rows.append(row)
+    return _header_lines(section, date), rows, cells, sessions
+
+
+def _column_name(index: int) -> str:
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+def _write_xlsx(sheets: List[Iterable[List[str]]], path: Path):
+    """A minimal workbook, one worksheet per entry of sheets, with shared strings like Excel writes."""
+    strings: Dict[str, int] = {}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as package:
+        for number, rows in enumerate(sheets, start=1):
+            with package.open(f"xl/worksheets/sheet{number}.xml", "w") as part:
+                part.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                           b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                           b'<sheetData>')
+                for r, row in enumerate(rows, start=1):
+                    cells = "".join(
+                        f'<c r="{_column_name(c)}{r}" t="s"><v>{strings.setdefault(value, len(strings))}</v></c>'
+                        for c, value in enumerate(row) if value
+                    )
+                    part.write(f'<row r="{r}">{cells}</row>'.encode())
+                part.write(b"</sheetData></worksheet>")
+        count = len(sheets)
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for n in range(1, count + 1)
+        )
+        package.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            + overrides + '</Types>'
+        ))
+        package.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+            'officeDocument" Target="xl/workbook.xml"/></Relationships>'
+        ))
+        package.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + "".join(f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>' for n in range(1, count + 1))
+            + '</sheets></workbook>'
+        ))
+        package.writestr("xl/_rels/workbook.xml.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+                      f'relationships/worksheet" Target="worksheets/sheet{n}.xml"/>' for n in range(1, count + 1))
+            + '</Relationships>'
+        ))
+        package.writestr("xl/sharedStrings.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" uniqueCount="{len(strings)}">'
+            + "".join(f'<si><t xml:space="preserve">{escape(value)}</t></si>' for value in strings)
+            + '</sst>'
+        ))
+
+
+def _docx_paragraph(text: str) -> str:
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def _write_docx(sections: Iterable[Tuple[List[str], List[List[str]]]], path: Path):
+    """A minimal document: each section's header lines as paragraphs, then its table."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ))
+        package.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+            'officeDocument" Target="word/document.xml"/></Relationships>'
+        ))
+        with package.open("word/document.xml", "w") as part:
+            part.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                       b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                       b'<w:body>')
+            for header, rows in sections:
+                body = "".join(_docx_paragraph(line) for line in header) + "<w:tbl>"
+                for row in rows:
+                    body += "<w:tr>" + "".join(
+                        "<w:tc>" + "".join(_docx_paragraph(line) for line in (cell.split("\n") if cell else [""]))
+                        + "</w:tc>" for cell in row
+                    ) + "</w:tr>"
+                part.write((body + "</w:tbl>" + _docx_paragraph("")).encode())
+            part.write(b"</w:body></w:document>")
+
+
+def generate_document(path: Path, section: str = "A", sections: int = 1, groups: int = 3, seed: int = 0,
+                      date: str = "21/11/2024", sheets: int = 1) -> List[Dict]:
+    """
+    Writes the same kind of timetables as generate_timetable() as an XLSX workbook or
+    a DOCX document (by path suffix): sections timetables, each under its header
+    lines. A workbook spreads them over sheets worksheets, stacked in each one.
+    Returns the section letter, cell lines and sessions of every timetable, in order.
+    """
+    rng = random.Random(seed)
+    built = [build_section(rng, chr(ord(section) + n % 26) if sections > 1 else section, groups, date)
+             for n in range(sections)]
+    layouts = [{"section": header[2].rsplit(" ", 1)[-1], "cells": cells, "sessions": sessions}
+               for header, _, cells, sessions in built]
+    if path.suffix.lower() == ".docx":
+        _write_docx(((header, rows) for header, rows, _, _ in built), path)
+        return layouts
+
+    per_sheet = math.ceil(sections / max(1, sheets))
+    pages = []
+    for start in range(0, sections, per_sheet):
+        rows: List[List[str]] = []
+        for header, table, _, _ in built[start:start + per_sheet]:
+            rows += [[line] for line in header] + table + [[]]
+        pages.append(rows)
+    _write_xlsx(pages, path)
+    return layouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic timetable PDFs')
+    parser.add_argument('output_dir', help='Directory to write the PDFs into')
+    parser.add_argument('--sections', type=int, default=1, help='Number of files (one section each)')
+    parser.add_argument('--format', choices=('pdf', 'xlsx', 'docx'), default='pdf',
+                        help='File format; xlsx and docx files hold --pages timetables each')
+    parser.add_argument('--pages', type=int, default=1, help='Pages per file')
+    parser.add_argument('--groups', type=int, default=3, help='Groups per section')
+    parser.add_argument('--clean', action='store_true', help='Draw only the logical grid (no fragmented cells)')
+    parser.add_argument('--messy', action='store_true',
+                        help='Wrap cells over several lines and use TP.<room> rooms, as the published PDFs do')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(args.sections):
+        section = chr(ord('A') + i % 26)
+        path = output_dir / f"timetable-{section}-{i:04d}.{args.format}"
+        if args.format == "pdf":
+            generate_timetable(path, section, args.pages, args.groups, not args.clean, args.seed + i,
+                               messy=args.messy)
+        else:
+            generate_document(path, section, args.pages, args.groups, args.seed + i)
+        print(path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
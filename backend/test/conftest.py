@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The extractor scripts are run as scripts, not installed; make them importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "scripts"))
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from gemini_standin_server import start_server
+from schedule_worker import load_table_extractor
+from synthetic_timetable import generate_timetable
+
+table_extractor = load_table_extractor()
+
+
+@pytest.fixture
+def standin(request):
+    server = start_server(**getattr(request, "param", {}))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server, **options):
+    return table_extractor.GeminiFallbackClient(f"http://127.0.0.1:{server.server_port}", **options)
+
+
+@pytest.mark.parametrize("standin", [{"fail_first": 2, "retry_after": "3600"}], indirect=True)
+def test_retry_after_is_capped(standin):
+    client = _client(standin, retries=2, max_backoff=0.05)
+    started = time.perf_counter()
+    try:
+        result = client.extract("Saturday\n08:00-09:30")
+    finally:
+        client.close()
+
+    assert result["success"]
+    assert time.perf_counter() - started < 5
+    assert standin.state.stats()["requests"] == 3
+
+
+@pytest.mark.parametrize("standin", [{"fail_rate": 1.0}], indirect=True)
+def test_gives_up_after_the_last_retry(standin):
+    client = _client(standin, retries=1, backoff=0.01)
+    try:
+        with pytest.raises(table_extractor.GeminiFallbackError, match="after 2 attempts"):
+            client.extract("Saturday")
+    finally:
+        client.close()
+    assert standin.state.stats()["requests"] == 2
+
+
+@pytest.mark.parametrize("standin", [{"fail_first": 1, "status": 400}], indirect=True)
+def test_client_errors_are_not_retried(standin):
+    client = _client(standin, retries=3, backoff=0.01)
+    try:
+        with pytest.raises(table_extractor.GeminiFallbackError, match="HTTP 400"):
+            client.extract("Saturday")
+    finally:
+        client.close()
+    assert standin.state.stats()["requests"] == 1
+
+
+@pytest.mark.parametrize("standin", [{"fail_first": 1}], indirect=True)
+def test_batch_falls_back_once_per_distinct_text(tmp_path, standin):
+    # The scanner finds no entries in the grid layout, so every file goes to the fallback
+    paths = []
+    for name in ("first", "second"):
+        paths.append(str(tmp_path / f"{name}.pdf"))
+        generate_timetable(tmp_path / f"{name}.pdf", seed=7)
+    client = _client(standin, retries=1, backoff=0.01)
+    try:
+        results = table_extractor.extract_schedule_batch(paths, client)
+    finally:
+        client.close()
+
+    assert [result["success"] for result in results] == [True, True]
+    assert results[0] == results[1]
+    assert standin.state.stats() == {"requests": 2, "failures": 1, "unique_texts": 1, "peak_concurrent": 1}
@@ -0,0 +1,116 @@
+import contextlib
+import io
+import json
+import re
+
+import pytest
+
+from bench_schedule_extractor import (GOLDEN_DIR, SESSIONS_BASELINE, SESSIONS_GOLDEN, bench_table_engines,
+                                      expected_schedules, session_accuracy, truth_view)
+from pdf_schedule_extractor import TABLE_ENGINES, UniversalScheduleExtractor
+from schedule_engines import ENGINES, TextEngine
+from schedule_worker import load_table_extractor
+from synthetic_timetable import generate_text_timetable, generate_timetable
+
+GOLDEN_CASES = sorted(GOLDEN_DIR.glob("*.json"))
+
+
+def _extract(path, table_engine="pdfplumber"):
+    extractor = UniversalScheduleExtractor()
+    extractor.table_engine = table_engine
+    with contextlib.redirect_stdout(io.StringIO()):
+        return list(extractor.iter_schedules(str(path)))
+
+
+@pytest.mark.parametrize("table_engine", TABLE_ENGINES)
+@pytest.mark.parametrize("case_path", GOLDEN_CASES, ids=lambda path: path.stem)
+def test_golden_case(tmp_path, case_path, table_engine):
+    case = json.loads(case_path.read_text(encoding="utf-8"))
+    pdf_path = tmp_path / "timetable.pdf"
+    layouts = generate_timetable(pdf_path, **case["config"])
+
+    # The recorded schedules are what the generator drew, not a snapshot of the extractor
+    assert case["expected"] == expected_schedules(layouts)
+    assert [truth_view(schedule) for schedule in _extract(pdf_path, table_engine)] == case["expected"]
+
+
+@pytest.mark.parametrize("fragmented", [False, True])
+@pytest.mark.parametrize("seed", range(3))
+def test_generated_sessions_are_read_exactly(tmp_path, fragmented, seed):
+    pdf_path = tmp_path / "timetable.pdf"
+    layouts = generate_timetable(pdf_path, "C", pages=2, groups=4, fragmented=fragmented, seed=100 + seed)
+
+    read, drawn = session_accuracy(_extract(pdf_path), layouts)
+    assert drawn == 2 * 36
+    assert read == drawn
+
+
+def test_last_slot_column_is_read(tmp_path):
+    pdf_path = tmp_path / "timetable.pdf"
+    layouts = generate_timetable(pdf_path, fragmented=True, seed=3)
+    last = layouts[0]["sessions"]
+    assert any(sessions for (_, slot), sessions in last.items() if slot == "16:20-17:50")
+
+    weekly = truth_view(_extract(pdf_path)[0])["weekly_schedule"]
+    assert any(entry["time"] == "16:20-17:50" for entries in weekly.values() for entry in entries)
+
+
+def test_session_corpus():
+    extractor = UniversalScheduleExtractor()
+    corpus = json.loads(SESSIONS_GOLDEN.read_text(encoding="utf-8"))
+    assert corpus
+    for entry in corpus:
+        assert extractor._parse_single_session_block(entry["input"]) == entry["sessions"], entry["input"]
+
+
+def test_baseline_session_corpus():
+    # Snapshot of the original parser on published-style cells: its output must not change
+    extractor = UniversalScheduleExtractor()
+    corpus = json.loads(SESSIONS_BASELINE.read_text(encoding="utf-8"))
+    assert corpus
+    for entry in corpus:
+        assert extractor._parse_single_session_block(entry["input"]) == entry["sessions"], entry["input"]
+
+
+def test_messy_cells_are_read_by_every_table_engine(tmp_path):
+    pdf_path = tmp_path / "timetable.pdf"
+    layouts = generate_timetable(pdf_path, "D", pages=2, groups=4, seed=7, messy=True)
+    cells = [(page["cells"][key], page["sessions"][key]) for page in layouts for key in page["cells"]]
+    assert any(":TP." in line for lines, _ in cells for line in lines)
+    assert any(len(lines) > len(sessions) for lines, sessions in cells if sessions)
+
+    report = bench_table_engines([str(pdf_path)], {str(pdf_path): layouts})
+    for engine in TABLE_ENGINES:
+        assert report[engine]["cells"] == 2 * 36
+        assert report[engine]["cell_accuracy"] == 1.0
+
+
+def test_table_extractor_reads_text_listings(tmp_path):
+    pdf_path = tmp_path / "listing.pdf"
+    listings = generate_text_timetable(pdf_path, "B", pages=2, seed=5)
+
+    result = load_table_extractor().extract_schedule_data(str(pdf_path))
+    assert result["success"]
+    names = {entry["courseName"] for entry in result["data"]["scheduleEntries"]}
+    # Every session line carrying a code such as G1 or R2 becomes an entry
+    coded = [line for lines in listings for line in lines[4:] if re.search(r"[A-Z]+\d+", line)]
+    assert coded and all(line in names for line in coded)
+    assert result["data"]["headerInfo"]["academicYear"] == "2024/2025"
+
+
+class _BrokenEngine(TextEngine):
+    name = "broken"
+
+    def extract(self, extractor, source, page_workers=None):
+        raise ValueError("malformed page")
+
+
+def test_engine_errors_escalate_to_the_next_engine(tmp_path, monkeypatch):
+    monkeypatch.setitem(ENGINES, _BrokenEngine.name, _BrokenEngine())
+    pdf_path = tmp_path / "timetable.pdf"
+    generate_timetable(pdf_path)
+    extractor = UniversalScheduleExtractor()
+
+    assert extractor.extract_text_with_engine(str(pdf_path), ladder=["broken", "layout"])[1] == "layout"
+    with pytest.raises(ValueError, match="Unknown extraction engine"):
+        extractor.extract_text_with_engine(str(pdf_path), ladder=["layout", "missing"])
@@ -0,0 +1,56 @@
+import io
+import os
+import time
+
+from schedule_watch import MAX_ATTEMPTS, FolderWatcher, WatchManifest
+from synthetic_timetable import generate_timetable
+
+
+def _age(path, seconds=60):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_once_skips_empty_uploads(tmp_path):
+    generate_timetable(tmp_path / "timetable.pdf", seed=1)
+    (tmp_path / "upload.pdf").touch()
+    for path in tmp_path.iterdir():
+        _age(path)
+
+    summary = FolderWatcher([str(tmp_path)], io.StringIO(), workers=1).run(once=True)
+    assert summary["succeeded"] == 1
+    assert summary["skipped"] == 1
+    assert (tmp_path / "timetable.pdf.schedule.json").exists()
+    assert not (tmp_path / "upload.pdf.schedule.json").exists()
+
+
+def test_failed_entries_are_retried_by_the_next_run(tmp_path):
+    pdf_path = tmp_path / "timetable.pdf"
+    generate_timetable(pdf_path, seed=1)
+    stat = os.stat(pdf_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    manifest = WatchManifest(str(tmp_path / "manifest.ndjson"))
+    manifest.load()
+    manifest.record({"path": str(pdf_path), "mtime": key[0], "size": key[1], "sha256": None, "output": None,
+                     "success": False})
+    assert manifest.unchanged(str(pdf_path), key)
+    manifest.close()
+
+    manifest = WatchManifest(str(tmp_path / "manifest.ndjson"))
+    manifest.load()
+    assert not manifest.unchanged(str(pdf_path), key)
+    manifest.close()
+
+
+def test_jobs_cut_off_by_shutdown_are_not_recorded(tmp_path):
+    pdf_path = tmp_path / "timetable.pdf"
+    generate_timetable(pdf_path, seed=1)
+    watcher = FolderWatcher([str(tmp_path)], io.StringIO(), workers=1)
+    watcher.manifest.load()
+    watcher.stopping = True
+    watcher._retry(str(pdf_path), MAX_ATTEMPTS)
+    watcher.manifest.close()
+
+    assert str(pdf_path) in watcher.pending
+    assert watcher.manifest.get(str(pdf_path)) is None
+    assert watcher.summary["failed"] == 0